@@ -0,0 +1,65 @@
+"""列表总数统计：缓存与估算
+
+缓存键由“去掉排序后的 SQL + 参数”与所依赖模型的版本号组成，
+模型发生 post_save/post_delete 时版本号递增，旧缓存自然失效；TTL 兜底处理
+绕过信号的批量 update()。使用进程内缓存时各进程独立失效，多进程部署建议
+为 CACHES 配置共享后端。
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+COUNT_MODES = ('exact', 'estimate', 'none')
+
+
+def _generation_key(model):
+    return f'count-gen:{model._meta.label_lower}'
+
+
+def bump_generation(model):
+    """递增模型版本号，使依赖该模型的计数缓存失效"""
+    key = _generation_key(model)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def _cache_key(queryset, depends_on):
+    models = sorted({queryset.model, *depends_on}, key=lambda m: m._meta.label_lower)
+    generations = cache.get_many([_generation_key(m) for m in models])
+    sql, params = queryset.order_by().query.sql_with_params()
+    raw = '|'.join([
+        queryset.db, sql, repr(params),
+        *[f'{m._meta.label_lower}={generations.get(_generation_key(m), 0)}' for m in models],
+    ])
+    return 'count:' + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def count_queryset(queryset, mode='exact', depends_on=()):
+    """
+    统计查询集总数，返回 (total, exact)
+    - exact: 精确总数，命中缓存时不查询数据库
+    - estimate: 有缓存用缓存，否则最多统计 ADMIN_COUNT_ESTIMATE_LIMIT 行，超出时 exact 为 False
+    - none: 不统计，返回 (None, False)
+    """
+    if mode == 'none':
+        return None, False
+
+    key = _cache_key(queryset, depends_on)
+    total = cache.get(key)
+    if total is not None:
+        return total, True
+
+    if mode == 'estimate':
+        limit = getattr(settings, 'ADMIN_COUNT_ESTIMATE_LIMIT', 10000)
+        total = queryset.order_by()[:limit].count()
+        if total >= limit:
+            return total, False
+    else:
+        total = queryset.count()
+
+    cache.set(key, total, getattr(settings, 'ADMIN_COUNT_CACHE_TTL', 30))
+    return total, True
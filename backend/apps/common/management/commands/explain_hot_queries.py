@@ -0,0 +1,129 @@
+"""打印各列表/统计接口核心查询的执行计划，便于发现退化为全表扫描的查询"""
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.needs.models import Need
+from apps.regions.models import Region
+from apps.responses.models import Response
+from apps.search.engine import need_index, response_index
+from apps.stats.models import MonthlyStatistics
+from apps.users.models import User
+
+# SQLite 计划中的全表扫描（SCAN <表> 后面不是 USING INDEX，也不是 FTS 虚拟表查询）
+FULL_SCAN_RE = re.compile(r'\bSCAN (\w+)\b(?! USING| VIRTUAL TABLE)')
+TEMP_SORT_RE = re.compile(r'USE TEMP B-TREE FOR ORDER BY')
+
+
+def hot_queries(user_id, region_id, need_id):
+    """(名称, 查询集) 列表，与对应视图中的查询保持一致"""
+    # 与统计接口的默认范围一致：近6个月
+    end_month = timezone.now().strftime('%Y%m')
+    start_month = (timezone.now() - timedelta(days=180)).strftime('%Y%m')
+    return [
+        ('GET /api/needs/', Need.objects.filter(status=0).select_related('user', 'region').order_by('-created_at')[:10]),
+        ('GET /api/needs/?service_type=&region=', Need.objects.filter(
+            status=0, region_id=region_id, service_type='管道维修'
+        ).order_by('-created_at')[:10]),
+        ('GET /api/needs/?search=', Need.objects.filter(status=0).filter(need_index.filter_q('维修'))[:10]),
+        ('GET /api/needs/my/', Need.objects.filter(user_id=user_id).order_by('-created_at')[:10]),
+        ('GET /api/needs/admin/?status=', Need.objects.filter(status=-1).order_by('-created_at')[:10]),
+        ('GET /api/needs/admin/?region_id=&service_type=', Need.objects.filter(
+            region_id=region_id, service_type='管道维修'
+        ).order_by('id')[:10]),
+        ('GET /api/responses/my/', Response.objects.filter(user_id=user_id).with_need()[:10]),
+        ('GET /api/responses/my/accepted/', Response.objects.filter(user_id=user_id, status=1).with_need()[:10]),
+        ('GET /api/responses/need/<id>/', Response.objects.filter(need_id=need_id).exclude(status=3).select_related('user')),
+        ('POST /api/responses/ (重复响应校验)', Response.objects.filter(
+            need_id=need_id, user_id=user_id, status__in=[0, 1]
+        ).order_by().values('id')[:1]),
+        ('GET /api/responses/admin/?status=', Response.objects.filter(status=0).with_need().order_by('id')[:10]),
+        ('GET /api/responses/admin/?search=', Response.objects.filter(response_index.filter_q('经验')).order_by('id')[:10]),
+        ('GET /api/auth/admin/users/', User.objects.annotate(
+            needs_count=Count('needs', distinct=True),
+            responses_count=Count('service_responses', distinct=True),
+        ).order_by('id')[:10]),
+        ('GET /api/regions/admin/', Region.objects.annotate(
+            needs_count=Count('needs', distinct=True)
+        ).order_by('province', 'city', 'name')[:20]),
+        ('GET /api/statistics/monthly/?region_id=', MonthlyStatistics.objects.filter(
+            month__gte=start_month, month__lte=end_month, region_id=region_id
+        ).values('month').annotate(
+            needs=Sum('total_needs'), accepted=Sum('total_accepted')
+        ).order_by('month')),
+        ('GET /api/statistics/cube/?dimensions=province,service_type', MonthlyStatistics.objects.filter(
+            month__gte=start_month, month__lte=end_month
+        ).values('region__province', 'service_type').annotate(
+            needs=Sum('total_needs'), accepted=Sum('total_accepted')
+        ).order_by('region__province', 'service_type')),
+        ('GET /api/statistics/cube/?dimensions=month&region_id=', MonthlyStatistics.objects.filter(
+            month__gte=start_month, month__lte=end_month, region_id=region_id
+        ).values('month').annotate(needs=Sum('total_needs'), accepted=Sum('total_accepted')).order_by('month')),
+        ('GET /api/statistics/overview/', Need.objects.filter(status=0).values('id')),
+        ('GET /api/needs/admin/?has_responses=false', Need.objects.filter(
+            Q(total_response_count=0) & Q(status=0)
+        ).order_by('-created_at')[:10]),
+    ]
+
+
+class Command(BaseCommand):
+    help = '打印热点查询的 SQLite 执行计划，标出全表扫描'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sql',
+            action='store_true',
+            help='同时打印 SQL 语句',
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='先执行 ANALYZE 收集统计信息（查询规划器据此选择索引）',
+        )
+        parser.add_argument(
+            '--fail-on-scan',
+            action='store_true',
+            help='存在全表扫描时以非零状态退出（用于 CI）',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('仅支持 SQLite 执行计划')
+
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        user_id = User.objects.values_list('id', flat=True).first() or 1
+        region_id = Region.objects.values_list('id', flat=True).first() or 1
+        need_id = Need.objects.values_list('id', flat=True).first() or 1
+
+        scans = []
+        for name, queryset in hot_queries(user_id, region_id, need_id):
+            plan = queryset.explain()
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{name}'))
+            if options['sql']:
+                self.stdout.write(str(queryset.query))
+            for line in plan.splitlines():
+                if FULL_SCAN_RE.search(line):
+                    self.stdout.write(self.style.ERROR(f'  {line}  <- 全表扫描'))
+                    scans.append((name, line.strip()))
+                elif TEMP_SORT_RE.search(line):
+                    self.stdout.write(self.style.WARNING(f'  {line}  <- 临时排序'))
+                else:
+                    self.stdout.write(f'  {line}')
+
+        self.stdout.write('\n' + '-' * 80)
+        if not scans:
+            self.stdout.write(self.style.SUCCESS('所有热点查询均使用索引'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'{len(scans)} 处全表扫描:'))
+        for name, line in scans:
+            self.stdout.write(f'  {name}: {line}')
+        if options['fail_on_scan']:
+            raise CommandError('存在全表扫描')
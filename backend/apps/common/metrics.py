@@ -0,0 +1,284 @@
+"""进程内指标采集，跨 worker 进程汇总后以 Prometheus 文本格式输出（/api/_metrics）
+
+每个进程把指标写入 METRICS_DIR 下自己的内存映射文件 metrics_<pid>.db：
+- 文件内容为 键 -> float64，新键追加到末尾，已有的值原地修改；请求路径上只修改本进程的文件，
+  进程之间没有锁，也没有 IPC（进程内的线程之间用一把锁保护读-改-写）
+- /api/_metrics 读取目录中的所有文件按键求和；gauge（如处理中的请求数）只统计仍在运行的进程，
+  计数器和直方图保留已退出进程的累计值，汇总值不会因为 worker 重启而减小
+- 服务整体重启时应清空 METRICS_DIR（与 prometheus_client 的多进程模式相同）
+
+耗时等用直方图记录，分位数由 Prometheus 计算，例如每个接口的 p99：
+    histogram_quantile(0.99, sum by (view, le) (rate(http_request_duration_seconds_bucket[5m])))
+"""
+import glob
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.functional import cached_property
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 7.5, 10, 30, 60)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+# 指标名 -> (类型, 说明, 直方图分桶)
+METRICS = {
+    'http_requests_total': ('counter', '请求数（按接口、方法、状态码）', None),
+    'http_request_duration_seconds': ('histogram', '请求处理耗时（秒）', LATENCY_BUCKETS),
+    'http_response_size_bytes': ('histogram', '响应体大小（字节）', SIZE_BUCKETS),
+    'http_request_db_queries': ('histogram', '每个请求的 SQL 查询数', QUERY_BUCKETS),
+    'http_requests_in_flight': ('gauge', '正在处理的请求数', None),
+    'media_served_bytes_total': ('counter', 'serve_media 发送的字节数（按发送方式）', None),
+    'upload_bytes_total': ('counter', 'FileUploadView 接收的文件字节数', None),
+    'upload_duration_seconds': ('histogram', 'FileUploadView 的处理耗时（秒，含接收文件）', LATENCY_BUCKETS),
+}
+
+HISTOGRAM_SUFFIXES = ('_bucket', '_sum', '_count')
+
+FILE_NAME_RE = re.compile(r'^metrics_(\d+)\.db$')
+
+HEADER = struct.Struct('<Q')  # 已使用的字节数
+KEY_LENGTH = struct.Struct('<I')
+VALUE = struct.Struct('<d')
+INITIAL_SIZE = 1024 * 1024
+
+
+def _key(name, labels):
+    return _encode_key(name, tuple(sorted(labels.items())))
+
+
+@lru_cache(maxsize=4096)
+def _encode_key(name, labels):
+    return json.dumps([name, labels], ensure_ascii=False)
+
+
+def _family(name):
+    """样本名所属的指标（直方图的 _bucket/_sum/_count 归入直方图）"""
+    if name not in METRICS:
+        for suffix in HISTOGRAM_SUFFIXES:
+            if name.endswith(suffix) and name[:-len(suffix)] in METRICS:
+                return name[:-len(suffix)]
+    return name
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == math.inf else repr(float(bound))
+
+
+def read_entries(data):
+    """逐个产出文件内容中的 (键, 值偏移量, 值)"""
+    used = HEADER.unpack_from(data, 0)[0] if len(data) >= HEADER.size else 0
+    offset = HEADER.size
+    while offset < used:
+        length = KEY_LENGTH.unpack_from(data, offset)[0]
+        key = bytes(data[offset + KEY_LENGTH.size:offset + KEY_LENGTH.size + length]).decode()
+        offset += KEY_LENGTH.size + length
+        offset += -offset % 8  # 值按 8 字节对齐
+        yield key, offset, VALUE.unpack_from(data, offset)[0]
+        offset += VALUE.size
+
+
+class MmapValues:
+    """一个进程的指标文件（调用方负责线程同步）"""
+
+    def __init__(self, path):
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = os.fstat(self._fd).st_size
+        if size < INITIAL_SIZE:
+            os.ftruncate(self._fd, INITIAL_SIZE)
+            size = INITIAL_SIZE
+        self._map = mmap.mmap(self._fd, size)
+        self._used = HEADER.unpack_from(self._map, 0)[0] or HEADER.size
+        self._offsets = {}
+        for key, offset, _ in read_entries(self._map):
+            self._offsets[key] = offset
+            # 同一 PID 的旧进程留下的文件：gauge 清零，计数器继续累加
+            if METRICS.get(_family(json.loads(key)[0]), ('',))[0] == 'gauge':
+                VALUE.pack_into(self._map, offset, 0.0)
+
+    def _append(self, key):
+        data = key.encode()
+        offset = self._used + KEY_LENGTH.size + len(data)
+        offset += -offset % 8
+        if offset + VALUE.size > len(self._map):
+            size = len(self._map)
+            while offset + VALUE.size > size:
+                size *= 2
+            self._map.close()
+            os.ftruncate(self._fd, size)
+            self._map = mmap.mmap(self._fd, size)
+        KEY_LENGTH.pack_into(self._map, self._used, len(data))
+        self._map[self._used + KEY_LENGTH.size:self._used + KEY_LENGTH.size + len(data)] = data
+        VALUE.pack_into(self._map, offset, 0.0)
+        self._used = offset + VALUE.size
+        # 条目写完后再更新长度，读取方不会读到写了一半的条目
+        HEADER.pack_into(self._map, 0, self._used)
+        self._offsets[key] = offset
+        return offset
+
+    def add(self, key, amount):
+        offset = self._offsets.get(key)
+        if offset is None:
+            offset = self._append(key)
+        VALUE.pack_into(self._map, offset, VALUE.unpack_from(self._map, offset)[0] + amount)
+
+
+class Metrics:
+    """写入本进程指标文件（首次写入时创建；fork 出的子进程写入自己的文件）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = None
+        self._pid = None
+
+    @cached_property
+    def directory(self):
+        return str(getattr(settings, 'METRICS_DIR', os.path.join(settings.BASE_DIR, 'metrics')))
+
+    def _file(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            os.makedirs(self.directory, exist_ok=True)
+            self._values = MmapValues(os.path.join(self.directory, f'metrics_{pid}.db'))
+            self._pid = pid
+        return self._values
+
+    def inc(self, name, amount=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._file().add(key, amount)
+
+    def observe(self, name, value, **labels):
+        """直方图：记录到第一个上界不小于 value 的分桶（输出时再累加）"""
+        bound = next((bound for bound in METRICS[name][2] if value <= bound), math.inf)
+        bucket_key = _key(f'{name}_bucket', {**labels, 'le': _format_bound(bound)})
+        sum_key = _key(f'{name}_sum', labels)
+        count_key = _key(f'{name}_count', labels)
+        with self._lock:
+            values = self._file()
+            values.add(bucket_key, 1)
+            values.add(sum_key, value)
+            values.add(count_key, 1)
+
+
+metrics = Metrics()
+
+
+def _process_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """汇总所有进程的指标文件，返回 {(样本名, ((标签, 值), ...)): 值}"""
+    totals = defaultdict(float)
+    for path in glob.glob(os.path.join(metrics.directory, 'metrics_*.db')):
+        match = FILE_NAME_RE.match(os.path.basename(path))
+        if not match:
+            continue
+        alive = _process_alive(int(match.group(1)))
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            continue
+        for key, _, value in read_entries(data):
+            name, labels = json.loads(key)
+            if not alive and METRICS.get(_family(name), ('',))[0] == 'gauge':
+                continue
+            totals[(name, tuple(tuple(label) for label in labels))] += value
+    return totals
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _sample(name, labels, value):
+    if labels:
+        label_text = ','.join(f'{label}="{_escape(label_value)}"' for label, label_value in labels)
+        name = f'{name}{{{label_text}}}'
+    value = float(value)
+    return f'{name} {int(value) if value.is_integer() else repr(value)}'
+
+
+def render():
+    """Prometheus 文本格式（0.0.4）"""
+    samples = defaultdict(dict)  # 指标名 -> {(样本名, 标签): 值}
+    for (name, labels), value in collect().items():
+        samples[_family(name)][(name, labels)] = value
+
+    lines = []
+    for family, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {family} {help_text}')
+        lines.append(f'# TYPE {family} {kind}')
+        family_samples = samples.get(family, {})
+        if kind != 'histogram':
+            for (name, labels), value in sorted(family_samples.items()):
+                lines.append(_sample(name, labels, value))
+            continue
+
+        # 直方图：按标签组输出累计分桶、_sum、_count
+        groups = defaultdict(dict)
+        for (name, labels), value in family_samples.items():
+            if name.endswith('_bucket'):
+                base = tuple(label for label in labels if label[0] != 'le')
+                groups[base][dict(labels)['le']] = value
+            else:
+                groups.setdefault(tuple(labels), {})
+        for labels in sorted(groups):
+            cumulative = 0
+            for bound in (*buckets, math.inf):
+                cumulative += groups[labels].get(_format_bound(bound), 0)
+                lines.append(_sample(f'{family}_bucket', (*labels, ('le', _format_bound(bound))), cumulative))
+            lines.append(_sample(f'{family}_sum', labels, family_samples.get((f'{family}_sum', labels), 0)))
+            lines.append(_sample(f'{family}_count', labels, family_samples.get((f'{family}_count', labels), 0)))
+    return '\n'.join(lines) + '\n'
+
+
+KNOWN_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+class MetricsMiddleware:
+    """按接口（URL 路由）记录请求数、状态码、耗时、响应大小、SQL 查询数和处理中的请求数"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics.inc('http_requests_in_flight')
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.inc('http_requests_in_flight', -1)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.route if match else '<unmatched>'
+        method = request.method if request.method in KNOWN_METHODS else 'OTHER'
+        metrics.inc('http_requests_total', view=view, method=method, status=str(response.status_code))
+        metrics.observe('http_request_duration_seconds', elapsed, view=view, method=method)
+        if response.has_header('Content-Length'):
+            metrics.observe('http_response_size_bytes', int(response['Content-Length']), view=view)
+        elif not response.streaming:
+            metrics.observe('http_response_size_bytes', len(response.content), view=view)
+        query_stats = getattr(request, 'query_stats', None)
+        if query_stats is not None:
+            metrics.observe('http_request_db_queries', query_stats.count, view=view)
+        return response
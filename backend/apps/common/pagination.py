@@ -0,0 +1,261 @@
+"""分页工具
+
+- 页码分页：兼容原有的 page/page_size 参数和返回格式
+- 游标分页（keyset）：请求携带 cursor 参数时启用，按排序字段的值定位，
+  不使用 OFFSET，也不执行 COUNT(*)，任意页的查询代价与第一页相同
+- 管理端页码分页的总数可通过 count=exact|estimate|none 控制（见 counting）
+"""
+import base64
+import binascii
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+from .counting import COUNT_MODES, count_queryset
+
+
+class InvalidCursor(Exception):
+    """游标无法解析或与当前排序不匹配"""
+
+
+class KeysetPaginator:
+    """
+    基于排序字段值的游标分页
+    ordering 为 order_by 字符串列表，末尾自动补充主键作为唯一排序键
+    """
+
+    def __init__(self, queryset, ordering, page_size):
+        self.queryset = queryset
+        self.page_size = page_size
+        self.ordering = self._normalize_ordering(ordering)
+        self.fields = [self._resolve_field(name.lstrip('-')) for name in self.ordering]
+
+    def _normalize_ordering(self, ordering):
+        ordering = [name for name in ordering if isinstance(name, str)]
+        ordering = ['id' if name == 'pk' else '-id' if name == '-pk' else name for name in ordering]
+        if not ordering:
+            ordering = list(self.queryset.model._meta.ordering) or ['-id']
+        if any(name.lstrip('-') == '?' for name in ordering):
+            raise InvalidCursor('随机排序不支持游标分页')
+        if not any(name.lstrip('-') == 'id' for name in ordering):
+            ordering.append('-id' if ordering[-1].startswith('-') else 'id')
+        return ordering
+
+    def _resolve_field(self, path):
+        """解析排序字段（支持 need__title 这类关联路径），注解字段返回 None"""
+        model = self.queryset.model
+        field = None
+        for part in path.split('__'):
+            if model is None:
+                return None
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                return None
+            model = field.related_model
+        return field
+
+    # ---------- 游标编解码 ----------
+
+    def encode(self, obj, direction):
+        position = [self._dump(self._value(obj, name.lstrip('-'))) for name in self.ordering]
+        payload = json.dumps({'o': self.ordering, 'p': position, 'd': direction}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            ordering, position, direction = payload['o'], payload['p'], payload['d']
+        except (ValueError, TypeError, KeyError, binascii.Error):
+            raise InvalidCursor('无效的游标')
+        if ordering != self.ordering or len(position) != len(self.ordering) or direction not in ('n', 'p'):
+            raise InvalidCursor('游标与当前排序不匹配')
+        values = []
+        for field, value in zip(self.fields, position):
+            if field is not None and value is not None:
+                try:
+                    value = field.to_python(value)
+                except Exception:
+                    raise InvalidCursor('无效的游标')
+            values.append(value)
+        return values, direction
+
+    def _value(self, obj, path):
+        for part in path.split('__'):
+            if obj is None:
+                return None
+            obj = getattr(obj, part)
+        # 外键排序按关联主键比较
+        return getattr(obj, 'pk', obj)
+
+    def _dump(self, value):
+        if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+            return value.isoformat()
+        if isinstance(value, decimal.Decimal):
+            return str(value)
+        return value
+
+    # ---------- 查询 ----------
+
+    def _after(self, ordering, values):
+        """构造“位于游标之后”的条件：(a > x) OR (a = x AND b > y) ..."""
+        nulls_largest = connections[self.queryset.db].features.nulls_order_largest
+        condition = Q(pk__in=[])
+        equal = Q()
+        for name, field, value in zip(ordering, self.fields, values):
+            column = name.lstrip('-')
+            descending = name.startswith('-')
+            nullable = field is None or field.null
+            # NULL 在排序中位于最前或最后，取决于数据库和方向
+            nulls_after = nulls_largest != descending
+            if value is None:
+                greater = Q(**{f'{column}__isnull': False}) if not nulls_after else Q(pk__in=[])
+                same = Q(**{f'{column}__isnull': True})
+            else:
+                greater = Q(**{f'{column}__lt' if descending else f'{column}__gt': value})
+                if nullable and nulls_after:
+                    greater |= Q(**{f'{column}__isnull': True})
+                same = Q(**{column: value})
+            condition |= equal & greater
+            equal &= same
+        return condition
+
+    def page(self, cursor=None):
+        """
+        返回 (items, next_cursor, prev_cursor)
+        cursor 为空时返回第一页
+        """
+        reverse_ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+
+        if cursor:
+            values, direction = self.decode(cursor)
+        else:
+            values, direction = None, 'n'
+
+        if direction == 'n':
+            queryset = self.queryset.order_by(*self.ordering)
+            if values is not None:
+                queryset = queryset.filter(self._after(self.ordering, values))
+        else:
+            queryset = self.queryset.order_by(*reverse_ordering).filter(
+                self._after(reverse_ordering, values)
+            )
+
+        items = list(queryset[:self.page_size + 1])
+        has_more = len(items) > self.page_size
+        items = items[:self.page_size]
+
+        if direction == 'n':
+            has_next, has_prev = has_more, values is not None
+        else:
+            items.reverse()
+            has_next, has_prev = True, has_more
+
+        next_cursor = self.encode(items[-1], 'n') if items and has_next else None
+        prev_cursor = self.encode(items[0], 'p') if items and has_prev else None
+        return items, next_cursor, prev_cursor
+
+
+def paginate(request, queryset, default_page_size=10, count_depends_on=()):
+    """
+    管理端列表分页，返回 (items, meta)
+    - 默认按 page/page_size 分页，meta 包含 total/page/page_size/total_pages
+      总数带缓存，count_depends_on 为影响筛选结果的其他模型（写入时缓存失效）
+    - count=estimate 时总数可能为估算值，count=none 时不统计总数，
+      这两种模式下 meta 额外包含 total_exact 和 has_next
+    - 携带 cursor 参数时使用游标分页，meta 额外包含 next_cursor/prev_cursor，
+      total/page/total_pages 为 None（不执行 COUNT）
+    游标无效时抛出 InvalidCursor
+    """
+    page_size = int(request.query_params.get('page_size', default_page_size))
+
+    if 'cursor' in request.query_params:
+        paginator = KeysetPaginator(queryset, queryset.query.order_by, page_size)
+        items, next_cursor, prev_cursor = paginator.page(request.query_params.get('cursor'))
+        return items, {
+            'total': None,
+            'page': None,
+            'page_size': page_size,
+            'total_pages': None,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+        }
+
+    page = int(request.query_params.get('page', 1))
+    count_mode = request.query_params.get('count', 'exact')
+    if count_mode not in COUNT_MODES:
+        count_mode = 'exact'
+    total, exact = count_queryset(queryset, count_mode, count_depends_on)
+    start = (page - 1) * page_size
+    end = start + page_size
+
+    if count_mode == 'exact':
+        return queryset[start:end], {
+            'total': total,
+            'page': page,
+            'page_size': page_size,
+            'total_pages': (total + page_size - 1) // page_size,
+        }
+
+    # 多取一行判断是否还有下一页
+    items = list(queryset[start:end + 1])
+    has_next = len(items) > page_size
+    return items[:page_size], {
+        'total': total,
+        'page': page,
+        'page_size': page_size,
+        'total_pages': (total + page_size - 1) // page_size if total is not None else None,
+        'total_exact': exact,
+        'has_next': has_next,
+    }
+
+
+class HybridPagination(PageNumberPagination):
+    """
+    DRF 分页：默认页码分页；请求携带 cursor 参数时切换为游标分页
+    游标模式下 count 为 null，next/previous 为带 cursor 的链接
+    """
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        try:
+            paginator = KeysetPaginator(queryset, queryset.query.order_by, page_size)
+            items, self.next_cursor, self.prev_cursor = paginator.page(
+                request.query_params.get(self.cursor_query_param)
+            )
+        except InvalidCursor as exc:
+            raise NotFound(str(exc))
+        return items
+
+    def _cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({
+            'count': None,
+            'next': self._cursor_link(self.next_cursor),
+            'previous': self._cursor_link(self.prev_cursor),
+            'results': data,
+        })
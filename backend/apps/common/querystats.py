@@ -0,0 +1,101 @@
+"""每个请求的 SQL 统计（不依赖 DEBUG）
+
+QueryStatsMiddleware 在请求期间给所有数据库连接加上 execute_wrapper，记录查询次数、SQL 总耗时、
+最慢的语句和重复语句数（同一 SQL 模板执行多次，参数不同也算重复，即 N+1 查询的特征），并输出到：
+- 响应头 Server-Timing（db、total 两项，浏览器开发者工具的 Timing 面板可直接查看）和 X-Query-Count
+- 日志 apps.common.querystats，每个请求一行 JSON；重复语句数达到 QUERY_STATS_DUPLICATE_WARNING
+  或最慢语句超过 QUERY_STATS_SLOW_QUERY_MS 毫秒时为 WARNING，其余为 INFO
+
+响应头不包含 SQL 文本，SQL 只写入日志。只统计请求线程中的查询（线程池中的查询不计入）。
+"""
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# 日志中 SQL 的最大长度
+SQL_LOG_LENGTH = 500
+
+
+class QueryRecorder:
+    """execute_wrapper：累计查询次数、耗时、最慢语句和各 SQL 模板的执行次数"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = (0.0, '')
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            self.statements[sql] += 1
+            if elapsed > self.slowest[0]:
+                self.slowest = (elapsed, sql)
+
+    @property
+    def duplicates(self):
+        """重复执行的次数（每个 SQL 模板第一次之后的执行）"""
+        return self.count - len(self.statements)
+
+
+class QueryStatsMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.duplicate_warning = getattr(settings, 'QUERY_STATS_DUPLICATE_WARNING', 5)
+        self.slow_query = getattr(settings, 'QUERY_STATS_SLOW_QUERY_MS', 200) / 1000
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request.query_stats = recorder  # 供 MetricsMiddleware 读取
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        response['X-Query-Count'] = str(recorder.count)
+        response['Server-Timing'] = (
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries, {recorder.duplicates} duplicates", '
+            f'total;dur={total * 1000:.1f}'
+        )
+        self.log(request, response, recorder, total)
+        return response
+
+    def log(self, request, response, recorder, total):
+        warn = recorder.duplicates >= self.duplicate_warning or recorder.slowest[0] >= self.slow_query
+        level = logging.WARNING if warn else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        record = {
+            'time': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 1),
+            'queries': recorder.count,
+            'db_ms': round(recorder.duration * 1000, 1),
+            'duplicates': recorder.duplicates,
+        }
+        if recorder.count:
+            slowest_time, slowest_sql = recorder.slowest
+            record['slowest_ms'] = round(slowest_time * 1000, 1)
+            record['slowest_sql'] = slowest_sql[:SQL_LOG_LENGTH]
+        if recorder.duplicates:
+            sql, times = recorder.statements.most_common(1)[0]
+            record['most_repeated'] = {'count': times, 'sql': sql[:SQL_LOG_LENGTH]}
+        logger.log(level, json.dumps(record, ensure_ascii=False))
@@ -0,0 +1,152 @@
+"""接口限流与过载保护中间件
+
+限流：进程内令牌桶，已登录请求按用户ID（从 Bearer 令牌解析，只校验签名和有效期），
+未登录请求按客户端 IP 计数。接口按开销分为几类，各类单独计数，配额见 RATE_LIMITS：
+- auth：登录、注册、刷新令牌、修改密码（密码哈希开销大，也防止暴力破解）
+- upload：文件上传（请求体大）
+- search：带 search 参数的查询（icontains/全文检索）
+- admin：管理端接口
+- default：其余接口
+每类配额为 (次数, 秒数)：桶容量为次数，每秒补充 次数/秒数 个令牌。响应带 RateLimit-Limit、
+RateLimit-Remaining、RateLimit-Reset（令牌补满的秒数）头，超出配额返回 429 和 Retry-After。
+
+过载保护：进程内正在处理的 /api/ 请求数达到 LOAD_SHED_IN_FLIGHT 时，新的请求直接返回 503，
+只有 default 类的 GET/HEAD（开销小的读接口）可以继续进入，直到 LOAD_SHED_PRIORITY_IN_FLIGHT。
+
+计数都在进程内，多进程部署时每个进程各自限流（实际配额约为 进程数 × 配额）。
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+DEFAULT_RATE_LIMITS = {
+    'auth': (10, 60),
+    'upload': (60, 60),
+    'search': (30, 60),
+    'admin': (120, 60),
+    'default': (300, 60),
+}
+
+AUTH_PATHS = (
+    '/api/auth/login/',
+    '/api/auth/register/',
+    '/api/auth/token/refresh/',
+    '/api/auth/change-password/',
+)
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+def classify(request):
+    """请求所属的限流类别"""
+    path = request.path
+    if path in AUTH_PATHS:
+        return 'auth'
+    if path.startswith('/api/needs/upload/'):
+        return 'upload'
+    if request.method in READ_METHODS and request.GET.get('search'):
+        return 'search'
+    if '/admin/' in path:
+        return 'admin'
+    return 'default'
+
+
+def client_ip(request):
+    """客户端 IP；位于 RATE_LIMIT_PROXY_COUNT 层反向代理之后时取 X-Forwarded-For 中对应的地址"""
+    proxies = getattr(settings, 'RATE_LIMIT_PROXY_COUNT', 0)
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_key(request):
+    """限流键：令牌有效时为用户ID，否则为客户端 IP"""
+    header = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(header) == 2 and header[0] in api_settings.AUTH_HEADER_TYPES:
+        try:
+            return f'user:{AccessToken(header[1])[api_settings.USER_ID_CLAIM]}'
+        except (TokenError, KeyError):
+            pass
+    return f'ip:{client_ip(request)}'
+
+
+class TokenBuckets:
+    """线程安全的令牌桶集合，最多保留 max_keys 个桶（淘汰最久未使用的，被淘汰的键下次按满桶计算）"""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # 键 -> (令牌数, 更新时间)
+
+    def take(self, key, capacity, rate):
+        """取一个令牌，返回 (是否允许, 剩余令牌数)"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                self._buckets.move_to_end(key)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, tokens
+
+
+class RateLimitMiddleware:
+    """/api/ 请求的限流与过载保护（OPTIONS 预检请求不计数）"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.limits = {**DEFAULT_RATE_LIMITS, **getattr(settings, 'RATE_LIMITS', {})}
+        self.buckets = TokenBuckets(getattr(settings, 'RATE_LIMIT_MAX_KEYS', 100000))
+        self.shed_threshold = getattr(settings, 'LOAD_SHED_IN_FLIGHT', 32)
+        self.priority_threshold = getattr(settings, 'LOAD_SHED_PRIORITY_IN_FLIGHT', 64)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        if not request.path.startswith('/api/') or request.method == 'OPTIONS':
+            return self.get_response(request)
+
+        category = classify(request)
+        priority = category == 'default' and request.method in READ_METHODS
+        with self._lock:
+            if self._in_flight >= (self.priority_threshold if priority else self.shed_threshold):
+                return JsonResponse({
+                    'code': 503,
+                    'message': '服务繁忙，请稍后重试'
+                }, status=503, headers={'Retry-After': '1'})
+            self._in_flight += 1
+
+        try:
+            count, period = self.limits[category]
+            rate = count / period
+            allowed, remaining = self.buckets.take((category, client_key(request)), count, rate)
+            if allowed:
+                response = self.get_response(request)
+            else:
+                response = JsonResponse({
+                    'code': 429,
+                    'message': '请求过于频繁，请稍后重试'
+                }, status=429, headers={'Retry-After': str(math.ceil((1 - remaining) / rate))})
+            response['RateLimit-Limit'] = str(count)
+            response['RateLimit-Remaining'] = str(int(remaining))
+            response['RateLimit-Reset'] = str(math.ceil((count - remaining) / rate))
+            return response
+        finally:
+            with self._lock:
+                self._in_flight -= 1
@@ -0,0 +1,11 @@
+"""任意模型写入时使对应的计数缓存失效"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .counting import bump_generation
+
+
+@receiver(post_save, dispatch_uid='common_count_cache_save')
+@receiver(post_delete, dispatch_uid='common_count_cache_delete')
+def invalidate_count_cache(sender, **kwargs):
+    bump_generation(sender)
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+from .metrics import render
+from .ratelimit import client_ip
+
+
+def metrics_view(request):
+    """Prometheus 抓取接口，只允许 METRICS_ALLOWED_IPS 中的地址访问"""
+    if client_ip(request) not in getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1', '::1']):
+        return JsonResponse({
+            'code': 403,
+            'message': '无权访问'
+        }, status=403)
+    return HttpResponse(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,134 @@
+"""按内容寻址的上传文件存储
+
+上传文件按 SHA-256 存放在 images|videos/<sha[:2]>/<sha[2:4]>/<sha><ext>，MediaBlob 记录摘要到
+存储路径的索引。重复上传的文件直接返回已有文件的 URL，不再写盘；同一内容的 URL 始终不变。
+重复上传时更新 last_uploaded_at 和文件修改时间，孤立文件清理的宽限期从这次上传重新计算。
+引用关系见 references.py。
+"""
+import hashlib
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .chunked import file_sha256
+from .models import MediaBlob
+
+
+def blob_path(file_type, digest, ext):
+    """内容寻址的存储路径：images/ab/cd/abcd...<ext>（前两级目录避免单目录文件过多）"""
+    directory = 'images' if file_type == 'image' else 'videos'
+    return f'{directory}/{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+
+def uploaded_file_sha256(file):
+    """上传文件（内存或 Django 临时文件）的 SHA-256"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_blob(digest):
+    """已存储且文件仍存在的 MediaBlob，没有时返回 None"""
+    blob = MediaBlob.objects.filter(sha256=digest).first()
+    if blob is not None and os.path.exists(blob.full_path):
+        return blob
+    return None
+
+
+def touch_blob(blob):
+    """
+    重复上传已有内容时调用：更新 last_uploaded_at 和文件修改时间，
+    避免已无引用、超过宽限期的文件在本次上传被保存引用前被清理
+    索引已被删除（正被清理）时返回 False
+    """
+    now = timezone.now()
+    if not MediaBlob.objects.filter(pk=blob.pk).update(last_uploaded_at=now):
+        return False
+    blob.last_uploaded_at = now
+    try:
+        os.utime(blob.full_path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _place(digest, file_type, ext, size, write):
+    """
+    内容已存在时更新上传时间后返回已有 MediaBlob（不调用 write）
+    否则调用 write(目标绝对路径) 写入文件并登记索引，返回 (MediaBlob, 是否写入)
+    """
+    blob = MediaBlob.objects.filter(sha256=digest).first()
+    if blob is not None and os.path.exists(blob.full_path):
+        if touch_blob(blob):
+            return blob, False
+        # 刚被清理，按新文件重新写入
+        blob = MediaBlob.objects.filter(sha256=digest).first()
+
+    # 索引存在但文件丢失时按原路径恢复，URL 保持不变
+    relative_path = blob.relative_path if blob else blob_path(file_type, digest, ext)
+    full_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    write(full_path)
+    os.chmod(full_path, getattr(settings, 'FILE_UPLOAD_PERMISSIONS', None) or 0o644)
+
+    if blob is None:
+        try:
+            with transaction.atomic():
+                blob = MediaBlob.objects.create(sha256=digest, relative_path=relative_path, size=size)
+        except IntegrityError:
+            # 并发上传了相同内容，写入的是同一路径的同一内容
+            blob = MediaBlob.objects.get(sha256=digest)
+    return blob, True
+
+
+def _write_upload(file, full_path):
+    """把上传文件写到 full_path"""
+    if hasattr(file, 'temporary_file_path'):
+        # 大文件已由 Django 写入临时文件，同一文件系统时直接改名
+        file_move_safe(file.temporary_file_path(), full_path, allow_overwrite=True)
+        return
+    temp_path = f'{full_path}.{uuid.uuid4().hex}.tmp'
+    with open(temp_path, 'wb') as destination:
+        for chunk in file.chunks():
+            destination.write(chunk)
+    os.replace(temp_path, full_path)
+
+
+def store_upload(file, file_type, ext, prepare=None):
+    """
+    保存上传文件（ext 为按内容识别的扩展名），返回 (MediaBlob, 是否写入)；重复内容不写盘
+    prepare(临时文件路径) 在计算摘要前原地改写文件（视频 faststart），摘要和 URL 对应改写后的内容，
+    URL 返回后文件内容不再变化
+    """
+    if prepare is None:
+        digest = uploaded_file_sha256(file)
+        return _place(digest, file_type, ext, file.size, lambda full_path: _write_upload(file, full_path))
+
+    directory = 'images' if file_type == 'image' else 'videos'
+    temp_path = os.path.join(settings.MEDIA_ROOT, directory, f'{uuid.uuid4().hex}.tmp')
+    os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+    _write_upload(file, temp_path)
+    try:
+        prepare(temp_path)
+        digest = file_sha256(temp_path)
+        size = os.path.getsize(temp_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    blob, written = _place(digest, file_type, ext, size, lambda full_path: os.replace(temp_path, full_path))
+    if not written:
+        os.remove(temp_path)
+    return blob, written
+
+
+def adopt_file(path, file_type, digest, ext, size):
+    """把已写完并校验过的文件（分块上传的 .part）纳入存储；内容已存在时删除该文件"""
+    blob, written = _place(digest, file_type, ext, size, lambda full_path: os.replace(path, full_path))
+    if not written:
+        os.remove(path)
+    return blob
@@ -0,0 +1,71 @@
+"""分块上传的文件读写
+
+分块按偏移量用 os.pwrite 直接写入 .part 文件（可乱序、可重传），不经过 Django 的
+上传处理器和临时文件，请求体边读边写，内存占用只有一个读缓冲。
+"""
+import hashlib
+import os
+
+READ_SIZE = 256 * 1024
+
+
+class ChunkError(Exception):
+    """分块数据不完整或校验失败"""
+
+
+def write_chunk(path, offset, stream, length, sha256=None, check_head=None):
+    """
+    从 stream 读取 length 字节写入 path 的 offset 处
+    sha256 为该块的十六进制摘要（可选），不一致时抛出 ChunkError
+    check_head(首次读到的数据) 返回错误信息时在写入任何数据前抛出 ChunkError
+    """
+    digest = hashlib.sha256()
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        position = offset
+        remaining = length
+        while remaining > 0:
+            data = stream.read(min(READ_SIZE, remaining))
+            if not data:
+                raise ChunkError(f'数据不完整，缺少 {remaining} 字节')
+            if check_head is not None:
+                error = check_head(data)
+                if error:
+                    raise ChunkError(error)
+                check_head = None
+            digest.update(data)
+            view = memoryview(data)
+            while view:
+                written = os.pwrite(fd, view, position)
+                position += written
+                view = view[written:]
+            remaining -= len(data)
+    finally:
+        os.close(fd)
+    if sha256 and digest.hexdigest() != sha256.lower():
+        raise ChunkError('分块校验失败')
+
+
+def file_sha256(path):
+    """整个文件的 SHA-256 十六进制摘要"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while data := f.read(1024 * 1024):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def ranges_equal(path, other_path, ranges):
+    """两个文件在 ranges [(偏移, 长度), ...] 处的内容是否全部相同"""
+    with open(path, 'rb') as f, open(other_path, 'rb') as other:
+        for offset, length in ranges:
+            f.seek(offset)
+            other.seek(offset)
+            remaining = length
+            while remaining > 0:
+                size = min(READ_SIZE, remaining)
+                data = f.read(size)
+                if not data or data != other.read(size):
+                    return False
+                remaining -= len(data)
+    return True
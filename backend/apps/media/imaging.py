@@ -0,0 +1,55 @@
+"""图片缩略图生成（在进程池的子进程中执行，只依赖 Pillow，不导入 Django）"""
+import os
+
+from PIL import Image, ImageOps
+
+# 格式 -> (扩展名, Pillow 保存参数)
+VARIANT_FORMATS = {
+    'webp': ('.webp', {'format': 'WEBP', 'quality': 80, 'method': 4}),
+    'jpeg': ('.jpg', {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def variant_path(source_path, size, fmt):
+    """原图 images/2026/10/<uuid>.png 的 480px WebP 版本为 images/2026/10/<uuid>_480.webp"""
+    stem = os.path.splitext(source_path)[0]
+    return f'{stem}_{size}{VARIANT_FORMATS[fmt][0]}'
+
+
+def render_variants(source_path, sizes):
+    """
+    按最长边生成各尺寸的 WebP/JPEG 版本，返回生成的文件路径列表
+    - 按 EXIF 方向旋转后丢弃 EXIF（保留 ICC 色彩配置）
+    - 不放大：原图小于目标尺寸时按原尺寸输出
+    - 动图只取第一帧
+    - 从大到小逐级缩小，每张图只解码一次
+    """
+    written = []
+    with Image.open(source_path) as image:
+        # JPEG 可在解码时直接按 1/2、1/4、1/8 缩小，大图省去大部分解码开销
+        largest = max(sizes)
+        image.draft('RGB', (largest, largest))
+        icc_profile = image.info.get('icc_profile')
+        current = ImageOps.exif_transpose(image)
+        current.load()
+
+        if current.mode not in ('RGB', 'RGBA'):
+            has_alpha = current.mode in ('LA', 'PA') or 'transparency' in current.info
+            current = current.convert('RGBA' if has_alpha else 'RGB')
+
+        for size in sorted(sizes, reverse=True):
+            if max(current.size) > size:
+                current = current.copy()
+                current.thumbnail((size, size), Image.LANCZOS, reducing_gap=3.0)
+            for fmt, (_, options) in VARIANT_FORMATS.items():
+                output = current
+                if fmt == 'jpeg' and current.mode == 'RGBA':
+                    # JPEG 不支持透明，铺白底
+                    output = Image.new('RGB', current.size, (255, 255, 255))
+                    output.paste(current, mask=current.getchannel('A'))
+                path = variant_path(source_path, size, fmt)
+                temp_path = f'{path}.tmp'
+                output.save(temp_path, icc_profile=icc_profile, **options)
+                os.replace(temp_path, path)
+                written.append(path)
+    return written
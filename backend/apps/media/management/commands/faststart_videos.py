@@ -0,0 +1,42 @@
+"""把已上传的 MP4/QuickTime 视频改写为 faststart 布局"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.media.mp4 import needs_faststart
+from apps.media.videos import run_faststart
+
+
+class Command(BaseCommand):
+    help = '扫描 media/videos，把 moov 在 mdat 之后的视频改写为 faststart（moov 在前）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='仅列出需要改写的视频',
+        )
+
+    def handle(self, *args, **options):
+        videos_root = os.path.join(settings.MEDIA_ROOT, 'videos')
+        pending = []
+        for root, dirs, files in os.walk(videos_root):
+            for filename in files:
+                full_path = os.path.join(root, filename)
+                if not filename.endswith(('.part', '.tmp')) and needs_faststart(full_path):
+                    pending.append(os.path.relpath(full_path, settings.MEDIA_ROOT).replace('\\', '/'))
+
+        if not pending:
+            self.stdout.write(self.style.SUCCESS('所有视频均已是 faststart 布局'))
+            return
+
+        self.stdout.write(f'共 {len(pending)} 个视频需要改写:')
+        for relative_path in pending:
+            self.stdout.write(f'  - {relative_path}')
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('(--dry-run 模式，未实际改写)'))
+            return
+
+        changed = sum(1 for relative_path in pending if run_faststart(relative_path))
+        self.stdout.write(self.style.SUCCESS(f'已改写 {changed} 个视频，跳过 {len(pending) - changed} 个'))
@@ -0,0 +1,53 @@
+"""为已上传的图片补齐缩略图"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.media.imaging import variant_path
+from apps.media.variants import is_variant_source, submit_variants, variant_sizes
+
+
+class Command(BaseCommand):
+    help = '扫描 media/images，为缺少缩略图的图片生成 WebP/JPEG 缩略图'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='重新生成全部缩略图（修改 IMAGE_VARIANT_SIZES 后使用）',
+        )
+
+    def handle(self, *args, **options):
+        images_root = os.path.join(settings.MEDIA_ROOT, 'images')
+        sizes = variant_sizes()
+        pending = []
+        for root, dirs, files in os.walk(images_root):
+            for filename in files:
+                full_path = os.path.join(root, filename)
+                relative_path = os.path.relpath(full_path, settings.MEDIA_ROOT).replace('\\', '/')
+                if not is_variant_source(relative_path):
+                    continue
+                missing = any(
+                    not os.path.exists(variant_path(full_path, size, fmt))
+                    for size in sizes for fmt in ('webp', 'jpeg')
+                )
+                if missing or options['force']:
+                    pending.append(relative_path)
+
+        if not pending:
+            self.stdout.write(self.style.SUCCESS('所有图片的缩略图均已生成'))
+            return
+
+        self.stdout.write(f'共 {len(pending)} 张图片需要生成缩略图')
+        # 提交时受进程池队列长度限制（队列满时等待），各任务并行执行
+        futures = [(relative_path, submit_variants(relative_path)) for relative_path in pending]
+        generated = failed = 0
+        for relative_path, future in futures:
+            try:
+                future.result()
+                generated += 1
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'  生成失败: {relative_path} - {e}'))
+        self.stdout.write(self.style.SUCCESS(f'已生成 {generated} 张图片的缩略图，失败 {failed} 张'))
@@ -0,0 +1,68 @@
+"""把已上传的文件登记到内容寻址索引，并重建引用索引"""
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError
+
+from apps.media.references import rebuild_references, referenced_paths
+from apps.media.models import MediaBlob
+from apps.media.variants import VARIANT_NAME_RE
+
+
+class Command(BaseCommand):
+    help = '扫描 media/images、media/videos，为未登记的文件建立 SHA-256 索引，并按需求/响应重建引用索引（MediaReference）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--references-only',
+            action='store_true',
+            help='只重建引用索引，不扫描文件',
+        )
+
+    def handle(self, *args, **options):
+        created = rebuild_references()
+        self.stdout.write(self.style.SUCCESS(f'已重建引用索引，共 {created} 条引用'))
+        if not options['references_only']:
+            self.index_files(referenced_paths())
+
+    def index_files(self, referenced):
+        indexed = set(MediaBlob.objects.values_list('relative_path', flat=True))
+        pending = []
+        for directory in ('images', 'videos'):
+            for root, dirs, files in os.walk(os.path.join(settings.MEDIA_ROOT, directory)):
+                for filename in files:
+                    if VARIANT_NAME_RE.match(filename) or filename.endswith(('.part', '.tmp')):
+                        continue
+                    full_path = os.path.join(root, filename)
+                    relative_path = os.path.relpath(full_path, settings.MEDIA_ROOT).replace('\\', '/')
+                    if relative_path not in indexed:
+                        pending.append(relative_path)
+
+        # 内容相同的多个文件中优先登记被引用的那个
+        pending.sort(key=lambda path: (path not in referenced, path))
+        created = duplicates = duplicate_bytes = 0
+        for relative_path in pending:
+            digest, size = self.sha256_of(os.path.join(settings.MEDIA_ROOT, relative_path))
+            try:
+                MediaBlob.objects.create(sha256=digest, relative_path=relative_path, size=size)
+                created += 1
+            except IntegrityError:
+                # 内容与已登记文件相同：保留原文件（已有 URL 不变），之后的重复上传指向已登记的文件
+                duplicates += 1
+                duplicate_bytes += size
+        self.stdout.write(f'新登记 {created} 个文件')
+        if duplicates:
+            self.stdout.write(self.style.WARNING(
+                f'{duplicates} 个文件与已登记文件内容重复，共 {duplicate_bytes / 1024 / 1024:.2f} MB'
+            ))
+
+    def sha256_of(self, path):
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as f:
+            while data := f.read(1024 * 1024):
+                digest.update(data)
+                size += len(data)
+        return digest.hexdigest(), size
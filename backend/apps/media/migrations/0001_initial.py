@@ -0,0 +1,63 @@
+# Generated by Django 5.0 on 2026-10-17 10:25
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='上传ID')),
+                ('file_type', models.CharField(max_length=10, verbose_name='文件类型')),
+                ('filename', models.CharField(max_length=255, verbose_name='原文件名')),
+                ('content_type', models.CharField(max_length=100, verbose_name='MIME类型')),
+                ('size', models.BigIntegerField(verbose_name='文件大小')),
+                ('chunk_size', models.IntegerField(verbose_name='分块大小')),
+                ('sha256', models.CharField(blank=True, default='', max_length=64, verbose_name='SHA-256')),
+                ('relative_path', models.CharField(max_length=255, verbose_name='存储路径')),
+                ('status', models.IntegerField(choices=[(0, '上传中'), (1, '已完成')], default=0, verbose_name='状态')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('expires_at', models.DateTimeField(verbose_name='过期时间')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='上传用户')),
+            ],
+            options={
+                'verbose_name': '分块上传',
+                'verbose_name_plural': '分块上传',
+                'db_table': 'upload_sessions',
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.IntegerField(verbose_name='块序号')),
+                ('size', models.IntegerField(verbose_name='块大小')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='接收时间')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='media.uploadsession', verbose_name='上传会话')),
+            ],
+            options={
+                'verbose_name': '上传分块',
+                'verbose_name_plural': '上传分块',
+                'db_table': 'upload_chunks',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='uploadsession',
+            index=models.Index(fields=['expires_at'], name='upload_sessions_expires_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='uploadchunk',
+            constraint=models.UniqueConstraint(fields=('session', 'index'), name='upload_chunks_session_index_uniq'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0 on 2026-10-17 10:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.media.references import rebuild_references
+
+
+def backfill(apps, schema_editor):
+    rebuild_references(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0002_media_blobs'),
+        ('needs', '0003_hot_query_indexes'),
+        ('responses', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='mediablob',
+            name='ref_count',
+        ),
+        migrations.CreateModel(
+            name='MediaReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('relative_path', models.CharField(max_length=255, verbose_name='存储路径')),
+                ('field', models.CharField(choices=[('images', '图片'), ('videos', '视频')], max_length=10, verbose_name='引用字段')),
+                ('need', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='media_references', to='needs.need', verbose_name='需求')),
+                ('response', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='media_references', to='responses.response', verbose_name='响应')),
+            ],
+            options={
+                'verbose_name': '文件引用',
+                'verbose_name_plural': '文件引用',
+                'db_table': 'media_references',
+                'indexes': [models.Index(fields=['relative_path'], name='media_refs_path_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='mediareference',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('need__isnull', False), ('response__isnull', True)), models.Q(('need__isnull', True), ('response__isnull', False)), _connector='OR'), name='media_refs_single_owner'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-17 11:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0003_media_references'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='last_uploaded_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='最近上传时间'),
+        ),
+    ]
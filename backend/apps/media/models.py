@@ -0,0 +1,238 @@
+import os
+import uuid
+
+from django.db import models
+from django.conf import settings
+from django.utils import timezone
+
+
+class MediaBlob(models.Model):
+    """
+    按内容寻址的上传文件 - 以 SHA-256 去重，相同内容只存储一份
+    引用关系见 MediaReference（按 relative_path 关联）
+    """
+
+    sha256 = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name='SHA-256'
+    )
+    relative_path = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='存储路径'
+    )
+    size = models.BigIntegerField(
+        verbose_name='文件大小'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='创建时间'
+    )
+    last_uploaded_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='最近上传时间'
+    )
+
+    class Meta:
+        db_table = 'media_blobs'
+        verbose_name = '媒体文件'
+        verbose_name_plural = '媒体文件'
+
+    def __str__(self):
+        return self.relative_path
+
+    @property
+    def full_path(self):
+        return os.path.join(settings.MEDIA_ROOT, self.relative_path)
+
+    @property
+    def url(self):
+        return f'{settings.MEDIA_URL}{self.relative_path}'
+
+
+class MediaReference(models.Model):
+    """
+    需求/响应对上传文件的引用 - images、videos（URL 的 JSON 数组）的索引，由信号随保存同步
+    每个 URL 一行（同一列表中重复出现的 URL 有多行），need 和 response 有且只有一个
+    按 relative_path 关联（未登记到 MediaBlob 的旧文件同样有引用记录）
+    """
+
+    FIELD_CHOICES = [
+        ('images', '图片'),
+        ('videos', '视频'),
+    ]
+
+    relative_path = models.CharField(
+        max_length=255,
+        verbose_name='存储路径'
+    )
+    field = models.CharField(
+        max_length=10,
+        choices=FIELD_CHOICES,
+        verbose_name='引用字段'
+    )
+    need = models.ForeignKey(
+        'needs.Need',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='media_references',
+        verbose_name='需求'
+    )
+    response = models.ForeignKey(
+        'responses.Response',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='media_references',
+        verbose_name='响应'
+    )
+
+    class Meta:
+        db_table = 'media_references'
+        verbose_name = '文件引用'
+        verbose_name_plural = '文件引用'
+        indexes = [
+            # 孤立文件反连接、"哪些需求/响应使用了该文件"
+            models.Index(fields=['relative_path'], name='media_refs_path_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(need__isnull=False, response__isnull=True)
+                | models.Q(need__isnull=True, response__isnull=False),
+                name='media_refs_single_owner',
+            ),
+        ]
+
+    def __str__(self):
+        owner = f'需求#{self.need_id}' if self.need_id else f'响应#{self.response_id}'
+        return f'{self.relative_path} -> {owner}'
+
+
+class UploadSession(models.Model):
+    """分块上传会话 - 大文件分块上传，断线后只需补传缺失的块"""
+
+    STATUS_CHOICES = [
+        (0, '上传中'),
+        (1, '已完成'),
+    ]
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        verbose_name='上传ID'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        verbose_name='上传用户'
+    )
+    file_type = models.CharField(
+        max_length=10,
+        verbose_name='文件类型'
+    )
+    filename = models.CharField(
+        max_length=255,
+        verbose_name='原文件名'
+    )
+    content_type = models.CharField(
+        max_length=100,
+        verbose_name='MIME类型'
+    )
+    size = models.BigIntegerField(
+        verbose_name='文件大小'
+    )
+    chunk_size = models.IntegerField(
+        verbose_name='分块大小'
+    )
+    sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        verbose_name='SHA-256'
+    )
+    relative_path = models.CharField(
+        max_length=255,
+        verbose_name='存储路径'
+    )
+    status = models.IntegerField(
+        choices=STATUS_CHOICES,
+        default=0,
+        verbose_name='状态'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='创建时间'
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='过期时间'
+    )
+
+    class Meta:
+        db_table = 'upload_sessions'
+        verbose_name = '分块上传'
+        verbose_name_plural = '分块上传'
+        indexes = [
+            # 清理过期会话
+            models.Index(fields=['expires_at'], name='upload_sessions_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.filename} ({self.get_status_display()})'
+
+    @property
+    def total_chunks(self):
+        return (self.size + self.chunk_size - 1) // self.chunk_size
+
+    def chunk_range(self, index):
+        """第 index 块的 (起始偏移, 长度)，最后一块可能不足 chunk_size"""
+        offset = index * self.chunk_size
+        return offset, min(self.chunk_size, self.size - offset)
+
+    @property
+    def part_path(self):
+        """上传中的数据直接写入最终目录下的 .part 文件，完成后原地改名"""
+        return os.path.join(settings.MEDIA_ROOT, f'{self.relative_path}.part')
+
+    @property
+    def full_path(self):
+        return os.path.join(settings.MEDIA_ROOT, self.relative_path)
+
+    @property
+    def url(self):
+        return f'{settings.MEDIA_URL}{self.relative_path}'
+
+
+class UploadChunk(models.Model):
+    """已接收的分块（唯一约束保证并发上传同一块时只记录一次）"""
+
+    session = models.ForeignKey(
+        UploadSession,
+        on_delete=models.CASCADE,
+        related_name='chunks',
+        verbose_name='上传会话'
+    )
+    index = models.IntegerField(
+        verbose_name='块序号'
+    )
+    size = models.IntegerField(
+        verbose_name='块大小'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='接收时间'
+    )
+
+    class Meta:
+        db_table = 'upload_chunks'
+        verbose_name = '上传分块'
+        verbose_name_plural = '上传分块'
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'index'], name='upload_chunks_session_index_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.session_id} #{self.index}'
@@ -0,0 +1,168 @@
+"""MP4/QuickTime faststart（纯 Python，不导入 Django）
+
+手机录制的视频常把 moov（索引）放在文件末尾，浏览器要先 Range 请求文件尾部取得 moov 才能开始播放。
+faststart() 把 moov 移到第一个 mdat 之前，并把 stco/co64 中的块偏移加上 moov 的长度，
+播放只需从文件头顺序读取。结构不符合预期的文件（分片 MP4、压缩 moov、多个 moov、
+atom 长度不一致、偏移超出 32 位等）保持原样。
+"""
+import os
+import shutil
+import struct
+
+# 需要向下查找 stco/co64 的容器 atom
+CONTAINER_ATOMS = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+
+COPY_SIZE = 1024 * 1024
+
+
+class UnsupportedFile(Exception):
+    """文件结构不支持 faststart 改写"""
+
+
+def parse_atom_header(data, pos, available):
+    """
+    解析 data[pos:] 处的 atom 头，available 为该 atom 所在范围内剩余的字节数
+    返回 (类型, 头长度, atom 总长度)
+    """
+    if available < 8 or len(data) - pos < 8:
+        raise UnsupportedFile('atom 头不完整')
+    size, kind = struct.unpack_from('>I4s', data, pos)
+    header_size = 8
+    if size == 1:
+        if available < 16 or len(data) - pos < 16:
+            raise UnsupportedFile('atom 头不完整')
+        size = struct.unpack_from('>Q', data, pos + 8)[0]
+        header_size = 16
+    elif size == 0:
+        size = available  # 延伸到所在范围末尾
+    if size < header_size or size > available:
+        raise UnsupportedFile(f'{kind!r} 长度无效')
+    return kind, header_size, size
+
+
+def read_top_level_atoms(f, file_size):
+    """读取顶层 atom 列表 [(类型, 偏移, 长度)]，各 atom 必须正好铺满整个文件"""
+    atoms = []
+    pos = 0
+    while pos < file_size:
+        f.seek(pos)
+        kind, _, size = parse_atom_header(f.read(16), 0, file_size - pos)
+        atoms.append((kind, pos, size))
+        pos += size
+    return atoms
+
+
+def patch_chunk_offsets(moov, shift):
+    """把 moov（bytearray）中所有 stco/co64 的块偏移替换为 shift(偏移)"""
+
+    def walk(start, end):
+        pos = start
+        while pos < end:
+            kind, header_size, size = parse_atom_header(moov, pos, end - pos)
+            body = pos + header_size
+            if kind in CONTAINER_ATOMS:
+                walk(body, pos + size)
+            elif kind == b'cmov':
+                raise UnsupportedFile('不支持压缩的 moov')
+            elif kind in (b'stco', b'co64'):
+                item = 'I' if kind == b'stco' else 'Q'
+                width = struct.calcsize(f'>{item}')
+                if size - header_size < 8:
+                    raise UnsupportedFile(f'{kind!r} 长度无效')
+                count = struct.unpack_from('>I', moov, body + 4)[0]
+                if 8 + count * width > size - header_size:
+                    raise UnsupportedFile(f'{kind!r} 条目数无效')
+                fmt = f'>{count}{item}'
+                offsets = [shift(offset) for offset in struct.unpack_from(fmt, moov, body + 8)]
+                if kind == b'stco' and offsets and max(offsets) > 0xFFFFFFFF:
+                    raise UnsupportedFile('偏移超出 stco 范围')
+                struct.pack_into(fmt, moov, body + 8, *offsets)
+            pos += size
+
+    kind, header_size, size = parse_atom_header(moov, 0, len(moov))
+    walk(header_size, size)
+
+
+def needs_faststart(path):
+    """moov 是否在第一个 mdat 之后（结构不支持时返回 False）"""
+    try:
+        with open(path, 'rb') as f:
+            atoms = read_top_level_atoms(f, os.fstat(f.fileno()).st_size)
+        return _layout(atoms) is not None
+    except (OSError, UnsupportedFile):
+        return False
+
+
+def _layout(atoms):
+    """需要改写时返回 (moov, 第一个 mdat)，已是 faststart 时返回 None，不支持时抛出 UnsupportedFile"""
+    kinds = [kind for kind, _, _ in atoms]
+    if kinds.count(b'moov') != 1 or b'mdat' not in kinds:
+        raise UnsupportedFile('缺少 moov 或 mdat')
+    if b'moof' in kinds:
+        raise UnsupportedFile('不支持分片 MP4')
+    moov = atoms[kinds.index(b'moov')]
+    first_mdat = atoms[kinds.index(b'mdat')]
+    if moov[1] < first_mdat[1]:
+        return None
+    return moov, first_mdat
+
+
+def faststart(path):
+    """
+    把 path 改写为 faststart 布局（先写临时文件再原子替换），返回是否改写
+    文件已是 faststart 布局或结构不支持时不做任何修改
+    """
+    with open(path, 'rb') as src:
+        before = os.fstat(src.fileno())
+        try:
+            atoms = read_top_level_atoms(src, before.st_size)
+            layout = _layout(atoms)
+        except UnsupportedFile:
+            return False
+        if layout is None:
+            return False
+        (_, moov_start, moov_size), (_, insert_at, _) = layout
+
+        src.seek(moov_start)
+        moov = bytearray(src.read(moov_size))
+
+        # moov 插入到第一个 mdat 前：原位于 [insert_at, moov_start) 的数据后移 moov_size
+        def shift(offset):
+            if offset < insert_at or offset >= moov_start + moov_size:
+                return offset
+            if offset < moov_start:
+                return offset + moov_size
+            raise UnsupportedFile('块偏移指向 moov 内部')
+
+        try:
+            patch_chunk_offsets(moov, shift)
+        except UnsupportedFile:
+            return False
+
+        temp_path = f'{path}.faststart.tmp'
+        try:
+            with open(temp_path, 'wb') as dst:
+                for kind, offset, size in atoms:
+                    if offset == insert_at:
+                        dst.write(moov)
+                    if kind == b'moov':
+                        continue
+                    src.seek(offset)
+                    remaining = size
+                    while remaining > 0:
+                        data = src.read(min(COPY_SIZE, remaining))
+                        if not data:
+                            raise UnsupportedFile('文件被截断')
+                        dst.write(data)
+                        remaining -= len(data)
+            shutil.copymode(path, temp_path)
+            # 改写期间原文件被替换或修改时放弃
+            after = os.stat(path)
+            if (after.st_ino, after.st_size, after.st_mtime_ns) != (before.st_ino, before.st_size, before.st_mtime_ns):
+                raise UnsupportedFile('文件在改写期间发生变化')
+            os.replace(temp_path, path)
+        except (OSError, UnsupportedFile):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+    return True
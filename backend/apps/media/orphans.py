@@ -0,0 +1,223 @@
+"""孤立上传文件的扫描与清理（cleanup_orphan_files 的实现）
+
+media 目录可能有数百万个文件，内存占用只与单个目录的文件数有关，与整棵目录树无关：
+- 线程池并行 os.scandir 各目录（年月目录 images/2026/10、内容寻址目录 images/ab/cd），
+  DirEntry 自带文件类型，每个文件只 stat 一次
+- 每个目录的文件按批（BATCH_SIZE）以 relative_path IN (...) 查询 MediaReference、MediaBlob（走索引），
+  只读取路径列，不加载需求/响应
+- 孤立文件逐批删除：先按反连接删除仍无引用的 MediaBlob，再删除文件；目录删空后随即删除，不再二次遍历
+- 修改时间或 MediaBlob.last_uploaded_at（重复上传已有内容时更新）在宽限期（older_than 秒）内的文件跳过，
+  不会删除刚上传、尚未被需求/响应引用的文件
+"""
+import os
+import time
+from datetime import datetime, timezone as dt_timezone
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import MediaBlob, MediaReference, UploadSession
+from .references import unreferenced_blobs
+from .variants import VARIANT_NAME_RE
+
+MEDIA_DIRECTORIES = ('images', 'videos')
+
+BATCH_SIZE = 500
+
+
+def scan_directory(path):
+    """列出目录（不递归），返回 ([(文件名, 大小, 修改时间)], [子目录路径])"""
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        files.append((entry.name, stat.st_size, stat.st_mtime))
+                except OSError:
+                    continue  # 扫描期间被删除
+    except FileNotFoundError:
+        pass
+    return files, subdirs
+
+
+def walk_parallel(roots, workers):
+    """
+    并行扫描 roots 下的所有目录，按完成顺序逐个产出 (目录, 文件, 子目录)
+    同时扫描的目录不超过 workers * 2 个，已扫描目录的结果交给调用方后即释放
+    """
+    pending = deque(roots)
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='orphan-scan') as executor:
+        while pending or running:
+            while pending and len(running) < workers * 2:
+                path = pending.popleft()
+                running[executor.submit(scan_directory, path)] = path
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = running.pop(future)
+                files, subdirs = future.result()
+                pending.extend(subdirs)
+                yield path, files, subdirs
+
+
+class OrphanCleaner:
+    """
+    扫描并（dry_run=False 时）删除孤立文件
+    on_orphan(绝对路径, 大小) 在发现每个孤立文件时调用；on_error(绝对路径, 异常) 在删除失败时调用
+    """
+
+    def __init__(self, older_than=0, workers=4, dry_run=False, on_orphan=None, on_error=None):
+        self.media_root = settings.MEDIA_ROOT
+        self.cutoff = time.time() - older_than
+        self.cutoff_datetime = datetime.fromtimestamp(self.cutoff, tz=dt_timezone.utc)
+        self.workers = workers
+        self.dry_run = dry_run
+        self.on_orphan = on_orphan
+        self.on_error = on_error
+        self.root_dirs = [
+            os.path.join(self.media_root, directory) for directory in MEDIA_DIRECTORIES
+            if os.path.isdir(os.path.join(self.media_root, directory))
+        ]
+        # 未过期的分块上传会话：保留上传中的 .part 文件；过期会话的 .part 文件按孤立文件删除
+        self.live_parts = {
+            f'{relative_path}.part'
+            for relative_path in UploadSession.objects.filter(
+                status=0, expires_at__gt=timezone.now()
+            ).values_list('relative_path', flat=True).iterator(chunk_size=BATCH_SIZE)
+        }
+        self.files = 0
+        self.recent = 0
+        self.orphans = 0
+        self.orphan_bytes = 0
+        self.deleted = 0
+
+    def batches(self):
+        """
+        逐批产出 (批次, 已扫描完的目录)，一批可包含多个目录的文件，按批查询以减少查询次数
+        批次为 [(目录, 文件名, 相对路径, 归属路径, 大小, 修改时间)]，缩略图的归属路径为对应的原图
+        已扫描完的目录为 [(目录, 是否有子目录)]，其文件都在本批或之前的批次中
+        """
+        batch = []
+        completed = []
+        for directory, files, subdirs in walk_parallel(self.root_dirs, self.workers):
+            relative_dir = os.path.relpath(directory, self.media_root).replace('\\', '/')
+            entries = [(name, size, mtime, VARIANT_NAME_RE.match(name)) for name, size, mtime in files]
+            # 缩略图（<原图主名>_<尺寸>.webp/jpg）与原图在同一目录
+            originals = {os.path.splitext(name)[0]: name for name, _, _, variant in entries if not variant}
+            for name, size, mtime, variant in entries:
+                relative_path = f'{relative_dir}/{name}'
+                owner = relative_path
+                if variant:
+                    stem = variant.group('stem')
+                    if stem in originals:
+                        owner = f'{relative_dir}/{originals[stem]}'
+                    else:
+                        owner = self.referenced_original(f'{relative_dir}/{stem}') or relative_path
+                batch.append((directory, name, relative_path, owner, size, mtime))
+                if len(batch) >= BATCH_SIZE:
+                    yield batch, completed
+                    batch, completed = [], []
+            completed.append((directory, bool(subdirs)))
+        if batch or completed:
+            yield batch, completed
+
+    def referenced_original(self, stem_path):
+        """原图文件已不存在时按主名查找仍被引用的原图路径（stem. 开头，走 relative_path 索引）"""
+        return MediaReference.objects.filter(
+            relative_path__gt=f'{stem_path}.', relative_path__lt=f'{stem_path}/'
+        ).values_list('relative_path', flat=True).first()
+
+    def referenced(self, owners):
+        """owners 中被引用（或属于上传中会话）的路径"""
+        referenced = set(
+            MediaReference.objects.filter(relative_path__in=owners)
+            .values_list('relative_path', flat=True).distinct().iterator(chunk_size=BATCH_SIZE)
+        )
+        return referenced | (owners & self.live_parts)
+
+    def recently_uploaded(self, owners):
+        """owners 中宽限期内被重复上传过的路径（文件修改时间可能早于 last_uploaded_at）"""
+        return set(
+            MediaBlob.objects.filter(relative_path__in=owners, last_uploaded_at__gt=self.cutoff_datetime)
+            .values_list('relative_path', flat=True).iterator(chunk_size=BATCH_SIZE)
+        )
+
+    def run(self):
+        """扫描全部目录，返回 self（统计见各计数属性）"""
+        kept = Counter()  # 目录 -> 保留的文件数（为 0 且没有子目录时删除该目录）
+        for batch, completed in self.batches():
+            self.files += len(batch)
+            owners = {owner for _, _, _, owner, _, _ in batch}
+            referenced = self.referenced(owners) if owners else set()
+            unreferenced = owners - referenced
+            recent = self.recently_uploaded(unreferenced) if unreferenced else set()
+            orphans = []
+            for directory, name, relative_path, owner, size, mtime in batch:
+                if owner in referenced:
+                    continue
+                if mtime > self.cutoff or owner in recent:
+                    self.recent += 1
+                    continue
+                orphans.append((os.path.join(directory, name), relative_path, owner, size))
+
+            deleted = self.delete(orphans)
+            for directory, name, _, _, _, _ in batch:
+                if os.path.join(directory, name) not in deleted:
+                    kept[directory] += 1
+            for directory, has_subdirs in completed:
+                if not kept.pop(directory, 0) and not has_subdirs and not self.dry_run:
+                    self.remove_empty_dirs(directory)
+        return self
+
+    def delete(self, orphans):
+        """统计并删除一批孤立文件，返回已删除文件的绝对路径集合"""
+        for full_path, _, _, size in orphans:
+            self.orphans += 1
+            self.orphan_bytes += size
+            if self.on_orphan:
+                self.on_orphan(full_path, size)
+        if self.dry_run or not orphans:
+            return set()
+
+        # 先删除原图的索引（反连接条件保证只删仍无引用、宽限期内没有被重复上传的）；
+        # 扫描后又被引用或重复上传的文件及其缩略图保留
+        originals = {relative_path for _, relative_path, owner, _ in orphans if relative_path == owner}
+        unreferenced_blobs().filter(
+            relative_path__in=originals, last_uploaded_at__lte=self.cutoff_datetime
+        ).delete()
+        owners = {owner for _, _, owner, _ in orphans}
+        kept = set(MediaBlob.objects.filter(relative_path__in=owners).values_list('relative_path', flat=True))
+
+        deleted = set()
+        for full_path, _, owner, _ in orphans:
+            if owner in kept:
+                continue
+            try:
+                os.remove(full_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                if self.on_error:
+                    self.on_error(full_path, e)
+                continue
+            deleted.add(full_path)
+        self.deleted += len(deleted)
+        return deleted
+
+    def remove_empty_dirs(self, directory):
+        """删除空目录并向上删除随之变空的父目录（images、videos 本身保留）"""
+        roots = {os.path.normpath(root) for root in self.root_dirs}
+        directory = os.path.normpath(directory)
+        while directory not in roots and directory.startswith(os.path.normpath(self.media_root) + os.sep):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return  # 非空（其他文件或尚未扫描完的子目录）
+            directory = os.path.dirname(directory)
@@ -0,0 +1,92 @@
+"""HTTP Range 请求解析（RFC 9110 14.1 / 13.1.5）"""
+import re
+
+from django.utils.http import parse_http_date_safe
+
+RANGE_SPEC_RE = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+
+# 合并后的区间数超过该值时忽略 Range 头，返回完整文件（防止大量小区间放大请求）
+MAX_RANGES = 16
+
+
+def parse_range_header(header, size):
+    """
+    解析 Range 请求头，返回按起点排序并合并重叠/相邻区间后的 [(start, end), ...]（闭区间）
+    - 返回 None：没有 Range 头、单位不是 bytes、语法无效或区间过多，按完整请求处理
+    - 返回 []：语法有效但没有可满足的区间，应返回 416
+    支持 bytes=a-b、bytes=a-、bytes=-n（最后 n 字节）及逗号分隔的多个区间
+    """
+    if not header:
+        return None
+    unit, _, specs = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not specs.strip():
+        return None
+
+    ranges = []
+    for spec in specs.split(','):
+        if not spec.strip():
+            continue
+        match = RANGE_SPEC_RE.match(spec)
+        if not match or not any(match.groups()):
+            return None
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if last and end < start:
+                return None
+            if start >= size:
+                continue
+            end = min(end, size - 1)
+        else:
+            # 后缀区间：最后 n 字节
+            suffix = int(last)
+            if suffix == 0 or size == 0:
+                continue
+            start, end = max(size - suffix, 0), size - 1
+        ranges.append((start, end))
+
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    if len(merged) > MAX_RANGES:
+        return None
+    return merged
+
+
+def if_range_matches(header, etag, last_modified):
+    """
+    If-Range 校验：值为强 ETag 时必须完全相同，为日期时必须与 Last-Modified 完全相等
+    不匹配时应忽略 Range 返回完整文件；没有 If-Range 头时视为匹配
+    """
+    if header is None:
+        return True
+    header = header.strip()
+    if header.startswith('W/'):
+        return False
+    if header.startswith('"'):
+        return header == etag
+    return parse_http_date_safe(header) == last_modified
+
+
+def multipart_layout(ranges, size, content_type, boundary):
+    """
+    multipart/byteranges 响应体的结构
+    返回 (parts, tail, content_length)，parts 为 [(分段头 bytes, start, end), ...]
+    """
+    parts = []
+    length = 0
+    for start, end in ranges:
+        head = (
+            f'\r\n--{boundary}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+        ).encode('latin-1')
+        parts.append((head, start, end))
+        length += len(head) + end - start + 1
+    tail = f'\r\n--{boundary}--\r\n'.encode('latin-1')
+    return parts, tail, length + len(tail)
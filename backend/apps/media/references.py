@@ -0,0 +1,113 @@
+"""需求/响应对上传文件的引用索引（MediaReference）
+
+Need/Response 的 images、videos 是 URL 的 JSON 数组，无法按文件查询。MediaReference 为每个 URL
+记录一行，由 signals.py 随保存同步，需求/响应删除时级联删除：
+- 孤立文件：unreferenced_blobs() 一次反连接查询，不再加载所有需求/响应
+- 某个文件被哪些需求使用：Need.objects.filter(media_references__relative_path=路径)，走 relative_path 索引
+"""
+from collections import Counter, defaultdict
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import MediaBlob, MediaReference
+
+MEDIA_FIELDS = ('images', 'videos')
+
+BATCH_SIZE = 1000
+
+
+def media_paths(urls):
+    """URL 列表中本站上传文件的相对路径计数"""
+    prefix = settings.MEDIA_URL
+    return Counter(
+        url[len(prefix):] for url in urls or []
+        if isinstance(url, str) and url.startswith(prefix)
+    )
+
+
+def reference_keys(images, videos):
+    """images、videos 中的引用 {(字段, 相对路径): 次数}"""
+    keys = Counter()
+    for field, urls in zip(MEDIA_FIELDS, (images, videos)):
+        for path, count in media_paths(urls).items():
+            keys[(field, path)] = count
+    return keys
+
+
+def _owner(model):
+    """MediaReference 上指向该模型的外键名"""
+    return 'need' if model._meta.model_name == 'need' else 'response'
+
+
+def _rows(reference_model, owner, pk, keys):
+    return [
+        reference_model(relative_path=path, field=field, **{f'{owner}_id': pk})
+        for (field, path), count in keys.items()
+        for _ in range(count)
+    ]
+
+
+def set_references(instance, keys):
+    """把需求/响应的引用替换为 keys"""
+    owner = _owner(type(instance))
+    with transaction.atomic():
+        MediaReference.objects.filter(**{f'{owner}_id': instance.pk}).delete()
+        MediaReference.objects.bulk_create(_rows(MediaReference, owner, instance.pk, keys))
+
+
+def rebuild_references(apps=global_apps):
+    """
+    按需求和响应的 images、videos 全量重建引用索引，返回引用记录数
+    apps 为模型注册表（数据迁移中传入历史模型）
+    """
+    Need = apps.get_model('needs', 'Need')
+    Response = apps.get_model('responses', 'Response')
+    MediaReference = apps.get_model('media', 'MediaReference')
+
+    created = 0
+    with transaction.atomic():
+        MediaReference.objects.all().delete()
+        for model in (Need, Response):
+            owner = _owner(model)
+            rows = []
+            for pk, images, videos in model.objects.values_list('pk', 'images', 'videos').iterator(chunk_size=BATCH_SIZE):
+                rows.extend(_rows(MediaReference, owner, pk, reference_keys(images, videos)))
+                if len(rows) >= BATCH_SIZE:
+                    MediaReference.objects.bulk_create(rows)
+                    created += len(rows)
+                    rows = []
+            MediaReference.objects.bulk_create(rows)
+            created += len(rows)
+    return created
+
+
+def referenced_paths():
+    """被需求或响应引用的所有相对路径"""
+    return set(MediaReference.objects.values_list('relative_path', flat=True).distinct())
+
+
+def unreferenced_blobs():
+    """没有任何引用的 MediaBlob（NOT EXISTS 反连接）"""
+    return MediaBlob.objects.filter(
+        ~Exists(MediaReference.objects.filter(relative_path=OuterRef('relative_path')))
+    )
+
+
+def describe_references(paths=None):
+    """{相对路径: [引用说明]}，paths 为 None 时返回全部引用"""
+    references = MediaReference.objects.order_by('relative_path', 'need_id', 'response_id')
+    if paths is not None:
+        references = references.filter(relative_path__in=list(paths))
+    result = defaultdict(list)
+    for path, need_id, title, response_id, response_need_id in references.values_list(
+        'relative_path', 'need_id', 'need__title', 'response_id', 'response__need_id'
+    ).iterator():
+        if need_id:
+            title = f'{title[:20]}...' if len(title) > 20 else title
+            result[path].append(f'需求#{need_id}: {title}')
+        else:
+            result[path].append(f'响应#{response_id} (需求#{response_need_id})')
+    return result
@@ -0,0 +1,46 @@
+"""需求/响应的 images、videos 变化时同步 MediaReference（删除时由外键级联删除）"""
+from collections import Counter
+
+from django.db.models.signals import post_init, pre_save, post_save
+from django.dispatch import receiver
+
+from apps.needs.models import Need
+from apps.responses.models import Response
+from .references import MEDIA_FIELDS, reference_keys, set_references
+
+
+def _load_keys(sender, instance):
+    """实例以 only()/defer() 加载时从数据库读取原引用"""
+    if instance._media_keys is False:
+        old = sender.objects.filter(pk=instance.pk).values(*MEDIA_FIELDS).first()
+        instance._media_keys = reference_keys(old['images'], old['videos']) if old else Counter()
+
+
+@receiver(post_init, sender=Need, dispatch_uid='media_snapshot_refs')
+@receiver(post_init, sender=Response, dispatch_uid='media_snapshot_refs')
+def snapshot_refs(sender, instance, **kwargs):
+    if not instance.pk:
+        instance._media_keys = Counter()
+    elif any(field not in instance.__dict__ for field in MEDIA_FIELDS):
+        instance._media_keys = False  # 字段被 defer，保存前再读取
+    else:
+        instance._media_keys = reference_keys(instance.images, instance.videos)
+
+
+@receiver(pre_save, sender=Need, dispatch_uid='media_load_refs')
+@receiver(pre_save, sender=Response, dispatch_uid='media_load_refs')
+def load_refs(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & set(MEDIA_FIELDS):
+        return
+    _load_keys(sender, instance)
+
+
+@receiver(post_save, sender=Need, dispatch_uid='media_update_refs')
+@receiver(post_save, sender=Response, dispatch_uid='media_update_refs')
+def update_refs(sender, instance, created=False, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & set(MEDIA_FIELDS):
+        return
+    new = reference_keys(instance.images, instance.videos)
+    if new != (Counter() if created else instance._media_keys):
+        set_references(instance, new)
+    instance._media_keys = new
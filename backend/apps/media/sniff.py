@@ -0,0 +1,42 @@
+"""按文件头（magic bytes）识别上传文件的实际格式，不信任客户端声明的 Content-Type"""
+
+# 识别所需的文件头长度
+SNIFF_LENGTH = 16
+
+# 识别出的格式 -> 存储文件的扩展名（按实际内容，不用客户端文件名的扩展名）
+EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'video/mp4': '.mp4',
+    'video/quicktime': '.mov',
+    'video/webm': '.webm',
+}
+
+# QuickTime 文件可能不以 ftyp 开头，而是直接以这些 box 开头
+QUICKTIME_LEADING_BOXES = (b'moov', b'mdat', b'wide', b'free', b'skip', b'pnot')
+
+
+def sniff_content_type(header):
+    """根据文件开头的字节返回 MIME 类型，无法识别时返回 None"""
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if header.startswith((b'GIF87a', b'GIF89a')):
+        return 'image/gif'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'image/webp'
+    if header[4:8] == b'ftyp':
+        return 'video/quicktime' if header[8:12] == b'qt  ' else 'video/mp4'
+    if header[4:8] in QUICKTIME_LEADING_BOXES:
+        return 'video/quicktime'
+    if header.startswith(b'\x1a\x45\xdf\xa3'):
+        return 'video/webm'
+    return None
+
+
+def sniff_extension(header):
+    """根据文件开头的字节返回存储扩展名（含点），无法识别时返回空字符串"""
+    return EXTENSIONS.get(sniff_content_type(header), '')
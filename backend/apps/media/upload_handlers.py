@@ -0,0 +1,64 @@
+"""边接收边校验的上传处理器
+
+Django 默认在整个请求体接收并写入临时文件后才交给视图校验，伪造或超大的文件要传完才会被拒绝。
+MediaUploadHandler 排在默认处理器之前，逐块检查上传数据：
+- 前 SNIFF_LENGTH 字节必须是允许的格式（按文件头识别，不信任客户端声明的 Content-Type）
+- 按识别出的格式限制大小
+不通过时抛出 StopUpload(connection_reset=True)，立即停止读取请求体，错误记录在 request.upload_errors。
+
+用法（须在访问 request.data / request.FILES 之前）：
+    request.upload_handlers.insert(0, MediaUploadHandler(request, limits, content_error))
+"""
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+
+from .sniff import SNIFF_LENGTH, sniff_content_type
+
+
+class MediaUploadHandler(FileUploadHandler):
+    """
+    limits: {MIME 类型: (最大字节数, 超限错误信息)}，未列出的格式直接拒绝
+    content_error: 文件头不是允许格式时的错误信息
+    """
+
+    def __init__(self, request, limits, content_error):
+        super().__init__(request)
+        self.limits = limits
+        self.content_error = content_error
+        if not hasattr(request, 'upload_errors'):
+            request.upload_errors = []
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.head = b''
+        self.limit = None
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.limit is None:
+            self.head += raw_data[:SNIFF_LENGTH - len(self.head)]
+            if len(self.head) >= SNIFF_LENGTH:
+                self._identify()
+        if self.limit is not None and self.received > self.limit[0]:
+            self._reject(self.limit[1])
+        # 数据原样交给后续处理器（内存/临时文件）
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.limit is None:
+            # 不足 SNIFF_LENGTH 字节的文件
+            self._identify()
+        return None
+
+    def _identify(self):
+        content_type = sniff_content_type(self.head)
+        if content_type not in self.limits:
+            self._reject(self.content_error)
+        self.limit = self.limits[content_type]
+
+    def _reject(self, error):
+        self.request.upload_errors.append({
+            'filename': self.file_name,
+            'error': error
+        })
+        raise StopUpload(connection_reset=True)
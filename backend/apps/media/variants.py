@@ -0,0 +1,152 @@
+"""上传图片的多尺寸版本（缩略图）
+
+上传时把原图交给有界进程池生成 IMAGE_VARIANT_SIZES 各尺寸的 WebP/JPEG 版本，
+与原图放在同一目录：images/2026/10/<uuid>.png -> images/2026/10/<uuid>_480.webp
+序列化器通过 variants 字段输出每张图片的版本 URL，列表页只需下载缩略图。
+"""
+import atexit
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from rest_framework import serializers
+
+from .imaging import VARIANT_FORMATS, render_variants, variant_path
+
+logger = logging.getLogger(__name__)
+
+# 可生成缩略图的原图扩展名
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+# 缩略图文件名：<原图主名>_<尺寸>.<webp|jpg>
+VARIANT_NAME_RE = re.compile(r'^(?P<stem>.+)_(?P<size>\d+)\.(webp|jpg)$')
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = None
+
+
+def variant_sizes():
+    return tuple(getattr(settings, 'IMAGE_VARIANT_SIZES', (160, 480, 1080)))
+
+
+def _get_executor():
+    """惰性创建进程池；进行中的任务数受 IMAGE_VARIANT_QUEUE_SIZE 限制"""
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is None:
+            workers = getattr(settings, 'IMAGE_VARIANT_WORKERS', 2)
+            # spawn：子进程不继承父进程的数据库连接和线程
+            _executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+            )
+            _slots = threading.BoundedSemaphore(getattr(settings, 'IMAGE_VARIANT_QUEUE_SIZE', workers * 4))
+            atexit.register(_executor.shutdown, wait=False, cancel_futures=True)
+        return _executor
+
+
+def _discard_executor(executor):
+    """子进程异常退出后进程池不可再用，丢弃后下次重新创建"""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def is_variant_source(relative_path):
+    return (
+        relative_path.startswith('images/')
+        and os.path.splitext(relative_path)[1].lower() in SOURCE_EXTENSIONS
+        and not VARIANT_NAME_RE.match(os.path.basename(relative_path))
+    )
+
+
+def submit_variants(relative_path, timeout=None):
+    """
+    把缩略图任务提交到进程池，返回 Future
+    进程池满时最多等待 timeout 秒（None 为一直等待）取得空位，仍然没有空位返回 None
+    """
+    executor = _get_executor()
+    slots = _slots
+    if not slots.acquire(timeout=timeout):
+        return None
+    source_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    try:
+        try:
+            future = executor.submit(render_variants, source_path, variant_sizes())
+        except BrokenProcessPool:
+            _discard_executor(executor)
+            future = _get_executor().submit(render_variants, source_path, variant_sizes())
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def generate_variants(relative_path):
+    """
+    为 MEDIA_ROOT 下的原图生成缩略图并等待完成，返回 variants 映射（见 variants_for）
+    排队和生成各最多等待 IMAGE_VARIANT_TIMEOUT 秒：
+    - 进程池满时跳过（之后可用 generate_image_variants 命令补齐）
+    - 生成超时时任务继续在后台执行，本次返回 {}
+    生成失败（例如文件不是有效图片）时返回 {}
+    """
+    if not is_variant_source(relative_path):
+        return {}
+    # 重复上传的图片已有缩略图
+    existing = variants_for(f'{settings.MEDIA_URL}{relative_path}')
+    if existing:
+        return existing
+    timeout = getattr(settings, 'IMAGE_VARIANT_TIMEOUT', 10)
+    try:
+        future = submit_variants(relative_path, timeout)
+    except Exception:
+        logger.exception('缩略图任务提交失败: %s', relative_path)
+        return {}
+    if future is None:
+        logger.warning('缩略图进程池已满，跳过: %s', relative_path)
+        return {}
+    try:
+        future.result(timeout=timeout)
+    except TimeoutError:
+        logger.warning('缩略图生成超时，转为后台执行: %s', relative_path)
+        return {}
+    except Exception:
+        logger.exception('缩略图生成失败: %s', relative_path)
+        return {}
+    return variants_for(f'{settings.MEDIA_URL}{relative_path}')
+
+
+def variants_for(url):
+    """
+    图片 URL 对应的缩略图 URL：{'160': {'webp': url, 'jpeg': url}, ...}
+    非本站上传图片或尚未生成缩略图时返回 {}
+    """
+    if not isinstance(url, str) or not url.startswith(settings.MEDIA_URL):
+        return {}
+    relative_path = url[len(settings.MEDIA_URL):]
+    if not is_variant_source(relative_path):
+        return {}
+    sizes = variant_sizes()
+    # 最后写入的是最小尺寸的 JPEG，以它是否存在判断是否已生成（每张图一次 stat）
+    probe = variant_path(os.path.join(settings.MEDIA_ROOT, relative_path), min(sizes), 'jpeg')
+    if not os.path.exists(probe):
+        return {}
+    return {
+        str(size): {fmt: variant_path(url, size, fmt) for fmt in VARIANT_FORMATS}
+        for size in sizes
+    }
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """图片 URL 列表 -> {原图 URL: 缩略图映射}，用法：variants = ImageVariantsField(source='images')"""
+
+    def to_representation(self, value):
+        return {url: variants for url in value or [] if (variants := variants_for(url))}
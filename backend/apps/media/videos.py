@@ -0,0 +1,35 @@
+"""上传视频的 MP4/QuickTime faststart 改写（见 mp4.py）
+
+上传的视频在计算摘要、存入内容寻址路径之前改写（主要是文件拷贝，不占用 GIL），
+MediaBlob.sha256 和 URL 对应改写后的内容：URL 以 immutable 长期缓存，返回后文件不能再变化。
+改写直接在上传请求线程中执行，视频上传的响应时间相应增加（约为拷贝一次文件的时间）。
+"""
+import logging
+import os
+
+from django.conf import settings
+
+from .mp4 import faststart
+
+logger = logging.getLogger(__name__)
+
+
+def _faststart(path):
+    try:
+        changed = faststart(path)
+    except Exception:
+        logger.exception('视频 faststart 失败: %s', path)
+        return False
+    if changed:
+        logger.info('视频已改写为 faststart: %s', path)
+    return changed
+
+
+def run_faststart(relative_path):
+    """改写 MEDIA_ROOT 下的视频，返回是否改写"""
+    return _faststart(os.path.join(settings.MEDIA_ROOT, relative_path))
+
+
+def faststart_file(path):
+    """在当前线程改写 path，返回是否改写；不是 MP4/QuickTime（如 WebM）的文件读取头部后即跳过"""
+    return _faststart(path)
@@ -0,0 +1,255 @@
+"""媒体文件访问视图
+
+- 强校验器：ETag/Last-Modified 取自文件 stat，支持 If-None-Match / If-Modified-Since（304）
+  和 If-Match / If-Unmodified-Since（412）
+- Range：单区间、后缀区间（bytes=-500）、多区间（multipart/byteranges），If-Range 不匹配时返回完整文件
+- 上传文件名为 UUID，内容不会变化，返回长期 immutable 缓存头；其他文件每次用校验器重新验证
+
+发送方式由 settings.MEDIA_SERVE_MODE 决定：
+- sendfile（默认）: FileResponse + 文件描述符，支持 wsgi.file_wrapper 的服务器（gunicorn、uWSGI）
+  直接用 os.sendfile 在内核中拷贝，完整请求和单区间请求都不经过 Python 读写
+- x-accel-redirect: 只返回 X-Accel-Redirect 头，由 Nginx 从 MEDIA_ACCEL_REDIRECT_PREFIX 对应的
+  internal location 发送文件（Range 由 Nginx 处理）
+- x-sendfile: 只返回 X-Sendfile 头（Apache mod_xsendfile / lighttpd），值为文件绝对路径
+- stream: 逐块读取的 StreamingHttpResponse，块大小随传输长度自适应
+多区间响应总是逐块读取。
+"""
+import os
+import re
+import stat
+import uuid
+import mimetypes
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, StreamingHttpResponse, HttpResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_http_methods
+
+from apps.common.metrics import metrics
+
+from .ranges import if_range_matches, multipart_layout, parse_range_header
+
+# 自适应分块：64KB 起，按传输长度翻倍，最大 1MB（单次传输约 64 次迭代以内）
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 1024 * 1024
+
+# 上传接口生成的文件名（uuid4().hex 或内容 SHA-256 + 扩展名）及其缩略图（_<尺寸>），内容写入后不再变化
+IMMUTABLE_NAME_RE = re.compile(r'^([0-9a-f]{32}|[0-9a-f]{64})(_\d+)?(\.[0-9A-Za-z]+)?$')
+
+
+@require_http_methods(['GET', 'HEAD', 'OPTIONS'])
+def serve_media(request, path):
+    """
+    媒体文件访问（支持缓存校验和 Range 请求）
+    允许视频拖动进度条
+    """
+    if request.method == 'OPTIONS':
+        return _add_media_headers(HttpResponse())
+
+    # 分块上传中的 .part 文件不对外提供
+    if path.endswith('.part'):
+        raise Http404("文件不存在")
+
+    # 构建完整文件路径（拒绝 ../ 等越出 MEDIA_ROOT 的路径）
+    try:
+        file_path = safe_join(settings.MEDIA_ROOT, path)
+        file_stat = os.stat(file_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404("文件不存在")
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404("文件不存在")
+
+    # 获取文件类型
+    content_type, _ = mimetypes.guess_type(file_path)
+    content_type = content_type or 'application/octet-stream'
+
+    file_size = file_stat.st_size
+    etag = f'"{file_stat.st_mtime_ns:x}-{file_size:x}"'
+    last_modified = int(file_stat.st_mtime)
+    validators = HttpResponse()
+    validators['ETag'] = etag
+    validators['Last-Modified'] = http_date(last_modified)
+    validators['Cache-Control'] = cache_control_for(path)
+
+    # 304 Not Modified / 412 Precondition Failed
+    conditional = get_conditional_response(
+        request, etag=etag, last_modified=last_modified, response=validators
+    )
+    if conditional is not validators:
+        return _add_media_headers(conditional)
+
+    mode = getattr(settings, 'MEDIA_SERVE_MODE', 'sendfile')
+    if mode in ('x-accel-redirect', 'x-sendfile'):
+        response = offload_response(file_path, path, content_type, mode)
+        if request.method == 'GET':
+            metrics.inc('media_served_bytes_total', file_size, mode=mode)  # 由代理处理 Range，按完整文件计
+        return _add_media_headers(_copy_validators(validators, response))
+
+    # 解析 Range 请求头（If-Range 不匹配时忽略 Range，返回完整文件）
+    ranges = None
+    if if_range_matches(request.META.get('HTTP_IF_RANGE'), etag, last_modified):
+        ranges = parse_range_header(request.META.get('HTTP_RANGE', '').strip(), file_size)
+
+    if ranges == []:
+        response = HttpResponse(status=416)  # Range Not Satisfiable
+        response['Content-Range'] = f'bytes */{file_size}'
+        return _add_media_headers(_copy_validators(validators, response))
+
+    if ranges is not None and len(ranges) > 1:
+        response = multipart_response(request, file_path, file_size, content_type, ranges)
+    else:
+        start, end = ranges[0] if ranges else (0, file_size - 1)
+        status = 206 if ranges else 200
+        response = file_response(request, file_path, start, end, status, content_type, mode)
+        if status == 206:
+            response['Content-Range'] = f'bytes {start}-{end}/{file_size}'
+
+    if request.method == 'GET':
+        metrics.inc('media_served_bytes_total', int(response['Content-Length']), mode=mode)
+    return _add_media_headers(_copy_validators(validators, response))
+
+
+def cache_control_for(path):
+    """UUID 命名的上传文件长期缓存，其他文件每次重新验证"""
+    if IMMUTABLE_NAME_RE.match(os.path.basename(path)):
+        max_age = getattr(settings, 'MEDIA_IMMUTABLE_MAX_AGE', 365 * 24 * 3600)
+        return f'public, max-age={max_age}, immutable'
+    return 'public, no-cache'
+
+
+def file_response(request, file_path, start, end, status, content_type, mode):
+    """单个连续区间（或完整文件）的响应"""
+    length = end - start + 1
+    if request.method == 'HEAD':
+        response = HttpResponse(status=status, content_type=content_type)
+    elif mode == 'stream':
+        response = StreamingHttpResponse(
+            file_iterator(file_path, start, end, chunk_size_for(length)),
+            status=status,
+            content_type=content_type
+        )
+    else:
+        response = FileResponse(
+            FileRange(open(file_path, 'rb'), start, length),
+            status=status,
+            content_type=content_type
+        )
+        # 服务器不支持 sendfile 时 FileResponse 按 block_size 读取
+        response.block_size = chunk_size_for(length)
+    response['Content-Length'] = length
+    return response
+
+
+def multipart_response(request, file_path, file_size, content_type, ranges):
+    """多区间请求的 multipart/byteranges 响应"""
+    boundary = uuid.uuid4().hex
+    parts, tail, length = multipart_layout(ranges, file_size, content_type, boundary)
+    media_type = f'multipart/byteranges; boundary={boundary}'
+    if request.method == 'HEAD':
+        response = HttpResponse(status=206, content_type=media_type)
+    else:
+        response = StreamingHttpResponse(
+            multipart_iterator(file_path, parts, tail),
+            status=206,
+            content_type=media_type
+        )
+    response['Content-Length'] = length
+    return response
+
+
+def offload_response(file_path, path, content_type, mode):
+    """交给前置代理发送文件的空响应"""
+    response = HttpResponse(content_type=content_type)
+    if mode == 'x-accel-redirect':
+        prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(path.lstrip('/'))
+    else:
+        response['X-Sendfile'] = file_path
+    return response
+
+
+def _copy_validators(validators, response):
+    for header in ('ETag', 'Last-Modified', 'Cache-Control'):
+        response[header] = validators[header]
+    return response
+
+
+def _add_media_headers(response):
+    """添加必要的响应头"""
+    response['Accept-Ranges'] = 'bytes'
+    response['Access-Control-Allow-Origin'] = '*'
+    response['Access-Control-Allow-Headers'] = 'Range, If-Range, If-None-Match, If-Modified-Since'
+    response['Access-Control-Expose-Headers'] = 'Content-Range, Content-Length, Accept-Ranges, ETag'
+    return response
+
+
+class FileRange:
+    """
+    文件中的一段字节区间，作为 FileResponse 的内容
+    - fileno() 返回已定位到区间起点的描述符，支持 sendfile 的 WSGI 服务器据此和
+      Content-Length 调用 os.sendfile，只发送该区间
+    - 其他服务器通过 read() 分块读取，读到区间末尾即结束
+    不提供 name/tell/seek，避免 FileResponse 按整个文件推算 Content-Length
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def chunk_size_for(length):
+    """按传输长度选择分块大小，小文件少占内存，大文件减少 Python 迭代次数"""
+    size = MIN_CHUNK_SIZE
+    while size < MAX_CHUNK_SIZE and size * 64 < length:
+        size *= 2
+    return size
+
+
+def file_iterator(file_path, start, end, chunk_size=8192):
+    """文件分块读取迭代器"""
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def multipart_iterator(file_path, parts, tail):
+    """依次输出 multipart/byteranges 的分段头和区间内容"""
+    with open(file_path, 'rb') as f:
+        for head, start, end in parts:
+            yield head
+            f.seek(start)
+            remaining = end - start + 1
+            chunk_size = chunk_size_for(remaining)
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        yield tail
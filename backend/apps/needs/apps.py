@@ -5,3 +5,6 @@ class NeedsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.needs'
     verbose_name = '需求管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -1,10 +1,32 @@
-"""清理孤立的上传文件（未被任何需求或响应引用的文件）"""
-import os
-from collections import defaultdict
-from django.core.management.base import BaseCommand
-from django.conf import settings
-from apps.needs.models import Need
-from apps.responses.models import Response
+"""清理孤立的上传文件（未被任何需求或响应引用的文件）
+
+引用关系来自 MediaReference 引用索引，不再加载和遍历所有需求/响应的 images、videos。
+删除内容寻址文件（MediaBlob）时以 NOT EXISTS 反连接为条件，扫描期间又被引用的文件不会被删除；
+多个需求/响应共用的同一文件在最后一个引用移除前不会被删除。
+扫描、批量删除和空目录清理见 apps/media/orphans.py，百万级文件的目录树也只占用有限内存。
+"""
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.media.models import UploadSession
+from apps.media.orphans import OrphanCleaner
+from apps.media.references import describe_references
+
+DURATION_RE = re.compile(r'^(\d+)([smhd]?)$')
+
+DURATION_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# 最多显示的孤立文件数
+SHOW_LIMIT = 20
+
+
+def parse_duration(value):
+    """'90'、'30m'、'24h'、'7d' 转换为秒数"""
+    match = DURATION_RE.match(value.strip().lower())
+    if not match:
+        raise CommandError(f'无效的时长: {value}（示例: 30m、24h、7d）')
+    return int(match.group(1)) * DURATION_UNITS[match.group(2)]
 
 
 class Command(BaseCommand):
@@ -21,127 +43,90 @@ class Command(BaseCommand):
             action='store_true',
             help='列出所有文件和对应的需求/响应',
         )
+        parser.add_argument(
+            '--older-than',
+            default='1h',
+            help='宽限期：只删除修改时间早于该时长的文件，避免删除刚上传、尚未提交需求/响应的文件（默认 1h，0 表示不限）',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='并行扫描目录的线程数（默认 4）',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
-        list_all = options['list']
-        
-        # 构建文件 URL 到需求/响应的映射
-        file_to_refs = defaultdict(list)
-        
-        # 从 Need 模型收集
-        for need in Need.objects.all():
-            if need.images:
-                for url in need.images:
-                    title = f'{need.title[:20]}...' if len(need.title) > 20 else need.title
-                    file_to_refs[url].append(f'需求#{need.id}: {title}')
-            if need.videos:
-                for url in need.videos:
-                    title = f'{need.title[:20]}...' if len(need.title) > 20 else need.title
-                    file_to_refs[url].append(f'需求#{need.id}: {title}')
-        
-        # 从 Response 模型收集
-        for response in Response.objects.all():
-            if response.images:
-                for url in response.images:
-                    file_to_refs[url].append(f'响应#{response.id} (需求#{response.need_id})')
-            if response.videos:
-                for url in response.videos:
-                    file_to_refs[url].append(f'响应#{response.id} (需求#{response.need_id})')
-        
-        # 转换 URL 为相对路径
-        referenced_paths = set()
-        for url in file_to_refs.keys():
-            if url.startswith('/media/'):
-                referenced_paths.add(url[7:])  # 去掉 '/media/'
-        
-        # 遍历 media 目录中的文件
-        media_root = settings.MEDIA_ROOT
-        orphan_files = []
-        all_files = []
-        total_size = 0
-        
-        for root, dirs, files in os.walk(media_root):
-            for filename in files:
-                full_path = os.path.join(root, filename)
-                relative_path = os.path.relpath(full_path, media_root)
-                # 统一使用正斜杠（兼容 Windows）
-                relative_path_normalized = relative_path.replace('\\', '/')
-                
-                # 跳过非图片/视频目录
-                if not (relative_path_normalized.startswith('images/') or relative_path_normalized.startswith('videos/')):
-                    continue
-                
-                url = f'/media/{relative_path_normalized}'
-                file_size = os.path.getsize(full_path)
-                all_files.append((relative_path_normalized, url, file_size, full_path))
-                
-                if relative_path_normalized not in referenced_paths:
-                    orphan_files.append(full_path)
-                    total_size += file_size
-        
-        # 如果请求列出所有文件
-        if list_all:
-            self.show_file_mapping(all_files, file_to_refs)
+        older_than = parse_duration(options['older_than'])
+        if options['workers'] < 1:
+            raise CommandError('--workers 至少为 1')
+
+        if options['list']:
+            self.show_file_mapping(OrphanCleaner(workers=options['workers']))
             return
-        
-        # 没有孤立文件时，显示文件映射
-        if not orphan_files:
-            self.show_file_mapping(all_files, file_to_refs)
-            self.stdout.write(self.style.SUCCESS('\n所有文件都已被引用，没有孤立文件'))
+
+        # 删除过期的上传会话记录
+        if not dry_run:
+            _, deleted = UploadSession.objects.filter(expires_at__lte=timezone.now()).delete()
+            if deleted.get('media.UploadSession'):
+                self.stdout.write(f'已删除 {deleted["media.UploadSession"]} 条过期的上传会话记录')
+
+        def on_orphan(path, size):
+            if cleaner.orphans <= SHOW_LIMIT:
+                self.stdout.write(self.style.WARNING(f'  - {path}'))
+
+        def on_error(path, error):
+            self.stdout.write(self.style.ERROR(f'删除失败: {path} - {error}'))
+
+        cleaner = OrphanCleaner(
+            older_than=older_than,
+            workers=options['workers'],
+            dry_run=dry_run,
+            on_orphan=on_orphan,
+            on_error=on_error,
+        )
+        cleaner.run()
+
+        if cleaner.recent:
+            self.stdout.write(f'{cleaner.recent} 个未被引用的文件在宽限期（{options["older_than"]}）内，暂不删除')
+        if not cleaner.orphans:
+            self.stdout.write(self.style.SUCCESS(f'\n共扫描 {cleaner.files} 个文件，没有孤立文件'))
             return
-        
-        # 显示将被删除的文件
-        self.stdout.write(f'\n发现 {len(orphan_files)} 个孤立文件，共 {total_size / 1024 / 1024:.2f} MB:\n')
-        for path in orphan_files[:20]:  # 最多显示 20 个
-            self.stdout.write(self.style.WARNING(f'  - {path}'))
-        if len(orphan_files) > 20:
-            self.stdout.write(f'  ... 还有 {len(orphan_files) - 20} 个文件')
-        
+
+        if cleaner.orphans > SHOW_LIMIT:
+            self.stdout.write(f'  ... 还有 {cleaner.orphans - SHOW_LIMIT} 个文件')
+        self.stdout.write(
+            f'\n共扫描 {cleaner.files} 个文件，发现 {cleaner.orphans} 个孤立文件，'
+            f'共 {cleaner.orphan_bytes / 1024 / 1024:.2f} MB'
+        )
         if dry_run:
             self.stdout.write(self.style.WARNING('(--dry-run 模式，未实际删除)'))
             return
-        
-        # 删除文件
-        deleted_count = 0
-        for path in orphan_files:
-            try:
-                os.remove(path)
-                deleted_count += 1
-            except OSError as e:
-                self.stdout.write(self.style.ERROR(f'删除失败: {path} - {e}'))
-        
-        # 清理空目录
-        for root, dirs, files in os.walk(media_root, topdown=False):
-            for dir_name in dirs:
-                dir_path = os.path.join(root, dir_name)
-                try:
-                    if not os.listdir(dir_path):
-                        os.rmdir(dir_path)
-                except OSError:
-                    pass
-        
-        self.stdout.write(self.style.SUCCESS(f'\n成功删除 {deleted_count} 个孤立文件'))
-    
-    def show_file_mapping(self, all_files, file_to_refs):
-        """显示文件和需求/响应的对应关系"""
-        if not all_files:
-            self.stdout.write('\n没有上传的文件')
-            return
-        
-        self.stdout.write(f'\n已上传文件列表 ({len(all_files)} 个):\n')
+        self.stdout.write(self.style.SUCCESS(f'成功删除 {cleaner.deleted} 个孤立文件'))
+
+    def show_file_mapping(self, cleaner):
+        """按目录逐批显示文件和需求/响应的对应关系"""
+        count = 0
+        self.stdout.write('\n已上传文件列表:\n')
         self.stdout.write('-' * 80)
-        
-        for relative_path, url, file_size, _ in all_files:
-            size_str = f'{file_size / 1024:.1f} KB' if file_size < 1024 * 1024 else f'{file_size / 1024 / 1024:.2f} MB'
-            refs = file_to_refs.get(url, [])
-            
-            if refs:
-                self.stdout.write(self.style.SUCCESS(f'\n  {relative_path} ({size_str})'))
-                for ref in refs:
-                    self.stdout.write(f'    -> {ref}')
-            else:
-                self.stdout.write(self.style.WARNING(f'\n  {relative_path} ({size_str})'))
-                self.stdout.write(self.style.ERROR('    -> [孤立文件，未被引用]'))
-        
+
+        for batch, _ in cleaner.batches():
+            file_to_refs = describe_references({owner for _, _, _, owner, _, _ in batch})
+            for _, _, relative_path, owner, file_size, _ in batch:
+                count += 1
+                size_str = f'{file_size / 1024:.1f} KB' if file_size < 1024 * 1024 else f'{file_size / 1024 / 1024:.2f} MB'
+                refs = file_to_refs.get(owner, [])
+
+                if refs:
+                    self.stdout.write(self.style.SUCCESS(f'\n  {relative_path} ({size_str})'))
+                    for ref in refs:
+                        self.stdout.write(f'    -> {ref}')
+                elif relative_path in cleaner.live_parts:
+                    self.stdout.write(f'\n  {relative_path} ({size_str})')
+                    self.stdout.write('    -> [分块上传中]')
+                else:
+                    self.stdout.write(self.style.WARNING(f'\n  {relative_path} ({size_str})'))
+                    self.stdout.write(self.style.ERROR('    -> [孤立文件，未被引用]'))
+
         self.stdout.write('\n' + '-' * 80)
+        self.stdout.write(f'共 {count} 个文件' if count else '没有上传的文件')
@@ -0,0 +1,50 @@
+"""重新统计需求的响应计数列（pending/accepted/total_response_count）"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from apps.needs.models import Need
+from apps.responses.models import Response
+
+
+class Command(BaseCommand):
+    help = '按 responses 表批量重算需求的响应计数'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='仅显示计数不一致的需求数量，不实际修改',
+        )
+
+    def handle(self, *args, **options):
+        # 找出计数列与实时统计不一致的需求
+        drifted = Need.objects.with_response_stats().filter(
+            ~Q(pending_response_count=F('pending_responses')) |
+            ~Q(accepted_response_count=F('accepted_responses')) |
+            ~Q(total_response_count=F('total_responses'))
+        ).count()
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('所有需求的响应计数均正确'))
+            return
+
+        self.stdout.write(f'发现 {drifted} 个需求的响应计数不一致')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('(--dry-run 模式，未实际修改)'))
+            return
+
+        # 一条 UPDATE 语句用相关子查询重算全部计数
+        updated = Need.objects.update(
+            pending_response_count=self.count_subquery(status=0),
+            accepted_response_count=self.count_subquery(status=1),
+            total_response_count=self.count_subquery(),
+        )
+        self.stdout.write(self.style.SUCCESS(f'已重新统计 {updated} 个需求的响应计数'))
+
+    def count_subquery(self, **filters):
+        """按需求统计响应数的相关子查询"""
+        counts = Response.objects.filter(need=OuterRef('pk'), **filters).order_by().values(
+            'need'
+        ).annotate(count=Count('id')).values('count')
+        return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-17 10:04
+
+from django.db import migrations, models
+
+
+BACKFILL_SQL = '''
+UPDATE needs SET
+    pending_response_count = (SELECT COUNT(*) FROM responses WHERE responses.need_id = needs.id AND responses.status = 0),
+    accepted_response_count = (SELECT COUNT(*) FROM responses WHERE responses.need_id = needs.id AND responses.status = 1),
+    total_response_count = (SELECT COUNT(*) FROM responses WHERE responses.need_id = needs.id)
+'''
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('needs', '0001_initial'),
+        ('responses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='need',
+            name='accepted_response_count',
+            field=models.IntegerField(default=0, verbose_name='已同意响应数'),
+        ),
+        migrations.AddField(
+            model_name='need',
+            name='pending_response_count',
+            field=models.IntegerField(default=0, verbose_name='待接受响应数'),
+        ),
+        migrations.AddField(
+            model_name='need',
+            name='total_response_count',
+            field=models.IntegerField(default=0, verbose_name='响应总数'),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-17 10:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('needs', '0002_response_counters'),
+        ('regions', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='need',
+            index=models.Index(fields=['status', 'created_at'], name='needs_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='need',
+            index=models.Index(fields=['user', 'created_at'], name='needs_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='need',
+            index=models.Index(fields=['region', 'service_type', 'status'], name='needs_region_type_status_idx'),
+        ),
+    ]
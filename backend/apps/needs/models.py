@@ -1,7 +1,25 @@
 from django.db import models
+from django.db.models import Count, F, Q
 from django.conf import settings
 
 
+class NeedQuerySet(models.QuerySet):
+    """需求查询集"""
+
+    def with_response_stats(self):
+        """
+        一次条件聚合实时计算响应统计（用于校对计数列）
+        - pending_responses: 待接受(0)
+        - accepted_responses: 已同意(1)
+        - total_responses: 全部响应
+        """
+        return self.annotate(
+            pending_responses=Count('responses', filter=Q(responses__status=0)),
+            accepted_responses=Count('responses', filter=Q(responses__status=1)),
+            total_responses=Count('responses'),
+        )
+
+
 class Need(models.Model):
     """需求表 - "我需要" """
     
@@ -68,24 +86,97 @@ class Need(models.Model):
         auto_now=True,
         verbose_name='更新时间'
     )
+    # 响应计数（冗余列，随响应状态变化以 F() 原子维护，可用 recount_need_responses 修复）
+    pending_response_count = models.IntegerField(
+        default=0,
+        verbose_name='待接受响应数'
+    )
+    accepted_response_count = models.IntegerField(
+        default=0,
+        verbose_name='已同意响应数'
+    )
+    total_response_count = models.IntegerField(
+        default=0,
+        verbose_name='响应总数'
+    )
+
+    objects = NeedQuerySet.as_manager()
+
+    # 响应状态 -> 对应的计数列（已拒绝/已取消不单独计数）
+    RESPONSE_STATUS_COUNTERS = {
+        0: 'pending_response_count',
+        1: 'accepted_response_count',
+    }
+    RESPONSE_COUNTER_FIELDS = ['pending_response_count', 'accepted_response_count', 'total_response_count']
     
     class Meta:
         db_table = 'needs'
         verbose_name = '服务需求'
         verbose_name_plural = '服务需求'
         ordering = ['-created_at']
+        indexes = [
+            # 公开需求列表（status=0 按时间倒序）、管理端按状态筛选、月度统计按时间范围
+            # 注：SQLite 无法用绑定参数 status=? 匹配部分索引的 WHERE 条件，故不使用部分索引
+            models.Index(fields=['status', 'created_at'], name='needs_status_created_idx'),
+            # 我的需求：按用户筛选并按时间排序，免去临时排序
+            models.Index(fields=['user', 'created_at'], name='needs_user_created_idx'),
+            # 按地域 + 服务类型筛选
+            models.Index(fields=['region', 'service_type', 'status'], name='needs_region_type_status_idx'),
+        ]
     
     def __str__(self):
         return f'[{self.service_type}] {self.title}'
-    
+
+    def save(self, *args, **kwargs):
+        """
+        更新已有需求时不写计数列：计数列只由 apply_response_transition 的 F() 原子更新，
+        内存中的旧值整行写回会覆盖并发响应的计数；确需写入时在 update_fields 中显式列出
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.RESPONSE_COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     @property
     def can_edit(self):
         """是否可以编辑（没有待处理或已同意的响应）"""
         # 只有待接受(0)和已同意(1)的响应才阻止编辑
         # 已拒绝(2)和已取消(3)的响应不影响
-        return self.status == 0 and self.responses.filter(status__in=[0, 1]).count() == 0
+        return self.status == 0 and self.pending_response_count + self.accepted_response_count == 0
     
     @property
     def can_delete(self):
         """是否可以删除"""
         return self.can_edit
+
+    def apply_response_transition(self, old_status=None, new_status=None):
+        """
+        响应创建或状态变化时原子更新计数列
+        old_status 为 None 表示新建响应
+        """
+        deltas = {}
+        if old_status is None:
+            deltas['total_response_count'] = 1
+        elif old_status in self.RESPONSE_STATUS_COUNTERS:
+            field = self.RESPONSE_STATUS_COUNTERS[old_status]
+            deltas[field] = deltas.get(field, 0) - 1
+        if new_status in self.RESPONSE_STATUS_COUNTERS:
+            field = self.RESPONSE_STATUS_COUNTERS[new_status]
+            deltas[field] = deltas.get(field, 0) + 1
+
+        updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if not updates:
+            return
+        Need.objects.filter(pk=self.pk).update(**updates)
+        self.refresh_from_db(fields=self.RESPONSE_COUNTER_FIELDS)
+
+    @classmethod
+    def apply_response_removal(cls, need_id, status):
+        """响应被物理删除（级联删除、管理后台、QuerySet.delete()）时原子扣减计数列"""
+        updates = {'total_response_count': F('total_response_count') - 1}
+        field = cls.RESPONSE_STATUS_COUNTERS.get(status)
+        if field:
+            updates[field] = F(field) - 1
+        cls.objects.filter(pk=need_id).update(**updates)
@@ -2,6 +2,8 @@ from rest_framework import serializers
 from .models import Need
 from apps.users.serializers import UserSerializer
 from apps.regions.serializers import RegionSerializer
+from apps.search.engine import highlight
+from apps.media.variants import ImageVariantsField
 
 
 class NeedResponseSerializer(serializers.Serializer):
@@ -10,6 +12,7 @@ class NeedResponseSerializer(serializers.Serializer):
     user = UserSerializer(read_only=True)
     description = serializers.CharField()
     images = serializers.JSONField()
+    variants = ImageVariantsField(source='images')
     videos = serializers.JSONField()
     status = serializers.IntegerField()
     status_display = serializers.CharField(source='get_status_display')
@@ -21,54 +24,53 @@ class NeedListSerializer(serializers.ModelSerializer):
     """需求列表序列化器"""
     user = UserSerializer(read_only=True)
     region = RegionSerializer(read_only=True)
-    response_count = serializers.SerializerMethodField()
-    accepted_count = serializers.SerializerMethodField()
+    # 只统计待接受(0)的新响应，用于显示"新响应"数量
+    response_count = serializers.IntegerField(source='pending_response_count', read_only=True)
+    accepted_count = serializers.IntegerField(source='accepted_response_count', read_only=True)
     can_edit = serializers.ReadOnlyField()
     can_delete = serializers.ReadOnlyField()
+    variants = ImageVariantsField(source='images')
     
     class Meta:
         model = Need
         fields = [
             'id', 'user', 'region', 'service_type', 'title', 
-            'description', 'images', 'videos', 'status', 
+            'description', 'images', 'variants', 'videos', 'status', 
             'response_count', 'accepted_count', 'can_edit', 'can_delete',
             'created_at', 'updated_at'
         ]
-    
-    def get_response_count(self, obj):
-        # 只统计待接受(0)的新响应，用于显示"新响应"数量
-        return obj.responses.filter(status=0).count()
-    
-    def get_accepted_count(self, obj):
-        # 统计已同意(1)的响应数量
-        return obj.responses.filter(status=1).count()
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # 搜索结果高亮（由视图通过 context 传入查询词）
+        query = self.context.get('highlight_query')
+        if query:
+            data['highlight'] = {
+                'title': highlight(instance.title, query, context=0),
+                'description': highlight(instance.description, query),
+            }
+        return data
 
 
 class NeedDetailSerializer(serializers.ModelSerializer):
     """需求详情序列化器"""
     user = UserSerializer(read_only=True)
     region = RegionSerializer(read_only=True)
-    response_count = serializers.SerializerMethodField()
-    accepted_count = serializers.SerializerMethodField()
+    # 只统计待接受(0)的新响应，用于显示"新响应"数量
+    response_count = serializers.IntegerField(source='pending_response_count', read_only=True)
+    accepted_count = serializers.IntegerField(source='accepted_response_count', read_only=True)
     can_edit = serializers.ReadOnlyField()
     can_delete = serializers.ReadOnlyField()
+    variants = ImageVariantsField(source='images')
     
     class Meta:
         model = Need
         fields = [
             'id', 'user', 'region', 'service_type', 'title',
-            'description', 'images', 'videos', 'status',
+            'description', 'images', 'variants', 'videos', 'status',
             'response_count', 'accepted_count', 'can_edit', 'can_delete',
             'created_at', 'updated_at'
         ]
-    
-    def get_response_count(self, obj):
-        # 只统计待接受(0)的新响应，用于显示"新响应"数量
-        return obj.responses.filter(status=0).count()
-    
-    def get_accepted_count(self, obj):
-        # 统计已同意(1)的响应数量
-        return obj.responses.filter(status=1).count()
 
 
 class NeedCreateSerializer(serializers.ModelSerializer):
@@ -100,24 +102,19 @@ class AdminNeedSerializer(serializers.ModelSerializer):
     """管理员查看需求序列化器"""
     user = UserSerializer(read_only=True)
     region = RegionSerializer(read_only=True)
-    response_count = serializers.SerializerMethodField()
-    accepted_count = serializers.SerializerMethodField()
+    response_count = serializers.IntegerField(source='total_response_count', read_only=True)
+    accepted_count = serializers.IntegerField(source='accepted_response_count', read_only=True)
+    variants = ImageVariantsField(source='images')
 
     class Meta:
         model = Need
         fields = [
             'id', 'user', 'region', 'service_type', 'title',
-            'description', 'images', 'videos', 'status',
+            'description', 'images', 'variants', 'videos', 'status',
             'response_count', 'accepted_count',
             'created_at', 'updated_at'
         ]
 
-    def get_response_count(self, obj):
-        return obj.responses.count()
-
-    def get_accepted_count(self, obj):
-        return obj.responses.filter(status=1).count()
-
 
 class AdminNeedUpdateSerializer(serializers.ModelSerializer):
     """管理员更新需求序列化器"""
@@ -0,0 +1,35 @@
+"""响应被物理删除时扣减需求的响应计数列（状态变化见 Need.apply_response_transition）"""
+import threading
+
+from django.db.models.signals import pre_delete, post_delete
+from django.dispatch import receiver
+
+from apps.responses.models import Response
+from .models import Need
+
+# 正在删除的需求 ID：随需求级联删除的响应不必扣减（需求行本身即将删除）
+_deleting = threading.local()
+
+
+def _deleting_needs():
+    if not hasattr(_deleting, 'needs'):
+        _deleting.needs = set()
+    return _deleting.needs
+
+
+@receiver(pre_delete, sender=Need, dispatch_uid='needs_mark_deleting')
+def mark_deleting(sender, instance, **kwargs):
+    # 级联删除时所有 pre_delete 先于删除语句发送，响应的 post_delete 发生在需求的 post_delete 之前
+    _deleting_needs().add(instance.pk)
+
+
+@receiver(post_delete, sender=Need, dispatch_uid='needs_unmark_deleting')
+def unmark_deleting(sender, instance, **kwargs):
+    _deleting_needs().discard(instance.pk)
+
+
+@receiver(post_delete, sender=Response, dispatch_uid='needs_remove_response_counts')
+def remove_response_counts(sender, instance, **kwargs):
+    if instance.need_id in _deleting_needs():
+        return
+    Need.apply_response_removal(instance.need_id, instance.status)
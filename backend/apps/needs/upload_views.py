@@ -1,104 +1,223 @@
 """文件上传视图"""
+import logging
 import os
+import re
+import threading
+import time
 import uuid
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.conf import settings
+from django.db import IntegrityError, connections
+from django.utils import timezone
 
+from apps.common.metrics import metrics
+from apps.media.blobs import adopt_file, find_blob, store_upload, touch_blob
+from apps.media.chunked import ChunkError, file_sha256, ranges_equal, write_chunk
+from apps.media.models import UploadChunk, UploadSession
+from apps.media.sniff import SNIFF_LENGTH, sniff_content_type, sniff_extension
+from apps.media.upload_handlers import MediaUploadHandler
+from apps.media.variants import generate_variants
+from apps.media.videos import faststart_file
 
-class FileUploadView(APIView):
+logger = logging.getLogger(__name__)
+
+
+# 允许的文件类型
+ALLOWED_IMAGE_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
+ALLOWED_VIDEO_TYPES = ['video/mp4', 'video/webm', 'video/quicktime']
+MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
+MAX_VIDEO_SIZE = 50 * 1024 * 1024  # 50MB
+
+# 接收上传数据时按文件头识别的格式 -> (大小上限, 超限错误信息)
+UPLOAD_LIMITS = {
+    **{content_type: (MAX_IMAGE_SIZE, '图片大小不能超过 5MB') for content_type in ALLOWED_IMAGE_TYPES},
+    **{content_type: (MAX_VIDEO_SIZE, '视频大小不能超过 50MB') for content_type in ALLOWED_VIDEO_TYPES},
+}
+CONTENT_ERROR = '文件内容与格式不符'
+
+
+def validate_upload(file_type, content_type, size):
+    """校验文件类型和大小，不通过时返回错误信息"""
+    if file_type == 'image':
+        if content_type not in ALLOWED_IMAGE_TYPES:
+            return '不支持的图片格式，请上传 JPG、PNG、GIF 或 WebP 格式'
+        if size > MAX_IMAGE_SIZE:
+            return '图片大小不能超过 5MB'
+    elif file_type == 'video':
+        if content_type not in ALLOWED_VIDEO_TYPES:
+            return '不支持的视频格式，请上传 MP4、WebM 或 MOV 格式'
+        if size > MAX_VIDEO_SIZE:
+            return '视频大小不能超过 50MB'
+    else:
+        return '无效的文件类型'
+    return None
+
+
+def upload_path(file_type, filename):
+    """按文件类型和年月生成存储路径：images/2026/10/<uuid>.jpg"""
+    ext = os.path.splitext(filename)[1].lower()
+    date_path = datetime.now().strftime('%Y/%m')
+    directory = 'images' if file_type == 'image' else 'videos'
+    return f'{directory}/{date_path}/{uuid.uuid4().hex}{ext}'
+
+
+def content_checker(file_type):
+    """返回按文件头校验格式的函数 check(文件开头的字节)，不是该类型允许的格式时返回错误信息"""
+    allowed = ALLOWED_IMAGE_TYPES if file_type == 'image' else ALLOWED_VIDEO_TYPES
+
+    def check(head):
+        return None if sniff_content_type(head) in allowed else CONTENT_ERROR
+    return check
+
+
+def read_header(file):
+    """上传文件开头 SNIFF_LENGTH 字节"""
+    file.seek(0)
+    header = file.read(SNIFF_LENGTH)
+    file.seek(0)
+    return header
+
+
+def check_file_content(file, file_type):
+    """按文件头校验内容确为允许的图片/视频格式（防止改扩展名、伪造 Content-Type），不通过时返回错误信息"""
+    return content_checker(file_type)(read_header(file))
+
+
+def post_process(relative_path, file_type):
+    """
+    文件保存后的处理，返回 variants
+    - 图片：生成缩略图（进程池中执行并等待，已有缩略图时直接返回）
+    - 视频：无（faststart 在存储前完成，见 apps/media/videos.py）
+    """
+    if file_type == 'image':
+        return generate_variants(relative_path)
+    return {}
+
+
+def process_upload(file, file_type):
+    """
+    校验文件内容、按内容存储并生成缩略图（类型和大小须已通过 validate_upload）
+    返回 (上传结果, 错误信息)
+    """
+    error = check_file_content(file, file_type)
+    if error:
+        return None, error
+
+    # 按内容（SHA-256）存储，重复上传的文件直接返回已有文件的 URL
+    # 扩展名按文件头识别（决定访问时的 Content-Type），不用客户端的文件名和声明的类型
+    # 视频先改写为 faststart 再计算摘要，URL 返回后内容不再变化
+    prepare = faststart_file if file_type == 'video' else None
+    blob, _ = store_upload(file, file_type, sniff_extension(read_header(file)), prepare)
+
+    variants = post_process(blob.relative_path, file_type)
+
+    return {
+        'url': blob.url,
+        'filename': file.name,
+        'size': file.size,
+        'type': file_type,
+        'variants': variants
+    }, None
+
+
+_upload_executor = None
+_upload_executor_lock = threading.Lock()
+
+
+def _get_upload_executor():
+    """批量上传的线程池（哈希、写盘、等待缩略图进程池时都不占用 GIL），所有请求共用"""
+    global _upload_executor
+    with _upload_executor_lock:
+        if _upload_executor is None:
+            _upload_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'UPLOAD_WORKERS', 4),
+                thread_name_prefix='upload'
+            )
+        return _upload_executor
+
+
+def _process_upload_in_thread(file, file_type):
+    try:
+        return process_upload(file, file_type)
+    except Exception:
+        logger.exception('文件保存失败: %s', file.name)
+        return None, '文件保存失败'
+    finally:
+        # 工作线程中打开的数据库连接不会随请求结束关闭
+        connections.close_all()
+
+
+class StreamingValidationMixin:
+    """
+    解析请求体前装上 MediaUploadHandler：文件头不是允许的图片/视频格式或超过大小上限时，
+    只读取到出错的位置就停止接收（而不是传完 50MB 再拒绝），错误记录在 request.upload_errors
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        request.upload_handlers.insert(0, MediaUploadHandler(request._request, UPLOAD_LIMITS, CONTENT_ERROR))
+
+
+class FileUploadView(StreamingValidationMixin, APIView):
     """文件上传接口"""
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
     
-    # 允许的文件类型
-    ALLOWED_IMAGE_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
-    ALLOWED_VIDEO_TYPES = ['video/mp4', 'video/webm', 'video/quicktime']
-    MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
-    MAX_VIDEO_SIZE = 50 * 1024 * 1024  # 50MB
-    
     def post(self, request):
+        started = time.perf_counter()
         file = request.FILES.get('file')
         file_type = request.data.get('type', 'image')  # image 或 video
         
+        # 接收过程中已被拒绝
+        if request.upload_errors:
+            return Response({
+                'code': 400,
+                'message': request.upload_errors[0]['error']
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
         if not file:
             return Response({
                 'code': 400,
                 'message': '请选择要上传的文件'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # 验证文件类型
-        content_type = file.content_type
-        if file_type == 'image':
-            if content_type not in self.ALLOWED_IMAGE_TYPES:
-                return Response({
-                    'code': 400,
-                    'message': '不支持的图片格式，请上传 JPG、PNG、GIF 或 WebP 格式'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            if file.size > self.MAX_IMAGE_SIZE:
-                return Response({
-                    'code': 400,
-                    'message': '图片大小不能超过 5MB'
-                }, status=status.HTTP_400_BAD_REQUEST)
-        elif file_type == 'video':
-            if content_type not in self.ALLOWED_VIDEO_TYPES:
-                return Response({
-                    'code': 400,
-                    'message': '不支持的视频格式，请上传 MP4、WebM 或 MOV 格式'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            if file.size > self.MAX_VIDEO_SIZE:
-                return Response({
-                    'code': 400,
-                    'message': '视频大小不能超过 50MB'
-                }, status=status.HTTP_400_BAD_REQUEST)
-        else:
+        # 验证文件类型和大小
+        error = validate_upload(file_type, file.content_type, file.size)
+        if error:
             return Response({
                 'code': 400,
-                'message': '无效的文件类型'
+                'message': error
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # 生成文件名和路径
-        ext = os.path.splitext(file.name)[1].lower()
-        date_path = datetime.now().strftime('%Y/%m')
-        filename = f'{uuid.uuid4().hex}{ext}'
-        
-        # 根据文件类型选择存储目录
-        if file_type == 'image':
-            relative_path = f'images/{date_path}/{filename}'
-        else:
-            relative_path = f'videos/{date_path}/{filename}'
-        
-        full_path = os.path.join(settings.MEDIA_ROOT, relative_path)
-        
-        # 创建目录
-        os.makedirs(os.path.dirname(full_path), exist_ok=True)
-        
-        # 保存文件
-        with open(full_path, 'wb+') as destination:
-            for chunk in file.chunks():
-                destination.write(chunk)
-        
-        # 返回文件 URL
-        file_url = f'{settings.MEDIA_URL}{relative_path}'
-        
+        data, error = process_upload(file, file_type)
+        if error:
+            return Response({
+                'code': 400,
+                'message': error
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        metrics.inc('upload_bytes_total', file.size, type=file_type)
+        metrics.observe('upload_duration_seconds', time.perf_counter() - started, type=file_type)
         return Response({
             'code': 200,
             'message': '上传成功',
-            'data': {
-                'url': file_url,
-                'filename': file.name,
-                'size': file.size,
-                'type': file_type
-            }
+            'data': data
         })
 
 
-class MultiFileUploadView(APIView):
-    """批量文件上传接口"""
+class MultiFileUploadView(StreamingValidationMixin, APIView):
+    """
+    批量文件上传接口
+    先校验全部文件的类型和大小，再在线程池中并行处理通过校验的文件，
+    整批耗时接近最慢的单个文件；结果按提交顺序返回
+    某个文件在接收过程中被拒绝时停止接收，之前已完整接收的文件照常处理
+    """
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
     
@@ -106,31 +225,36 @@ class MultiFileUploadView(APIView):
         files = request.FILES.getlist('files')
         file_type = request.data.get('type', 'image')
         
-        if not files:
+        if not files and not request.upload_errors:
             return Response({
                 'code': 400,
                 'message': '请选择要上传的文件'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # 使用单文件上传视图处理每个文件
-        upload_view = FileUploadView()
+        # 先校验全部文件，只处理通过校验的文件
+        outcomes = [None] * len(files)
+        futures = []
+        executor = _get_upload_executor()
+        for i, file in enumerate(files):
+            error = validate_upload(file_type, file.content_type, file.size)
+            if error:
+                outcomes[i] = (None, error)
+            else:
+                futures.append((i, executor.submit(_process_upload_in_thread, file, file_type)))
+        for i, future in futures:
+            outcomes[i] = future.result()
+
         results = []
         errors = []
-        
-        for file in files:
-            # 模拟单文件请求
-            request._request.FILES['file'] = file
-            request._data = {'type': file_type}
-            
-            # 验证和保存
-            response = upload_view.post(request)
-            if response.status_code == 200:
-                results.append(response.data['data'])
-            else:
+        for file, (data, error) in zip(files, outcomes):
+            if error:
                 errors.append({
                     'filename': file.name,
-                    'error': response.data['message']
+                    'error': error
                 })
+            else:
+                results.append(data)
+        errors.extend(request.upload_errors)
         
         return Response({
             'code': 200,
@@ -141,3 +265,308 @@ class MultiFileUploadView(APIView):
             }
         })
 
+
+
+SHA256_RE = re.compile(r'^[0-9a-fA-F]{64}$')
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+def session_data(session, received=None):
+    """上传会话的进度信息"""
+    if session.status == 1:
+        received = range(session.total_chunks)
+    elif received is None:
+        received = list(session.chunks.order_by('index').values_list('index', flat=True))
+    received_set = set(received)
+    received_bytes = sum(session.chunk_range(index)[1] for index in received_set)
+    return {
+        'upload_id': str(session.id),
+        'filename': session.filename,
+        'size': session.size,
+        'type': session.file_type,
+        'chunk_size': session.chunk_size,
+        'total_chunks': session.total_chunks,
+        'received_chunks': len(received_set),
+        'received_bytes': received_bytes,
+        'missing_chunks': [i for i in range(session.total_chunks) if i not in received_set],
+        'status': session.status,
+        'expires_at': session.expires_at,
+    }
+
+
+def uploaded_file_data(session):
+    """上传完成后的返回数据（与 FileUploadView 一致）"""
+    variants = post_process(session.relative_path, session.file_type)
+    return {
+        'url': session.url,
+        'filename': session.filename,
+        'size': session.size,
+        'type': session.file_type,
+        'variants': variants
+    }
+
+
+def get_upload_session(request, pk):
+    """当前用户未过期的上传会话，不存在时返回 None"""
+    return UploadSession.objects.filter(
+        pk=pk, user=request.user, expires_at__gt=timezone.now()
+    ).first()
+
+
+def session_not_found():
+    return Response({
+        'code': 404,
+        'message': '上传会话不存在或已过期'
+    }, status=status.HTTP_404_NOT_FOUND)
+
+
+class UploadSessionCreateView(APIView):
+    """
+    创建分块上传会话
+    请求：{filename, size, type, content_type, sha256（可选，也可在完成时提交）}
+    之后按返回的 chunk_size 分块 PUT 到 sessions/<upload_id>/chunks/<序号>/，
+    全部上传后 POST sessions/<upload_id>/complete/ 校验并生成文件
+    相同内容已存储时只需上传部分分块即可完成，见 UploadSessionCompleteView
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        filename = str(request.data.get('filename', ''))[:255]
+        file_type = request.data.get('type', 'image')
+        content_type = request.data.get('content_type', '')
+        sha256 = request.data.get('sha256', '') or ''
+        try:
+            size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            size = 0
+
+        if not filename or size <= 0:
+            return Response({
+                'code': 400,
+                'message': '请提供文件名和文件大小'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        error = validate_upload(file_type, content_type, size)
+        if error:
+            return Response({
+                'code': 400,
+                'message': error
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if sha256 and not SHA256_RE.match(sha256):
+            return Response({
+                'code': 400,
+                'message': 'sha256 格式错误'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        ttl = getattr(settings, 'UPLOAD_SESSION_TTL', 24 * 3600)
+        session = UploadSession.objects.create(
+            user=request.user,
+            file_type=file_type,
+            filename=filename,
+            content_type=content_type,
+            size=size,
+            chunk_size=getattr(settings, 'UPLOAD_CHUNK_SIZE', 1024 * 1024),
+            sha256=sha256.lower(),
+            relative_path=upload_path(file_type, filename),
+            expires_at=timezone.now() + timedelta(seconds=ttl),
+        )
+
+        os.makedirs(os.path.dirname(session.part_path), exist_ok=True)
+        return Response({
+            'code': 201,
+            'message': '上传会话已创建',
+            'data': session_data(session, received=[])
+        }, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailView(APIView):
+    """查询上传进度（断线重连后据此补传 missing_chunks） & 取消上传"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        session = get_upload_session(request, pk)
+        if session is None:
+            return session_not_found()
+        data = session_data(session)
+        if session.status == 1:
+            data['url'] = session.url
+        return Response({
+            'code': 200,
+            'message': 'success',
+            'data': data
+        })
+
+    def delete(self, request, pk):
+        session = get_upload_session(request, pk)
+        if session is None:
+            return session_not_found()
+        if session.status == 0:
+            try:
+                os.remove(session.part_path)
+            except OSError:
+                pass
+        session.delete()
+        return Response({
+            'code': 200,
+            'message': '上传已取消'
+        })
+
+
+class UploadChunkView(APIView):
+    """
+    上传第 index 块（请求体为原始字节，Content-Type: application/octet-stream）
+    - Content-Length 必须等于该块长度；可选 Content-Range: bytes <起>-<止>/<总大小> 核对偏移
+    - 可选 X-Chunk-SHA256 请求头校验该块
+    - 数据按偏移直接写入存储目录，重复上传同一块会覆盖为相同内容
+    """
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, pk, index):
+        session = get_upload_session(request, pk)
+        if session is None:
+            return session_not_found()
+        if session.status != 0:
+            return Response({
+                'code': 409,
+                'message': '上传已完成'
+            }, status=status.HTTP_409_CONFLICT)
+        if index >= session.total_chunks:
+            return Response({
+                'code': 400,
+                'message': f'块序号超出范围（共 {session.total_chunks} 块）'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        offset, length = session.chunk_range(index)
+        content_range = request.META.get('HTTP_CONTENT_RANGE')
+        if content_range:
+            match = CONTENT_RANGE_RE.match(content_range.strip())
+            if not match or tuple(map(int, match.groups())) != (offset, offset + length - 1, session.size):
+                return Response({
+                    'code': 400,
+                    'message': f'Content-Range 应为 bytes {offset}-{offset + length - 1}/{session.size}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length != length:
+            return Response({
+                'code': 400,
+                'message': f'第 {index} 块长度应为 {length} 字节'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # 第一块按文件头校验格式，不符时在写入前拒绝
+        check_head = content_checker(session.file_type) if index == 0 else None
+
+        # 直接读取请求体流，不经过解析器（也不受 DATA_UPLOAD_MAX_MEMORY_SIZE 限制）
+        try:
+            write_chunk(session.part_path, offset, request.stream, length,
+                        request.META.get('HTTP_X_CHUNK_SHA256'), check_head)
+        except ChunkError as e:
+            return Response({
+                'code': 400,
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            UploadChunk.objects.create(session=session, index=index, size=length)
+        except IntegrityError:
+            pass  # 重传已接收的块
+
+        return Response({
+            'code': 200,
+            'message': '上传成功',
+            'data': session_data(session)
+        })
+
+
+def proven_blob(session, sha256, received):
+    """
+    相同内容已存储、且已上传的块与之逐字节一致时返回该 MediaBlob，否则返回 None
+    只凭 sha256 不能证明客户端持有文件（也可借此探测某文件是否存在），
+    因此至少要上传一整块（文件小于一块时为整个文件）并与已存储的内容比对
+    """
+    if sum(session.chunk_range(index)[1] for index in received) < min(session.chunk_size, session.size):
+        return None
+    blob = find_blob(sha256)
+    if blob is None or blob.size != session.size:
+        return None
+    if not ranges_equal(session.part_path, blob.full_path, [session.chunk_range(index) for index in received]):
+        return None
+    return blob if touch_blob(blob) else None
+
+
+class UploadSessionCompleteView(APIView):
+    """
+    完成上传：检查所有块已接收，校验整个文件的 SHA-256 后改名为正式文件
+    相同内容已存储时，已上传的块（至少一整块）与已存储的文件一致即可完成，不必上传其余的块
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        session = get_upload_session(request, pk)
+        if session is None:
+            return session_not_found()
+        if session.status == 1:
+            return Response({
+                'code': 200,
+                'message': '上传成功',
+                'data': uploaded_file_data(session)
+            })
+
+        sha256 = (request.data.get('sha256') or session.sha256).lower()
+        if not SHA256_RE.match(sha256):
+            return Response({
+                'code': 400,
+                'message': '请提供文件的 sha256'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        received = list(session.chunks.order_by('index').values_list('index', flat=True))
+        data = session_data(session, received=received)
+        if data['missing_chunks']:
+            blob = proven_blob(session, sha256, received)
+            if blob is None:
+                return Response({
+                    'code': 400,
+                    'message': f'还有 {len(data["missing_chunks"])} 块未上传',
+                    'data': data
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if UploadSession.objects.filter(pk=session.pk, status=0).update(
+                status=1, sha256=sha256, relative_path=blob.relative_path
+            ):
+                os.remove(session.part_path)
+                session.chunks.all().delete()
+            session.refresh_from_db()
+            return Response({
+                'code': 200,
+                'message': '上传成功',
+                'data': uploaded_file_data(session)
+            })
+
+        if file_sha256(session.part_path) != sha256:
+            # 无法判断是哪一块出错，清空进度重新上传
+            session.chunks.all().delete()
+            return Response({
+                'code': 400,
+                'message': '文件校验失败，请重新上传'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # 并发完成时只有一个请求处理文件；相同内容已存储时丢弃本次上传的数据
+        if UploadSession.objects.filter(pk=session.pk, status=0).update(status=1, sha256=sha256):
+            with open(session.part_path, 'rb') as f:
+                ext = sniff_extension(f.read(SNIFF_LENGTH))
+            # 视频先改写为 faststart（大小不变），按改写后的内容存储
+            digest = sha256
+            if session.file_type == 'video' and faststart_file(session.part_path):
+                digest = file_sha256(session.part_path)
+            blob = adopt_file(session.part_path, session.file_type, digest, ext, session.size)
+            session.relative_path = blob.relative_path
+            session.save(update_fields=['relative_path'])
+            session.chunks.all().delete()
+        else:
+            session.refresh_from_db()
+
+        return Response({
+            'code': 200,
+            'message': '上传成功',
+            'data': uploaded_file_data(session)
+        })
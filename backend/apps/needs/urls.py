@@ -1,6 +1,13 @@
 from django.urls import path
 from .views import NeedListCreateView, NeedDetailView, MyNeedListView, AdminNeedListView, AdminNeedDetailView, AdminNeedResponsesView
-from .upload_views import FileUploadView, MultiFileUploadView
+from .upload_views import (
+    FileUploadView,
+    MultiFileUploadView,
+    UploadSessionCreateView,
+    UploadSessionDetailView,
+    UploadChunkView,
+    UploadSessionCompleteView,
+)
 
 urlpatterns = [
     path('', NeedListCreateView.as_view(), name='need-list'),
@@ -8,6 +15,11 @@ urlpatterns = [
     path('my/', MyNeedListView.as_view(), name='my-needs'),
     path('upload/', FileUploadView.as_view(), name='file-upload'),
     path('upload/multi/', MultiFileUploadView.as_view(), name='multi-file-upload'),
+    # 分块上传（断点续传）
+    path('upload/sessions/', UploadSessionCreateView.as_view(), name='upload-session-create'),
+    path('upload/sessions/<uuid:pk>/', UploadSessionDetailView.as_view(), name='upload-session-detail'),
+    path('upload/sessions/<uuid:pk>/chunks/<int:index>/', UploadChunkView.as_view(), name='upload-chunk'),
+    path('upload/sessions/<uuid:pk>/complete/', UploadSessionCompleteView.as_view(), name='upload-session-complete'),
     # 管理员需求管理
     path('admin/', AdminNeedListView.as_view(), name='admin-need-list'),
     path('admin/<int:pk>/', AdminNeedDetailView.as_view(), name='admin-need-detail'),
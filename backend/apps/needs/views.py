@@ -3,10 +3,11 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db.models import Q, Count
+from django.contrib.auth import get_user_model
 
 from .models import Need
+from apps.responses.models import Response as ServiceResponse
 from .serializers import (
     NeedListSerializer,
     NeedDetailSerializer,
@@ -16,15 +17,24 @@ from .serializers import (
     AdminNeedUpdateSerializer,
     NeedResponseSerializer,
 )
+from apps.search.engine import need_index, highlight
+from apps.search.filters import FullTextSearchFilter, RelevanceOrderingFilter
+from apps.common.pagination import paginate, InvalidCursor
+from apps.users.authentication import ClaimsJWTAuthentication
+
+User = get_user_model()
 
 
 class NeedListCreateView(generics.ListCreateAPIView):
     """需求列表 & 创建"""
+    # 列表只按令牌声明认证，不查询用户表；创建需求时加载完整用户
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['service_type', 'region', 'status']
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RelevanceOrderingFilter]
+    filterset_fields = ['service_type', 'region', 'status', 'total_response_count']
     search_fields = ['title', 'description']
-    ordering_fields = ['created_at', 'updated_at']
+    search_index = need_index
+    ordering_fields = ['created_at', 'updated_at', 'pending_response_count', 'total_response_count']
     ordering = ['-created_at']
     
     def get_queryset(self):
@@ -34,6 +44,12 @@ class NeedListCreateView(generics.ListCreateAPIView):
         if self.request.method == 'POST':
             return NeedCreateSerializer
         return NeedListSerializer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.query_params.get('highlight', '').lower() in ('1', 'true'):
+            context['highlight_query'] = self.request.query_params.get('search', '')
+        return context
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -142,20 +158,22 @@ class AdminNeedListView(APIView):
         region_id = request.query_params.get('region_id', '')
         status_filter = request.query_params.get('status', '')
         user_id = request.query_params.get('user_id', '')
+        show_highlight = request.query_params.get('highlight', '').lower() in ('1', 'true')
+        has_responses = request.query_params.get('has_responses', '')
         ordering = request.query_params.get('ordering', 'id')
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 10))
 
         # 查询需求列表
-        queryset = Need.objects.select_related('user', 'region').prefetch_related('responses')
+        queryset = Need.objects.select_related('user', 'region')
 
-        # 搜索过滤
+        # 搜索过滤（标题/描述走全文索引，发布者只扫描用户表）
         if search:
+            matched_users = User.objects.filter(
+                Q(username__icontains=search) |
+                Q(full_name__icontains=search)
+            ).values('id')
             queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search) |
-                Q(user__username__icontains=search) |
-                Q(user__full_name__icontains=search)
+                need_index.filter_q(search) |
+                Q(user__in=matched_users)
             )
 
         # 服务类型过滤
@@ -174,27 +192,44 @@ class AdminNeedListView(APIView):
         if user_id:
             queryset = queryset.filter(user_id=user_id)
 
-        # 排序
-        if ordering:
+        # 是否已有响应
+        if has_responses != '':
+            if has_responses.lower() == 'true':
+                queryset = queryset.filter(total_response_count__gt=0)
+            else:
+                queryset = queryset.filter(total_response_count=0)
+
+        # 排序（ordering=relevance 时按搜索相关度）
+        rank = need_index.rank_expression(search) if search and ordering == 'relevance' else None
+        if rank is not None:
+            queryset = queryset.annotate(search_rank=rank).order_by('search_rank', '-id')
+        elif ordering and ordering != 'relevance':
             queryset = queryset.order_by(ordering)
 
-        # 分页
-        total = queryset.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        needs = queryset[start:end]
+        # 分页（携带 cursor 参数时使用游标分页）
+        try:
+            needs, page_meta = paginate(request, queryset, count_depends_on=[User, ServiceResponse])
+        except InvalidCursor as e:
+            return Response({
+                'code': 400,
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = AdminNeedSerializer(needs, many=True)
+        results = serializer.data
+        if search and show_highlight:
+            for item, need in zip(results, needs):
+                item['highlight'] = {
+                    'title': highlight(need.title, search, context=0),
+                    'description': highlight(need.description, search),
+                }
 
         return Response({
             'code': 200,
             'message': 'success',
             'data': {
-                'results': serializer.data,
-                'total': total,
-                'page': page,
-                'page_size': page_size,
-                'total_pages': (total + page_size - 1) // page_size,
+                'results': results,
+                **page_meta,
             }
         })
 
@@ -0,0 +1,117 @@
+"""按需分析线上请求（栈采样，见 sampler.py），不需要重启服务
+
+两种触发方式：
+- 签名令牌：管理员通过 POST /api/profiles/token/ 获取令牌（有效期 PROFILE_TOKEN_MAX_AGE 秒），
+  放在请求头 X-Profile 或查询参数 _profile 中，该请求即被分析；令牌由 SECRET_KEY 签名，无法伪造
+- 按比例采样：管理员通过 PUT /api/profiles/sampling/ 设置 /api/ 请求的采样比例和持续时间，
+  各进程每 PROFILE_SAMPLING_REFRESH 秒读取一次设置
+
+每次分析的结果连同 URL、用户、状态码、耗时、SQL 查询数保存为 RequestProfile，
+最多保留 PROFILE_MAX_STORED 条（删除最早的）。
+"""
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .models import ProfileSampling, RequestProfile
+from .sampler import format_collapsed, sampler
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = 'apps.profiling'
+
+# 不参与按比例采样的路径（分析接口本身、指标接口）
+SAMPLING_EXCLUDED = ('/api/profiles/', '/api/_metrics')
+
+
+def make_token(user):
+    """生成分析令牌（记录签发的管理员）"""
+    return signing.dumps({'by': user.pk}, salt=TOKEN_SALT)
+
+
+def token_valid(token):
+    try:
+        signing.loads(token, salt=TOKEN_SALT, max_age=getattr(settings, 'PROFILE_TOKEN_MAX_AGE', 600))
+    except signing.BadSignature:  # 包括已过期
+        return False
+    return True
+
+
+class ProfilingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._rate = 0
+        self._next_refresh = 0
+
+    def sample_rate(self):
+        """当前的采样比例（%），定期从数据库刷新"""
+        now = time.monotonic()
+        if now >= self._next_refresh:
+            self._next_refresh = now + getattr(settings, 'PROFILE_SAMPLING_REFRESH', 5)
+            self._rate = ProfileSampling.objects.filter(
+                expires_at__gt=timezone.now()
+            ).values_list('rate', flat=True).first() or 0
+        return self._rate
+
+    def trigger(self, request):
+        token = request.META.get('HTTP_X_PROFILE') or request.GET.get('_profile')
+        if token:
+            return 'token' if token_valid(token) else None
+        if not request.path.startswith('/api/') or request.path.startswith(SAMPLING_EXCLUDED):
+            return None
+        rate = self.sample_rate()
+        if rate and random.random() * 100 < rate:
+            return 'sample'
+        return None
+
+    def __call__(self, request):
+        trigger = self.trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        interval = getattr(settings, 'PROFILE_SAMPLE_INTERVAL_MS', 5) / 1000
+        started = time.perf_counter()
+        sampler.start(interval)
+        try:
+            response = self.get_response(request)
+        finally:
+            samples = sampler.stop()
+        duration = time.perf_counter() - started
+
+        try:
+            self.save(request, response, trigger, samples, duration, interval)
+        except DatabaseError:
+            logger.exception('保存请求分析结果失败: %s', request.path)
+        return response
+
+    def save(self, request, response, trigger, samples, duration, interval):
+        # DRF 认证后会把用户写回 HttpRequest
+        user = getattr(request, 'user', None)
+        query_stats = getattr(request, 'query_stats', None)
+        query = request.GET.copy()
+        query.pop('_profile', None)
+        match = request.resolver_match
+        profile = RequestProfile.objects.create(
+            method=request.method,
+            path=(f'{request.path}?{query.urlencode()}' if query else request.path)[:2000],
+            view=match.route[:255] if match else '',
+            user_id=user.pk if user is not None and user.is_authenticated else None,
+            status_code=response.status_code,
+            duration_ms=duration * 1000,
+            query_count=query_stats.count if query_stats is not None else None,
+            sample_count=sum(samples.values()),
+            interval_ms=interval * 1000,
+            trigger=trigger,
+            stacks=format_collapsed(samples),
+        )
+        # 只保留最近的 PROFILE_MAX_STORED 条
+        keep = getattr(settings, 'PROFILE_MAX_STORED', 500)
+        cutoff = list(RequestProfile.objects.filter(id__lte=profile.id).order_by('-id').values_list('id', flat=True)[keep:keep + 1])
+        if cutoff:
+            RequestProfile.objects.filter(id__lte=cutoff[0]).delete()
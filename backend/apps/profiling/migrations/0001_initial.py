@@ -0,0 +1,56 @@
+# Generated by Django 5.0 on 2026-10-17 11:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileSampling',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rate', models.FloatField(default=0, verbose_name='采样比例（%）')),
+                ('expires_at', models.DateTimeField(verbose_name='截止时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='设置人')),
+            ],
+            options={
+                'verbose_name': '采样设置',
+                'verbose_name_plural': '采样设置',
+                'db_table': 'profile_sampling',
+            },
+        ),
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=10, verbose_name='请求方法')),
+                ('path', models.CharField(max_length=2000, verbose_name='请求路径')),
+                ('view', models.CharField(blank=True, default='', max_length=255, verbose_name='路由')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='状态码')),
+                ('duration_ms', models.FloatField(verbose_name='耗时（毫秒）')),
+                ('query_count', models.PositiveIntegerField(blank=True, null=True, verbose_name='SQL 查询数')),
+                ('sample_count', models.PositiveIntegerField(verbose_name='采样次数')),
+                ('interval_ms', models.FloatField(verbose_name='采样间隔（毫秒）')),
+                ('trigger', models.CharField(choices=[('token', '签名令牌'), ('sample', '按比例采样')], max_length=10, verbose_name='触发方式')),
+                ('stacks', models.TextField(blank=True, verbose_name='折叠栈')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '请求性能分析',
+                'verbose_name_plural': '请求性能分析',
+                'db_table': 'request_profiles',
+                'indexes': [models.Index(fields=['view', '-id'], name='request_profiles_view_idx')],
+            },
+        ),
+    ]
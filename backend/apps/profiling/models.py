@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """一次被分析的请求，stacks 为栈采样结果（flamegraph 折叠栈格式，见 sampler.py）"""
+
+    TRIGGER_CHOICES = [
+        ('token', '签名令牌'),
+        ('sample', '按比例采样'),
+    ]
+
+    method = models.CharField(
+        max_length=10,
+        verbose_name='请求方法'
+    )
+    path = models.CharField(
+        max_length=2000,
+        verbose_name='请求路径'
+    )
+    view = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name='路由'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='用户'
+    )
+    status_code = models.PositiveSmallIntegerField(
+        verbose_name='状态码'
+    )
+    duration_ms = models.FloatField(
+        verbose_name='耗时（毫秒）'
+    )
+    query_count = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='SQL 查询数'
+    )
+    sample_count = models.PositiveIntegerField(
+        verbose_name='采样次数'
+    )
+    interval_ms = models.FloatField(
+        verbose_name='采样间隔（毫秒）'
+    )
+    trigger = models.CharField(
+        max_length=10,
+        choices=TRIGGER_CHOICES,
+        verbose_name='触发方式'
+    )
+    stacks = models.TextField(
+        blank=True,
+        verbose_name='折叠栈'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='创建时间'
+    )
+
+    class Meta:
+        db_table = 'request_profiles'
+        verbose_name = '请求性能分析'
+        verbose_name_plural = '请求性能分析'
+        indexes = [
+            models.Index(fields=['view', '-id'], name='request_profiles_view_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.method} {self.path} ({self.duration_ms:.0f} ms)'
+
+
+class ProfileSampling(models.Model):
+    """按比例采样的设置（只有一行，过期后停止采样）"""
+
+    rate = models.FloatField(
+        default=0,
+        verbose_name='采样比例（%）'
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='截止时间'
+    )
+    updated_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='设置人'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='更新时间'
+    )
+
+    class Meta:
+        db_table = 'profile_sampling'
+        verbose_name = '采样设置'
+        verbose_name_plural = '采样设置'
@@ -0,0 +1,101 @@
+"""请求线程的栈采样
+
+一个后台线程每隔 interval 秒读取所有被分析线程的当前调用栈（sys._current_frames），
+按完全相同的调用栈计数。结果为 flamegraph 折叠栈格式，每行 “根帧;…;叶帧 次数”，
+可直接交给 flamegraph.pl、speedscope、inferno 等工具。
+采样线程只在有请求被分析时运行，未被分析的请求没有额外开销。
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+
+
+@lru_cache(maxsize=4096)
+def short_path(filename):
+    """去掉项目目录或 sys.path 中最长的前缀"""
+    prefixes = sorted({str(settings.BASE_DIR), *[p for p in sys.path if p]}, key=len, reverse=True)
+    for prefix in prefixes:
+        prefix = os.path.join(prefix, '')
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+def collapse(frame):
+    """调用栈（从根到叶）的折叠表示"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({short_path(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    names.reverse()
+    return ';'.join(names)
+
+
+class StackSampler:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._targets = {}  # 线程ID -> {折叠栈: 次数}
+        self._interval = 0.005
+        self._thread = None
+
+    def start(self, interval):
+        """开始每隔 interval 秒采样当前线程（同时分析多个线程时以最后一次设置的间隔为准）"""
+        with self._lock:
+            self._targets[threading.get_ident()] = Counter()
+            self._interval = interval
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """停止采样当前线程，返回 {折叠栈: 次数}"""
+        with self._lock:
+            return self._targets.pop(threading.get_ident(), Counter())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._targets:
+                    self._thread = None
+                    return
+                frames = sys._current_frames()
+                for ident, samples in self._targets.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        samples[collapse(frame)] += 1
+                interval = self._interval
+            del frames
+            time.sleep(interval)
+
+
+sampler = StackSampler()
+
+
+def format_collapsed(samples):
+    return ''.join(f'{stack} {count}\n' for stack, count in samples.most_common())
+
+
+def summarize(stacks, limit=20):
+    """按函数统计折叠栈：self 为位于栈顶的次数，total 为出现在栈中的次数"""
+    self_counts = Counter()
+    total_counts = Counter()
+    for line in stacks.splitlines():
+        stack, _, count = line.rpartition(' ')
+        if not stack:
+            continue
+        count = int(count)
+        frames = stack.split(';')
+        self_counts[frames[-1]] += count
+        for frame in set(frames):
+            total_counts[frame] += count
+    return [
+        {'frame': frame, 'self': self_counts[frame], 'total': total}
+        for frame, total in sorted(total_counts.items(), key=lambda item: (-self_counts[item[0]], -item[1]))[:limit]
+    ]
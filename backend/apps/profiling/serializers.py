@@ -0,0 +1,23 @@
+from rest_framework import serializers
+
+from .models import RequestProfile
+
+
+class RequestProfileSerializer(serializers.ModelSerializer):
+    """请求分析记录（不含折叠栈）"""
+
+    username = serializers.CharField(source='user.username', read_only=True, default=None)
+
+    class Meta:
+        model = RequestProfile
+        fields = [
+            'id', 'method', 'path', 'view', 'user', 'username', 'status_code', 'duration_ms',
+            'query_count', 'sample_count', 'interval_ms', 'trigger', 'created_at',
+        ]
+
+
+class ProfileSamplingSerializer(serializers.Serializer):
+    """设置按比例采样"""
+
+    rate = serializers.FloatField(min_value=0, max_value=100)
+    duration = serializers.IntegerField(min_value=1, max_value=24 * 3600, default=600)
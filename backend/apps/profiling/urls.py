@@ -0,0 +1,17 @@
+from django.urls import path
+from .views import (
+    ProfileListView,
+    ProfileDetailView,
+    ProfileCollapsedView,
+    ProfileTokenView,
+    ProfileSamplingView,
+)
+
+urlpatterns = [
+    # 管理员接口
+    path('', ProfileListView.as_view(), name='profile-list'),
+    path('<int:pk>/', ProfileDetailView.as_view(), name='profile-detail'),
+    path('<int:pk>/collapsed/', ProfileCollapsedView.as_view(), name='profile-collapsed'),
+    path('token/', ProfileTokenView.as_view(), name='profile-token'),
+    path('sampling/', ProfileSamplingView.as_view(), name='profile-sampling'),
+]
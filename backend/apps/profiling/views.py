@@ -0,0 +1,170 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from apps.common.pagination import paginate, InvalidCursor
+
+from .middleware import make_token
+from .models import ProfileSampling, RequestProfile
+from .sampler import summarize
+from .serializers import ProfileSamplingSerializer, RequestProfileSerializer
+
+
+def forbidden():
+    return Response({
+        'code': 403,
+        'message': '仅管理员可访问'
+    }, status=403)
+
+
+def not_found():
+    return Response({
+        'code': 404,
+        'message': '分析记录不存在'
+    }, status=status.HTTP_404_NOT_FOUND)
+
+
+class ProfileListView(APIView):
+    """管理员 - 请求分析记录列表（可按路由 view、路径 path 筛选）"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if request.user.user_type != 'admin':
+            return forbidden()
+
+        queryset = RequestProfile.objects.select_related('user').defer('stacks').order_by('-id')
+        view = request.query_params.get('view', '')
+        path = request.query_params.get('path', '')
+        if view:
+            queryset = queryset.filter(view=view)
+        if path:
+            queryset = queryset.filter(path__startswith=path)
+
+        try:
+            profiles, page_meta = paginate(request, queryset)
+        except InvalidCursor as e:
+            return Response({
+                'code': 400,
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'code': 200,
+            'message': 'success',
+            'data': {
+                'results': RequestProfileSerializer(profiles, many=True).data,
+                **page_meta,
+            }
+        })
+
+
+class ProfileDetailView(APIView):
+    """管理员 - 请求分析详情（按函数汇总的采样次数）/删除"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        if request.user.user_type != 'admin':
+            return forbidden()
+        profile = RequestProfile.objects.select_related('user').filter(pk=pk).first()
+        if not profile:
+            return not_found()
+
+        data = RequestProfileSerializer(profile).data
+        data['top_functions'] = summarize(profile.stacks)
+        return Response({
+            'code': 200,
+            'message': 'success',
+            'data': data
+        })
+
+    def delete(self, request, pk):
+        if request.user.user_type != 'admin':
+            return forbidden()
+        deleted, _ = RequestProfile.objects.filter(pk=pk).delete()
+        if not deleted:
+            return not_found()
+        return Response({
+            'code': 200,
+            'message': '删除成功'
+        })
+
+
+class ProfileCollapsedView(APIView):
+    """管理员 - 下载折叠栈文件（flamegraph.pl、speedscope 等可直接打开）"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        if request.user.user_type != 'admin':
+            return forbidden()
+        stacks = RequestProfile.objects.filter(pk=pk).values_list('stacks', flat=True).first()
+        if stacks is None:
+            return not_found()
+        response = HttpResponse(stacks, content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="profile-{pk}.collapsed"'
+        return response
+
+
+class ProfileTokenView(APIView):
+    """管理员 - 获取分析令牌，放在请求头 X-Profile 或查询参数 _profile 中的请求会被分析"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.user.user_type != 'admin':
+            return forbidden()
+        return Response({
+            'code': 200,
+            'message': 'success',
+            'data': {
+                'token': make_token(request.user),
+                'expires_in': getattr(settings, 'PROFILE_TOKEN_MAX_AGE', 600),
+            }
+        })
+
+
+class ProfileSamplingView(APIView):
+    """管理员 - 查看/设置按比例采样（rate 为 /api/ 请求的百分比，duration 秒后自动停止）"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if request.user.user_type != 'admin':
+            return forbidden()
+        sampling = ProfileSampling.objects.filter(expires_at__gt=timezone.now()).first()
+        return Response({
+            'code': 200,
+            'message': 'success',
+            'data': {
+                'rate': sampling.rate if sampling else 0,
+                'expires_at': sampling.expires_at if sampling else None,
+            }
+        })
+
+    def put(self, request):
+        if request.user.user_type != 'admin':
+            return forbidden()
+        serializer = ProfileSamplingSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                'code': 400,
+                'message': '参数错误',
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        expires_at = timezone.now() + timedelta(seconds=serializer.validated_data['duration'])
+        ProfileSampling.objects.update_or_create(pk=1, defaults={
+            'rate': serializer.validated_data['rate'],
+            'expires_at': expires_at,
+            'updated_by_id': request.user.pk,
+        })
+        return Response({
+            'code': 200,
+            'message': '设置成功（各进程最多 %d 秒后生效）' % getattr(settings, 'PROFILE_SAMPLING_REFRESH', 5),
+            'data': {
+                'rate': serializer.validated_data['rate'],
+                'expires_at': expires_at,
+            }
+        })
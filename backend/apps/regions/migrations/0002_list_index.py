@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-17 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('regions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='region',
+            index=models.Index(fields=['province', 'city', 'name'], name='regions_province_city_name_idx'),
+        ),
+    ]
@@ -28,6 +28,10 @@ class Region(models.Model):
         db_table = 'regions'
         verbose_name = '地域'
         verbose_name_plural = '地域'
+        indexes = [
+            # 地域列表按省/市筛选并按省、市、区排序
+            models.Index(fields=['province', 'city', 'name'], name='regions_province_city_name_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         # 自动生成完整名称
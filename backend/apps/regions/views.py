@@ -4,6 +4,8 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.db.models import Count
 from .models import Region
+from apps.users.authentication import ClaimsJWTAuthentication
+from apps.common.pagination import paginate, InvalidCursor
 from .serializers import RegionSerializer
 
 
@@ -11,6 +13,7 @@ class RegionListView(generics.ListAPIView):
     """获取地域列表"""
     queryset = Region.objects.all()
     serializer_class = RegionSerializer
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -30,6 +33,7 @@ class RegionDetailView(generics.RetrieveAPIView):
     """获取地域详情"""
     queryset = Region.objects.all()
     serializer_class = RegionSerializer
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
 
@@ -68,14 +72,14 @@ class AdminRegionListView(APIView):
                 name__icontains=search
             )
 
-        # 分页
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 20))
-        total = queryset.count()
-
-        start = (page - 1) * page_size
-        end = start + page_size
-        regions = queryset[start:end]
+        # 分页（携带 cursor 参数时使用游标分页）
+        try:
+            regions, page_meta = paginate(request, queryset, default_page_size=20)
+        except InvalidCursor as e:
+            return Response({
+                'code': 400,
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
 
         data = []
         for region in regions:
@@ -93,10 +97,7 @@ class AdminRegionListView(APIView):
             'message': 'success',
             'data': {
                 'results': data,
-                'total': total,
-                'page': page,
-                'page_size': page_size,
-                'total_pages': (total + page_size - 1) // page_size,
+                **page_meta,
             }
         })
 
@@ -0,0 +1,29 @@
+# Generated by Django 5.0 on 2026-10-17 10:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('needs', '0003_hot_query_indexes'),
+        ('regions', '0001_initial'),
+        ('responses', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='acceptedmatch',
+            index=models.Index(fields=['accepted_date', 'region', 'service_type'], name='matches_date_region_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['need', 'status'], name='responses_need_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='response',
+            index=models.Index(fields=['user', 'status'], name='responses_user_status_idx'),
+        ),
+    ]
@@ -2,6 +2,14 @@ from django.db import models
 from django.conf import settings
 
 
+class ResponseQuerySet(models.QuerySet):
+    """响应查询集"""
+
+    def with_need(self):
+        """连表取出关联需求及其发布者、地域（响应计数为需求表冗余列），嵌套序列化需求时不再逐行查询"""
+        return self.select_related('need', 'need__user', 'need__region')
+
+
 class Response(models.Model):
     """响应表 - "我服务" """
     
@@ -50,12 +58,20 @@ class Response(models.Model):
         auto_now=True,
         verbose_name='更新时间'
     )
+
+    objects = ResponseQuerySet.as_manager()
     
     class Meta:
         db_table = 'responses'
         verbose_name = '服务响应'
         verbose_name_plural = '服务响应'
         ordering = ['-created_at']
+        indexes = [
+            # 需求的响应列表、重复响应校验
+            models.Index(fields=['need', 'status'], name='responses_need_status_idx'),
+            # 我的响应 / 已被接受的响应
+            models.Index(fields=['user', 'status'], name='responses_user_status_idx'),
+        ]
     
     def __str__(self):
         return f'{self.user.username} 响应 [{self.need.title}]'
@@ -120,6 +136,10 @@ class AcceptedMatch(models.Model):
         db_table = 'accepted_matches'
         verbose_name = '响应成功明细'
         verbose_name_plural = '响应成功明细'
+        indexes = [
+            # 统计：按接受日期范围 + 地域 + 服务类型聚合
+            models.Index(fields=['accepted_date', 'region', 'service_type'], name='matches_date_region_type_idx'),
+        ]
     
     def __str__(self):
         return f'{self.need.title} - {self.response_user.username}'
@@ -1,19 +1,22 @@
 from rest_framework import serializers
+from django.db import transaction
 from .models import Response as ServiceResponse, AcceptedMatch
 from apps.users.serializers import UserSerializer
 from apps.needs.serializers import NeedListSerializer
+from apps.media.variants import ImageVariantsField
 
 
 class ResponseListSerializer(serializers.ModelSerializer):
     """响应列表序列化器"""
     user = UserSerializer(read_only=True)
     need = NeedListSerializer(read_only=True)  # 返回完整的需求对象
+    variants = ImageVariantsField(source='images')
     
     class Meta:
         model = ServiceResponse
         fields = [
             'id', 'need', 'user',
-            'description', 'images', 'videos', 'status',
+            'description', 'images', 'variants', 'videos', 'status',
             'created_at', 'updated_at'
         ]
 
@@ -25,11 +28,12 @@ class ResponseDetailSerializer(serializers.ModelSerializer):
     can_edit = serializers.ReadOnlyField()
     can_delete = serializers.ReadOnlyField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    variants = ImageVariantsField(source='images')
     
     class Meta:
         model = ServiceResponse
         fields = [
-            'id', 'need', 'user', 'description', 'images', 'videos',
+            'id', 'need', 'user', 'description', 'images', 'variants', 'videos',
             'status', 'status_display', 'can_edit', 'can_delete',
             'created_at', 'updated_at'
         ]
@@ -60,9 +64,12 @@ class ResponseCreateSerializer(serializers.ModelSerializer):
         
         return value
     
+    @transaction.atomic
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data)
+        response_obj = super().create(validated_data)
+        response_obj.need.apply_response_transition(None, response_obj.status)
+        return response_obj
 
 
 class ResponseUpdateSerializer(serializers.ModelSerializer):
@@ -83,11 +90,12 @@ class AdminResponseSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     need = NeedListSerializer(read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    variants = ImageVariantsField(source='images')
 
     class Meta:
         model = ServiceResponse
         fields = [
-            'id', 'need', 'user', 'description', 'images', 'videos',
+            'id', 'need', 'user', 'description', 'images', 'variants', 'videos',
             'status', 'status_display', 'created_at', 'updated_at'
         ]
 
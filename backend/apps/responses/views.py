@@ -7,6 +7,7 @@ from django.db import transaction
 
 from .models import Response as ServiceResponse, AcceptedMatch
 from django.db.models import Q
+from django.contrib.auth import get_user_model
 from .serializers import (
     ResponseListSerializer,
     ResponseDetailSerializer,
@@ -15,6 +16,11 @@ from .serializers import (
     AdminResponseSerializer,
     AdminResponseUpdateSerializer,
 )
+from apps.search.engine import need_index, response_index, highlight
+from apps.common.pagination import paginate, InvalidCursor
+from apps.needs.models import Need
+
+User = get_user_model()
 
 
 class ResponseListCreateView(generics.ListCreateAPIView):
@@ -22,7 +28,7 @@ class ResponseListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return ServiceResponse.objects.select_related('user', 'need')
+        return ServiceResponse.objects.select_related('user').with_need()
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -48,7 +54,7 @@ class ResponseListCreateView(generics.ListCreateAPIView):
 class ResponseDetailView(generics.RetrieveUpdateDestroyAPIView):
     """响应详情 & 修改 & 删除"""
     permission_classes = [IsAuthenticated]
-    queryset = ServiceResponse.objects.select_related('user', 'need')
+    queryset = ServiceResponse.objects.select_related('user').with_need()
     
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
@@ -99,8 +105,10 @@ class ResponseDetailView(generics.RetrieveUpdateDestroyAPIView):
                 'message': '该响应已被处理，无法删除'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        instance.status = 3  # 已取消
-        instance.save()
+        with transaction.atomic():
+            instance.status = 3  # 已取消
+            instance.save()
+            instance.need.apply_response_transition(0, 3)
         return Response({
             'code': 200,
             'message': '删除成功'
@@ -114,7 +122,7 @@ class MyResponseListView(generics.ListAPIView):
     
     def get_queryset(self):
         status_filter = self.request.query_params.get('status')
-        queryset = ServiceResponse.objects.filter(user=self.request.user).select_related('need')
+        queryset = ServiceResponse.objects.filter(user=self.request.user).select_related('user').with_need()
         if status_filter is not None:
             queryset = queryset.filter(status=status_filter)
         return queryset
@@ -129,7 +137,7 @@ class MyAcceptedResponsesView(generics.ListAPIView):
         return ServiceResponse.objects.filter(
             user=self.request.user,
             status=1
-        ).select_related('need')
+        ).select_related('user').with_need()
 
 
 class NeedResponsesView(generics.ListAPIView):
@@ -140,51 +148,54 @@ class NeedResponsesView(generics.ListAPIView):
     def get_queryset(self):
         need_id = self.kwargs.get('need_id')
         # 排除已取消的响应（status=3）
-        return ServiceResponse.objects.filter(need_id=need_id).exclude(status=3).select_related('user', 'need')
+        return ServiceResponse.objects.filter(need_id=need_id).exclude(status=3).select_related('user').with_need()
 
 
 class AcceptResponseView(APIView):
     """接受响应"""
     permission_classes = [IsAuthenticated]
     
-    @transaction.atomic
     def post(self, request, pk):
-        try:
-            response_obj = ServiceResponse.objects.select_related('need').get(pk=pk)
-        except ServiceResponse.DoesNotExist:
-            return Response({
-                'code': 404,
-                'message': '响应不存在'
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        # 验证当前用户是需求发布者
-        if response_obj.need.user != request.user:
-            return Response({
-                'code': 403,
-                'message': '只有需求发布者可以接受响应'
-            }, status=status.HTTP_403_FORBIDDEN)
-        
-        if response_obj.status != 0:
-            return Response({
-                'code': 400,
-                'message': '该响应已被处理'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # 更新响应状态
-        response_obj.status = 1
-        response_obj.save()
-        
-        # 创建成功匹配记录
-        AcceptedMatch.objects.create(
-            need=response_obj.need,
-            need_user=response_obj.need.user,
-            response=response_obj,
-            response_user=response_obj.user,
-            accepted_date=timezone.now().date(),
-            service_type=response_obj.need.service_type,
-            region=response_obj.need.region,
-        )
-        
+        # 锁定响应行，状态校验、状态写入和计数更新在同一事务中
+        with transaction.atomic():
+            try:
+                response_obj = ServiceResponse.objects.select_for_update(of=('self',)).select_related('need').get(pk=pk)
+            except ServiceResponse.DoesNotExist:
+                return Response({
+                    'code': 404,
+                    'message': '响应不存在'
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            # 验证当前用户是需求发布者
+            if response_obj.need.user != request.user:
+                return Response({
+                    'code': 403,
+                    'message': '只有需求发布者可以接受响应'
+                }, status=status.HTTP_403_FORBIDDEN)
+
+            old_status = response_obj.status
+            if old_status != 0:
+                return Response({
+                    'code': 400,
+                    'message': '该响应已被处理'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            # 更新响应状态
+            response_obj.status = 1
+            response_obj.save()
+            response_obj.need.apply_response_transition(old_status, 1)
+
+            # 创建成功匹配记录
+            AcceptedMatch.objects.create(
+                need=response_obj.need,
+                need_user=response_obj.need.user,
+                response=response_obj,
+                response_user=response_obj.user,
+                accepted_date=timezone.now().date(),
+                service_type=response_obj.need.service_type,
+                region=response_obj.need.region,
+            )
+
         return Response({
             'code': 200,
             'message': '已接受响应',
@@ -197,28 +208,32 @@ class RejectResponseView(APIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request, pk):
-        try:
-            response_obj = ServiceResponse.objects.select_related('need').get(pk=pk)
-        except ServiceResponse.DoesNotExist:
-            return Response({
-                'code': 404,
-                'message': '响应不存在'
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        if response_obj.need.user != request.user:
-            return Response({
-                'code': 403,
-                'message': '只有需求发布者可以拒绝响应'
-            }, status=status.HTTP_403_FORBIDDEN)
-        
-        if response_obj.status != 0:
-            return Response({
-                'code': 400,
-                'message': '该响应已被处理'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        response_obj.status = 2
-        response_obj.save()
+        # 锁定响应行，状态校验、状态写入和计数更新在同一事务中
+        with transaction.atomic():
+            try:
+                response_obj = ServiceResponse.objects.select_for_update(of=('self',)).select_related('need').get(pk=pk)
+            except ServiceResponse.DoesNotExist:
+                return Response({
+                    'code': 404,
+                    'message': '响应不存在'
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            if response_obj.need.user != request.user:
+                return Response({
+                    'code': 403,
+                    'message': '只有需求发布者可以拒绝响应'
+                }, status=status.HTTP_403_FORBIDDEN)
+
+            old_status = response_obj.status
+            if old_status != 0:
+                return Response({
+                    'code': 400,
+                    'message': '该响应已被处理'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            response_obj.status = 2
+            response_obj.save()
+            response_obj.need.apply_response_transition(old_status, 2)
 
         return Response({
             'code': 200,
@@ -244,20 +259,22 @@ class AdminResponseListView(APIView):
         status_filter = request.query_params.get('status', '')
         need_id = request.query_params.get('need_id', '')
         user_id = request.query_params.get('user_id', '')
+        show_highlight = request.query_params.get('highlight', '').lower() in ('1', 'true')
         ordering = request.query_params.get('ordering', 'id')
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 10))
 
         # 查询响应列表
-        queryset = ServiceResponse.objects.select_related('user', 'need', 'need__user', 'need__region')
+        queryset = ServiceResponse.objects.select_related('user').with_need()
 
-        # 搜索过滤
+        # 搜索过滤（描述/需求标题走全文索引，响应者只扫描用户表）
         if search:
+            matched_users = User.objects.filter(
+                Q(username__icontains=search) |
+                Q(full_name__icontains=search)
+            ).values('id')
             queryset = queryset.filter(
-                Q(description__icontains=search) |
-                Q(user__username__icontains=search) |
-                Q(user__full_name__icontains=search) |
-                Q(need__title__icontains=search)
+                response_index.filter_q(search) |
+                Q(user__in=matched_users) |
+                need_index.filter_q(search, prefix='need__', columns=['title'])
             )
 
         # 状态过滤
@@ -272,27 +289,37 @@ class AdminResponseListView(APIView):
         if user_id:
             queryset = queryset.filter(user_id=user_id)
 
-        # 排序
-        if ordering:
+        # 排序（ordering=relevance 时按搜索相关度）
+        rank = response_index.rank_expression(search) if search and ordering == 'relevance' else None
+        if rank is not None:
+            queryset = queryset.annotate(search_rank=rank).order_by('search_rank', '-id')
+        elif ordering and ordering != 'relevance':
             queryset = queryset.order_by(ordering)
 
-        # 分页
-        total = queryset.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        responses = queryset[start:end]
+        # 分页（携带 cursor 参数时使用游标分页）
+        try:
+            responses, page_meta = paginate(request, queryset, count_depends_on=[Need, User])
+        except InvalidCursor as e:
+            return Response({
+                'code': 400,
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = AdminResponseSerializer(responses, many=True)
+        results = serializer.data
+        if search and show_highlight:
+            for item, response_obj in zip(results, responses):
+                item['highlight'] = {
+                    'description': highlight(response_obj.description, search),
+                    'need_title': highlight(response_obj.need.title, search, context=0),
+                }
 
         return Response({
             'code': 200,
             'message': 'success',
             'data': {
-                'results': serializer.data,
-                'total': total,
-                'page': page,
-                'page_size': page_size,
-                'total_pages': (total + page_size - 1) // page_size,
+                'results': results,
+                **page_meta,
             }
         })
 
@@ -310,7 +337,7 @@ class AdminResponseDetailView(APIView):
             }, status=403)
 
         try:
-            response_obj = ServiceResponse.objects.select_related('user', 'need', 'need__user', 'need__region').get(pk=pk)
+            response_obj = ServiceResponse.objects.select_related('user').with_need().get(pk=pk)
         except ServiceResponse.DoesNotExist:
             return Response({
                 'code': 404,
@@ -342,7 +369,11 @@ class AdminResponseDetailView(APIView):
 
         serializer = AdminResponseUpdateSerializer(response_obj, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            old_status = response_obj.status
+            with transaction.atomic():
+                serializer.save()
+                if response_obj.status != old_status:
+                    response_obj.need.apply_response_transition(old_status, response_obj.status)
             response_obj.refresh_from_db()
             return Response({
                 'code': 200,
@@ -372,8 +403,12 @@ class AdminResponseDetailView(APIView):
             }, status=404)
 
         # 管理员可以强制删除（软删除，设为已取消）
-        response_obj.status = 3
-        response_obj.save()
+        old_status = response_obj.status
+        with transaction.atomic():
+            response_obj.status = 3
+            response_obj.save()
+            if old_status != 3:
+                response_obj.need.apply_response_transition(old_status, 3)
         return Response({
             'code': 200,
             'message': '删除成功'
@@ -0,0 +1,177 @@
+"""基于 SQLite FTS5 的全文检索
+
+索引表为影子表，rowid 与业务表主键一致，写入的是经过二元分词的文本（见 tokenizer）。
+非 SQLite 数据库时自动退回 icontains 查询，接口保持一致。
+"""
+import html
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+from .tokenizer import tokenize, tokenize_query
+
+
+def is_available():
+    """当前数据库是否支持 FTS5 索引"""
+    return connection.vendor == 'sqlite'
+
+
+def split_terms(query):
+    """按空白拆分查询词（与 DRF SearchFilter 一致，多个词之间为 AND）"""
+    return [term for term in (query or '').replace('\x00', '').split() if term]
+
+
+def build_match(query, columns=None):
+    """
+    构造 FTS5 MATCH 表达式，每个查询词转换为带前缀匹配的短语
+    没有可检索的词时返回 None
+    """
+    phrases = []
+    for term in split_terms(query):
+        tokens = tokenize_query(term)
+        if tokens:
+            phrase = ' '.join(tokens).replace('"', '""')
+            phrases.append(f'"{phrase}"*')
+    if not phrases:
+        return None
+    expression = ' AND '.join(phrases)
+    if columns:
+        expression = '{%s} : (%s)' % (' '.join(columns), expression)
+    return expression
+
+
+class SearchIndex:
+    """单个业务表对应的 FTS5 影子索引"""
+
+    def __init__(self, table, source_table, columns):
+        self.table = table
+        self.source_table = source_table
+        self.columns = columns
+
+    # ---------- 查询 ----------
+
+    def filter_q(self, query, prefix='', columns=None):
+        """
+        返回匹配查询词的 Q 对象
+        prefix 为关联路径，例如在响应表上按需求标题搜索时传 'need__'
+        """
+        columns = columns or self.columns
+        if not is_available():
+            return self._fallback_q(query, prefix, columns)
+        match = build_match(query, columns if columns != self.columns else None)
+        if match is None:
+            return Q()
+        return Q(**{f'{prefix}id__in': RawSQL(
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [match]
+        )})
+
+    def rank_expression(self, query):
+        """
+        相关度表达式（bm25 为负数，越小越相关），用于 annotate 后排序
+        不支持 FTS5 或没有可检索的词时返回 None
+        """
+        match = build_match(query)
+        if match is None or not is_available():
+            return None
+        # 非全文命中的行（例如按用户名匹配）rank 为 0，排在最后
+        return Coalesce(RawSQL(
+            f'SELECT rank FROM {self.table} WHERE {self.table} MATCH %s '
+            f'AND rowid = "{self.source_table}"."id"',
+            [match],
+            output_field=FloatField(),
+        ), Value(0.0))
+
+    def _fallback_q(self, query, prefix, columns):
+        condition = Q()
+        for term in split_terms(query):
+            term_q = Q()
+            for column in columns:
+                term_q |= Q(**{f'{prefix}{column}__icontains': term})
+            condition &= term_q
+        return condition
+
+    # ---------- 维护 ----------
+
+    def index(self, obj):
+        """写入或更新单条记录的索引"""
+        if not is_available():
+            return
+        values = [tokenize(getattr(obj, column)) for column in self.columns]
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [obj.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, {", ".join(self.columns)}) '
+                f'VALUES (%s, {", ".join(["%s"] * len(self.columns))})',
+                [obj.pk, *values],
+            )
+
+    def remove(self, pk):
+        """删除单条记录的索引"""
+        if not is_available():
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [pk])
+
+    def rebuild(self, batch_size=1000):
+        """清空并按业务表全量重建索引，返回写入的行数"""
+        if not is_available():
+            return 0
+        columns = ', '.join(self.columns)
+        total = 0
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            last_id = 0
+            while True:
+                cursor.execute(
+                    f'SELECT id, {columns} FROM {self.source_table} WHERE id > %s ORDER BY id LIMIT %s',
+                    [last_id, batch_size],
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                cursor.executemany(
+                    f'INSERT INTO {self.table} (rowid, {columns}) '
+                    f'VALUES (%s, {", ".join(["%s"] * len(self.columns))})',
+                    [(row[0], *[tokenize(value) for value in row[1:]]) for row in rows],
+                )
+                last_id = rows[-1][0]
+                total += len(rows)
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('optimize')")
+        return total
+
+
+need_index = SearchIndex('search_needs', 'needs', ['title', 'description'])
+response_index = SearchIndex('search_responses', 'responses', ['description'])
+
+
+def highlight(text, query, context=40, tag='mark'):
+    """
+    在原文中标记命中的查询词，返回转义后的 HTML 片段
+    文本较长时只截取首个命中位置前后 context 个字符
+    """
+    if not text:
+        return ''
+    terms = split_terms(query)
+    if not terms:
+        return html.escape(text)
+    pattern = re.compile('|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+
+    first = pattern.search(text)
+    start, end = 0, len(text)
+    if first and context and len(text) > context * 2:
+        start = max(first.start() - context, 0)
+        end = min(first.end() + context, len(text))
+
+    fragment = text[start:end]
+    parts = []
+    last = 0
+    for match in pattern.finditer(fragment):
+        parts.append(html.escape(fragment[last:match.start()]))
+        parts.append(f'<{tag}>{html.escape(match.group())}</{tag}>')
+        last = match.end()
+    parts.append(html.escape(fragment[last:]))
+
+    return ('…' if start > 0 else '') + ''.join(parts) + ('…' if end < len(text) else '')
@@ -0,0 +1,33 @@
+"""DRF 全文检索过滤器"""
+from rest_framework.filters import SearchFilter, OrderingFilter
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    使用 FTS5 索引替换 SearchFilter 的 LIKE 查询
+    视图需设置 search_index；搜索时注解 search_rank 供排序使用
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        index = getattr(view, 'search_index', None)
+        query = request.query_params.get(self.search_param, '')
+        if index is None:
+            return super().filter_queryset(request, queryset, view)
+
+        queryset = queryset.filter(index.filter_q(query))
+        rank = index.rank_expression(query)
+        if rank is not None:
+            queryset = queryset.annotate(search_rank=rank)
+        return queryset
+
+
+class RelevanceOrderingFilter(OrderingFilter):
+    """搜索时未指定排序（或 ordering=relevance）则按相关度排序"""
+
+    relevance_param = 'relevance'
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if 'search_rank' in queryset.query.annotations and params in (None, '', self.relevance_param):
+            return ['search_rank', *self.get_default_ordering(view)]
+        return super().get_ordering(request, queryset, view)
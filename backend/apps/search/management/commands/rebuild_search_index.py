@@ -0,0 +1,25 @@
+"""重建需求/响应的全文检索索引"""
+from django.core.management.base import BaseCommand
+from apps.search.engine import is_available, need_index, response_index
+
+
+class Command(BaseCommand):
+    help = '按业务表全量重建 FTS5 全文检索索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='每批读取的行数',
+        )
+
+    def handle(self, *args, **options):
+        if not is_available():
+            self.stdout.write(self.style.WARNING('当前数据库不支持 FTS5，搜索将使用 icontains 查询'))
+            return
+
+        batch_size = options['batch_size']
+        for label, index in [('需求', need_index), ('响应', response_index)]:
+            total = index.rebuild(batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f'{label}索引已重建，共 {total} 条'))
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+from apps.search.tokenizer import tokenize
+
+
+# (索引表, 业务表, 列)
+INDEXES = [
+    ('search_needs', 'needs', ['title', 'description']),
+    ('search_responses', 'responses', ['description']),
+]
+
+
+def create_indexes(apps, schema_editor):
+    # FTS5 仅在 SQLite 下可用，其他数据库由 engine 退回 icontains 查询
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, source_table, columns in INDEXES:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+                f"{', '.join(columns)}, tokenize='unicode61', prefix='1 2')"
+            )
+            cursor.execute(f"SELECT id, {', '.join(columns)} FROM {source_table}")
+            rows = cursor.fetchall()
+            cursor.executemany(
+                f"INSERT INTO {table} (rowid, {', '.join(columns)}) VALUES ({', '.join(['%s'] * (len(columns) + 1))})",
+                [(row[0], *[tokenize(value) for value in row[1:]]) for row in rows],
+            )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, _, _ in INDEXES:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('needs', '0002_response_counters'),
+        ('responses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,33 @@
+"""业务表变更时同步全文索引"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.needs.models import Need
+from apps.responses.models import Response
+from .engine import need_index, response_index
+
+
+def _touches(update_fields, columns):
+    return update_fields is None or bool(set(update_fields) & set(columns))
+
+
+@receiver(post_save, sender=Need, dispatch_uid='search_index_need')
+def index_need(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, need_index.columns):
+        need_index.index(instance)
+
+
+@receiver(post_delete, sender=Need, dispatch_uid='search_remove_need')
+def remove_need(sender, instance, **kwargs):
+    need_index.remove(instance.pk)
+
+
+@receiver(post_save, sender=Response, dispatch_uid='search_index_response')
+def index_response(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, response_index.columns):
+        response_index.index(instance)
+
+
+@receiver(post_delete, sender=Response, dispatch_uid='search_remove_response')
+def remove_response(sender, instance, **kwargs):
+    response_index.remove(instance.pk)
@@ -0,0 +1,45 @@
+"""中日韩文本二元分词（bigram）
+
+FTS5 内置的 unicode61 分词器会把一整段连续汉字当成一个词，无法做子串匹配。
+写入索引前先把连续的 CJK 字符拆成重叠的二元词，其余文本保持原样交给 unicode61 处理：
+
+    "厨房水管漏水" -> "厨房 房水 水管 管漏 漏水 水"
+
+每段末尾额外保留最后一个单字，使单字查询可以通过前缀匹配命中任意位置。
+"""
+import re
+
+CJK_RE = re.compile(
+    '[぀-ヿ'   # 日文假名
+    '㐀-䶿'    # CJK 扩展 A
+    '一-鿿'    # CJK 统一汉字
+    '가-힯'    # 韩文音节
+    '豈-﫿]+'  # CJK 兼容汉字
+)
+WORD_RE = re.compile(r'\w+')
+
+
+def _bigrams(run):
+    if len(run) == 1:
+        return run
+    return ' '.join([run[i:i + 2] for i in range(len(run) - 1)] + [run[-1]])
+
+
+def tokenize(text):
+    """将待索引文本转换为以空格分隔的分词结果"""
+    if not text:
+        return ''
+    return CJK_RE.sub(lambda m: f' {_bigrams(m.group())} ', text)
+
+
+def tokenize_query(term):
+    """
+    将单个查询词转换为 token 列表
+    查询词以汉字段结尾时去掉末尾单字，否则会要求原文中该段恰好在此结束
+    """
+    tokens = WORD_RE.findall(tokenize(term))
+    runs = CJK_RE.findall(term)
+    words = WORD_RE.findall(term)
+    if runs and words and words[-1].endswith(runs[-1]) and len(runs[-1]) > 1:
+        tokens.pop()
+    return tokens
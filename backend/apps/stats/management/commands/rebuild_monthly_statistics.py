@@ -0,0 +1,12 @@
+"""按需求和成功匹配明细全量重建月度统计汇总表"""
+from django.core.management.base import BaseCommand
+
+from apps.stats.rollup import rebuild
+
+
+class Command(BaseCommand):
+    help = '按 needs / accepted_matches 全量重建 monthly_statistics 汇总表'
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'已重建月度统计，共 {rows} 行'))
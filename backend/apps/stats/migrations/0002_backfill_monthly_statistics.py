@@ -0,0 +1,20 @@
+from django.db import migrations
+
+from apps.stats.rollup import rebuild
+
+
+def backfill(apps, schema_editor):
+    rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0001_initial'),
+        ('needs', '0003_hot_query_indexes'),
+        ('responses', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0 on 2026-10-17 10:15
+
+from django.db import migrations, models
+
+from apps.stats.rollup import rebuild
+
+
+def backfill(apps, schema_editor):
+    rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0002_backfill_monthly_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlystatistics',
+            name='cancelled_needs',
+            field=models.IntegerField(default=0, verbose_name='月累计取消需求数'),
+        ),
+        migrations.AddField(
+            model_name='monthlystatistics',
+            name='total_responses',
+            field=models.IntegerField(default=0, verbose_name='月累计响应数'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
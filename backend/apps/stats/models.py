@@ -28,6 +28,14 @@ class MonthlyStatistics(models.Model):
         default=0,
         verbose_name='月累计发布需求数'
     )
+    cancelled_needs = models.IntegerField(
+        default=0,
+        verbose_name='月累计取消需求数'
+    )
+    total_responses = models.IntegerField(
+        default=0,
+        verbose_name='月累计响应数'
+    )
     total_accepted = models.IntegerField(
         default=0,
         verbose_name='月累计响应成功数'
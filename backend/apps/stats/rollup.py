@@ -0,0 +1,171 @@
+"""月度统计汇总表（monthly_statistics）的增量维护与重建
+
+每行对应 (月份, 地域, 服务类型)：
+- total_needs: 当月发布且仍为已发布状态(0)的需求数
+- cancelled_needs: 当月发布、之后被取消(-1)的需求数
+- total_responses: 当月提交的响应数（地域、服务类型取所响应的需求）
+- total_accepted: 当月接受日期的成功匹配数
+
+需求/响应/匹配写入时由 signals 增量更新；批量导入或 queryset.update 等绕过信号的写入
+之后执行 rebuild_monthly_statistics 重建。
+"""
+from django.apps import apps as global_apps
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+# 需求状态 -> 计入的汇总列
+NEED_STATUS_MEASURES = {
+    0: 'total_needs',
+    -1: 'cancelled_needs',
+}
+MEASURE_FIELDS = ['total_needs', 'cancelled_needs', 'total_responses', 'total_accepted']
+
+
+def month_of(value):
+    """日期/时间 -> 'YYYYMM'，时间按当前时区换算（与 TruncMonth 一致）"""
+    if hasattr(value, 'hour') and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.strftime('%Y%m')
+
+
+def need_bucket(need):
+    """需求在汇总表中的归属 ((month, region_id, service_type), 汇总列)，不计入时返回 None"""
+    field = NEED_STATUS_MEASURES.get(need.status)
+    if field is None or need.created_at is None:
+        return None
+    return (month_of(need.created_at), need.region_id, need.service_type), field
+
+
+def response_key(response, need):
+    """响应在汇总表中的归属 (month, region_id, service_type)"""
+    return month_of(response.created_at), need.region_id, need.service_type
+
+
+def match_key(match):
+    """成功匹配在汇总表中的归属 (month, region_id, service_type)"""
+    return month_of(match.accepted_date), match.region_id, match.service_type
+
+
+def _region_name(region_id):
+    if region_id is None:
+        return ''
+    Region = global_apps.get_model('regions', 'Region')
+    region = Region.objects.filter(pk=region_id).only('name', 'full_name').first()
+    return str(region) if region else ''
+
+
+def bump(key, **deltas):
+    """按 key 原子累加各汇总列（deltas 为 列名=增量），行不存在时创建"""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    from .models import MonthlyStatistics
+
+    month, region_id, service_type = key
+    rows = MonthlyStatistics.objects.filter(
+        month=month, region_id=region_id, service_type=service_type
+    )
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    updates['updated_at'] = timezone.now()
+    if rows.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            MonthlyStatistics.objects.create(
+                month=month,
+                region_id=region_id,
+                region_name=_region_name(region_id),
+                service_type=service_type,
+                **deltas,
+            )
+    except IntegrityError:
+        # 并发请求已创建该行
+        rows.update(**updates)
+
+
+def move_need(need, old_bucket, new_bucket):
+    """
+    需求的归属变化（新建、取消、恢复、修改地域/类型、删除）时调整计数
+    地域或服务类型变化时，该需求已有响应的计数一并迁移
+    """
+    if old_bucket == new_bucket:
+        return
+    if old_bucket is not None:
+        bump(old_bucket[0], **{old_bucket[1]: -1})
+    if new_bucket is not None:
+        bump(new_bucket[0], **{new_bucket[1]: 1})
+
+    if old_bucket is None or new_bucket is None or old_bucket[0][1:] == new_bucket[0][1:]:
+        return
+    responses = need.responses.annotate(
+        month=TruncMonth('created_at')
+    ).values('month').annotate(count=Count('id')).order_by()
+    for row in responses:
+        month = row['month'].strftime('%Y%m')
+        bump((month, *old_bucket[0][1:]), total_responses=-row['count'])
+        bump((month, *new_bucket[0][1:]), total_responses=row['count'])
+
+
+def rebuild(apps=global_apps):
+    """
+    按 needs / responses / accepted_matches 全量重建汇总表，返回写入的行数
+    apps 为模型注册表（数据迁移中传入历史模型）
+    """
+    Need = apps.get_model('needs', 'Need')
+    Response = apps.get_model('responses', 'Response')
+    AcceptedMatch = apps.get_model('responses', 'AcceptedMatch')
+    Region = apps.get_model('regions', 'Region')
+    MonthlyStatistics = apps.get_model('stats', 'MonthlyStatistics')
+
+    # 历史模型（早期迁移状态）可能缺少部分汇总列
+    existing = {field.name for field in MonthlyStatistics._meta.fields}
+    fields = [field for field in MEASURE_FIELDS if field in existing]
+    totals = {}
+
+    def add(row, field, region='region_id', service_type='service_type'):
+        key = (row['month'].strftime('%Y%m'), row[region], row[service_type])
+        measures = totals.setdefault(key, dict.fromkeys(fields, 0))
+        if field in measures:
+            measures[field] += row['count']
+
+    needs = Need.objects.filter(status__in=list(NEED_STATUS_MEASURES)).annotate(
+        month=TruncMonth('created_at')
+    ).values('month', 'region_id', 'service_type', 'status').annotate(count=Count('id')).order_by()
+    for row in needs:
+        add(row, NEED_STATUS_MEASURES[row['status']])
+
+    responses = Response.objects.annotate(
+        month=TruncMonth('created_at')
+    ).values('month', 'need__region_id', 'need__service_type').annotate(count=Count('id')).order_by()
+    for row in responses:
+        add(row, 'total_responses', 'need__region_id', 'need__service_type')
+
+    matches = AcceptedMatch.objects.annotate(
+        month=TruncMonth('accepted_date')
+    ).values('month', 'region_id', 'service_type').annotate(count=Count('id')).order_by()
+    for row in matches:
+        add(row, 'total_accepted')
+
+    region_ids = {region_id for _, region_id, _ in totals if region_id is not None}
+    region_names = {
+        region.pk: region.full_name or region.name
+        for region in Region.objects.filter(pk__in=region_ids).only('name', 'full_name')
+    }
+
+    with transaction.atomic():
+        MonthlyStatistics.objects.all().delete()
+        MonthlyStatistics.objects.bulk_create([
+            MonthlyStatistics(
+                month=month,
+                region_id=region_id,
+                region_name=region_names.get(region_id, ''),
+                service_type=service_type,
+                **measures,
+            )
+            for (month, region_id, service_type), measures in sorted(
+                totals.items(), key=lambda item: (item[0][0], item[0][1] or 0, item[0][2])
+            )
+        ], batch_size=1000)
+    return len(totals)
@@ -0,0 +1,95 @@
+"""需求/响应/成功匹配变更时增量更新月度统计汇总表"""
+import threading
+from types import SimpleNamespace
+
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from apps.needs.models import Need
+from apps.responses.models import Response, AcceptedMatch
+from .rollup import bump, match_key, move_need, need_bucket, response_key
+
+# 影响汇总归属的需求字段
+NEED_KEY_FIELDS = ('status', 'created_at', 'region_id', 'service_type')
+
+# 正在删除的需求 ID -> 响应归属所需的字段（级联删除响应时免去逐条查询需求）
+_deleting = threading.local()
+
+
+def _deleting_needs():
+    if not hasattr(_deleting, 'needs'):
+        _deleting.needs = {}
+    return _deleting.needs
+
+
+def _loaded_need_bucket(instance):
+    """实例加载时的归属；字段被 defer 时返回 False（未知，避免触发额外查询）"""
+    if any(field not in instance.__dict__ for field in NEED_KEY_FIELDS):
+        return False
+    return need_bucket(instance)
+
+
+@receiver(post_init, sender=Need, dispatch_uid='stats_snapshot_need')
+def snapshot_need(sender, instance, **kwargs):
+    instance._stats_bucket = _loaded_need_bucket(instance) if instance.pk else None
+
+
+@receiver(pre_save, sender=Need, dispatch_uid='stats_load_need')
+def load_need(sender, instance, **kwargs):
+    # 实例以 only()/defer() 加载时，保存前从数据库读取原归属
+    if instance._stats_bucket is False:
+        old = sender.objects.filter(pk=instance.pk).values(*NEED_KEY_FIELDS).first()
+        instance._stats_bucket = need_bucket(SimpleNamespace(**old)) if old else None
+
+
+@receiver(post_save, sender=Need, dispatch_uid='stats_update_need')
+def update_need(sender, instance, created=False, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & {'status', 'created_at', 'region', 'service_type'}:
+        return
+    old_bucket = None if created else instance._stats_bucket
+    new_bucket = need_bucket(instance)
+    move_need(instance, old_bucket, new_bucket)
+    instance._stats_bucket = new_bucket
+
+
+@receiver(pre_delete, sender=Need, dispatch_uid='stats_stash_need')
+def stash_need(sender, instance, **kwargs):
+    # 级联删除时所有 pre_delete 先于删除语句发送，响应的 post_delete 发生在需求的 post_delete 之前
+    if 'region_id' in instance.__dict__ and 'service_type' in instance.__dict__:
+        _deleting_needs()[instance.pk] = SimpleNamespace(
+            region_id=instance.region_id, service_type=instance.service_type
+        )
+
+
+@receiver(post_delete, sender=Need, dispatch_uid='stats_remove_need')
+def remove_need(sender, instance, **kwargs):
+    # 响应随需求级联删除时各自扣减，这里只扣减需求本身
+    _deleting_needs().pop(instance.pk, None)
+    if instance._stats_bucket:
+        move_need(instance, instance._stats_bucket, None)
+
+
+@receiver(post_save, sender=Response, dispatch_uid='stats_add_response')
+def add_response(sender, instance, created=False, **kwargs):
+    if created:
+        bump(response_key(instance, instance.need), total_responses=1)
+
+
+@receiver(post_delete, sender=Response, dispatch_uid='stats_remove_response')
+def remove_response(sender, instance, **kwargs):
+    need = _deleting_needs().get(instance.need_id)
+    if need is None:
+        need = Need.objects.filter(pk=instance.need_id).only('region_id', 'service_type').first()
+    if need is not None:
+        bump(response_key(instance, need), total_responses=-1)
+
+
+@receiver(post_save, sender=AcceptedMatch, dispatch_uid='stats_add_match')
+def add_match(sender, instance, created=False, **kwargs):
+    if created:
+        bump(match_key(instance), total_accepted=1)
+
+
+@receiver(post_delete, sender=AcceptedMatch, dispatch_uid='stats_remove_match')
+def remove_match(sender, instance, **kwargs):
+    bump(match_key(instance), total_accepted=-1)
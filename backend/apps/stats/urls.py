@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import MonthlyStatisticsView, OverviewView
+from .views import MonthlyStatisticsView, OverviewView, StatisticsCubeView
 
 urlpatterns = [
     path('monthly/', MonthlyStatisticsView.as_view(), name='monthly-stats'),
     path('overview/', OverviewView.as_view(), name='overview'),
+    path('cube/', StatisticsCubeView.as_view(), name='stats-cube'),
 ]
@@ -1,12 +1,13 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count
-from django.db.models.functions import TruncMonth
+from django.db.models import F, Sum, Window
+from django.db.models.functions import RowNumber
 from datetime import datetime, timedelta
 
 from apps.needs.models import Need
 from apps.responses.models import AcceptedMatch
+from .models import MonthlyStatistics
 
 
 class MonthlyStatisticsView(APIView):
@@ -44,44 +45,30 @@ class MonthlyStatisticsView(APIView):
         else:
             end_date = datetime(end_year, end_mon + 1, 1)
         
-        # 查询需求统计
-        needs_query = Need.objects.filter(
-            created_at__gte=start_date,
-            created_at__lt=end_date,
-            status=0
+        # 从月度汇总表按月求和（行数只与月份数 × 地域 × 服务类型有关，与明细表规模无关）
+        stats_query = MonthlyStatistics.objects.filter(
+            month__gte=start_month,
+            month__lte=end_month,
         )
-        
-        # 查询成功匹配统计
-        matches_query = AcceptedMatch.objects.filter(
-            accepted_date__gte=start_date.date(),
-            accepted_date__lt=end_date.date()
-        )
-        
+
         # 应用筛选条件
         if region_id:
-            needs_query = needs_query.filter(region_id=region_id)
-            matches_query = matches_query.filter(region_id=region_id)
+            stats_query = stats_query.filter(region_id=region_id)
         if service_type:
-            needs_query = needs_query.filter(service_type=service_type)
-            matches_query = matches_query.filter(service_type=service_type)
-        
-        # 按月聚合需求数
-        needs_by_month = needs_query.annotate(
-            month=TruncMonth('created_at')
-        ).values('month').annotate(
-            count=Count('id')
+            stats_query = stats_query.filter(service_type=service_type)
+
+        monthly = stats_query.values('month').annotate(
+            needs=Sum('total_needs'),
+            accepted=Sum('total_accepted'),
         ).order_by('month')
-        
-        # 按月聚合成功匹配数（使用 Python 处理以兼容所有数据库）
-        matches_list = list(matches_query.values('accepted_date'))
-        matches_by_month_dict = {}
-        for match in matches_list:
-            month_key = match['accepted_date'].strftime('%Y-%m')
-            matches_by_month_dict[month_key] = matches_by_month_dict.get(month_key, 0) + 1
 
         # 构建图表数据
-        needs_dict = {item['month'].strftime('%Y-%m'): item['count'] for item in needs_by_month}
-        matches_dict = matches_by_month_dict
+        needs_dict = {}
+        matches_dict = {}
+        for item in monthly:
+            label = f"{item['month'][:4]}-{item['month'][4:]}"
+            needs_dict[label] = item['needs']
+            matches_dict[label] = item['accepted']
         
         # 生成所有月份标签
         labels = []
@@ -139,3 +126,132 @@ class OverviewView(APIView):
                 'total_matches': total_matches,
             }
         })
+
+
+class StatisticsCubeView(APIView):
+    """
+    多维统计（管理员）
+    按任意维度组合分组汇总，分组和 Top-N 均在数据库中完成（GROUP BY + 窗口函数）
+    """
+    permission_classes = [IsAuthenticated]
+
+    # 维度 -> 汇总表上的分组列
+    DIMENSIONS = {
+        'month': ['month'],
+        'province': ['region__province'],
+        'city': ['region__province', 'region__city'],
+        'region': ['region_id', 'region__full_name'],
+        'service_type': ['service_type'],
+    }
+    # 指标 -> 汇总列
+    MEASURES = {
+        'needs': 'total_needs',
+        'cancelled': 'cancelled_needs',
+        'responses': 'total_responses',
+        'accepted': 'total_accepted',
+    }
+    # 下钻筛选参数 -> 汇总表上的筛选条件
+    FILTERS = {
+        'province': 'region__province',
+        'city': 'region__city',
+        'region_id': 'region_id',
+        'service_type': 'service_type',
+    }
+
+    def get(self, request):
+        # 检查是否是管理员
+        if request.user.user_type != 'admin':
+            return Response({
+                'code': 403,
+                'message': '仅管理员可访问'
+            }, status=403)
+
+        dimensions = self._split(request.query_params.get('dimensions', 'month'))
+        measures = self._split(request.query_params.get('measures', ','.join(self.MEASURES)))
+        unknown = [name for name in dimensions if name not in self.DIMENSIONS] + \
+            [name for name in measures if name not in self.MEASURES]
+        if unknown or not dimensions or not measures:
+            return Response({
+                'code': 400,
+                'message': f'不支持的维度或指标: {", ".join(unknown) or "(空)"}'
+            }, status=400)
+
+        top_by = request.query_params.get('top_by', measures[0])
+        try:
+            top = int(request.query_params.get('top', 0))
+        except ValueError:
+            top = -1
+        if top < 0 or top_by not in measures:
+            return Response({
+                'code': 400,
+                'message': 'top 须为非负整数，top_by 须为所选指标之一'
+            }, status=400)
+
+        # 月份范围，默认近6个月
+        end_month = request.query_params.get('end_month') or datetime.now().strftime('%Y%m')
+        start_month = request.query_params.get('start_month') or \
+            (datetime.now() - timedelta(days=180)).strftime('%Y%m')
+
+        queryset = MonthlyStatistics.objects.filter(month__gte=start_month, month__lte=end_month)
+        for param, lookup in self.FILTERS.items():
+            value = request.query_params.get(param)
+            if value:
+                queryset = queryset.filter(**{lookup: value})
+
+        columns = []
+        for name in dimensions:
+            columns.extend(column for column in self.DIMENSIONS[name] if column not in columns)
+        aggregates = {name: Sum(self.MEASURES[name]) for name in measures}
+
+        rows = queryset.values(*columns).annotate(**aggregates)
+        if top:
+            # 最后一个维度在其余维度的每个分组内取前 N
+            parents = []
+            for name in dimensions[:-1]:
+                parents.extend(column for column in self.DIMENSIONS[name] if column not in parents)
+            rows = rows.annotate(rank=Window(
+                RowNumber(),
+                partition_by=[F(column) for column in parents] or None,
+                order_by=[aggregates[top_by].desc(), *[F(column).asc() for column in columns]],
+            )).filter(rank__lte=top)
+            rows = rows.order_by(*parents, 'rank')
+        else:
+            rows = rows.order_by(*columns)
+
+        totals = queryset.aggregate(**aggregates)
+
+        return Response({
+            'code': 200,
+            'message': 'success',
+            'data': {
+                'start_month': start_month,
+                'end_month': end_month,
+                'dimensions': dimensions,
+                'measures': measures,
+                'rows': [self._format_row(row, measures) for row in rows],
+                'totals': {name: totals[name] or 0 for name in measures},
+            }
+        })
+
+    @staticmethod
+    def _split(value):
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    @staticmethod
+    def _format_row(row, measures):
+        """分组列改为接口字段名，月份格式化为 YYYY-MM"""
+        renames = {
+            'region__province': 'province',
+            'region__city': 'city',
+            'region__full_name': 'region_name',
+        }
+        data = {}
+        for key, value in row.items():
+            if key == 'rank':
+                continue
+            if key == 'month':
+                value = f'{value[:4]}-{value[4:]}'
+            elif key in measures:
+                value = value or 0
+            data[renames.get(key, key)] = value
+        return data
@@ -0,0 +1,162 @@
+"""JWT 认证：进程内用户缓存与仅凭令牌声明的认证
+
+JWTAuthentication 每个请求都要 SELECT users 重建 request.user。CachedJWTAuthentication 把用户行
+缓存在进程内（LRU + TTL），命中时不查询数据库，每次请求仍构造新的模型实例，视图修改 request.user
+不会影响缓存或其他请求。
+- 缓存键为 (用户ID, 版本号)：User 的 post_save/post_delete 使版本号递增（见 signals.py），
+  与失效同时进行的数据库读取不会把旧数据写回缓存
+- 信号只能使本进程的缓存失效，多进程部署时其他进程最多在 USER_CACHE_TTL 秒后读到新数据
+  （例如管理员禁用用户），USER_CACHE_TTL = 0 时不缓存
+
+两个认证类都会检查令牌是否已注销（见 revocation.py，通常不访问数据库）。
+
+ClaimsJWTAuthentication 用于读接口：GET/HEAD/OPTIONS 只凭令牌声明构造 request.user（TokenUser，
+有 id、user_type），完全不访问用户表，也不检查 is_active。只能用于不把 request.user
+当作模型实例使用（外键赋值、查询过滤、比较）的接口。
+用户被禁用、删除或用户类型变化时注销其已签发的全部令牌（见 signals.py、RevocationStore.revoke_user），
+读接口靠注销检查拒绝旧令牌：本进程立即生效，其他进程最多在 REVOCATION_SYNC_INTERVAL 秒后生效。
+不经过模型保存的修改（QuerySet.update()、直接改数据库）不会触发注销，旧令牌在过期前
+（ACCESS_TOKEN_LIFETIME）仍可用于读接口。
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .revocation import revocation_store
+
+
+class UserCache:
+    """线程安全的 LRU + TTL 用户缓存，保存各字段的值而不是模型实例"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # 用户ID 统一为字符串（令牌中的 user_id 声明是字符串）
+        self._entries = OrderedDict()  # (用户ID, 版本号) -> (过期时间, 字段名, 字段值)
+        self._versions = OrderedDict()  # 用户ID -> 版本号（只记录失效过的用户）
+
+    def version(self, user_id):
+        with self._lock:
+            return self._versions.get(str(user_id), 0)
+
+    def get(self, user_id):
+        """返回新构造的用户实例，未命中或已过期时返回 None"""
+        user_id = str(user_id)
+        with self._lock:
+            key = (user_id, self._versions.get(user_id, 0))
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, field_names, values = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return get_user_model().from_db(DEFAULT_DB_ALIAS, field_names, values)
+
+    def put(self, user, version):
+        """缓存 version 版本时读取的用户；期间已失效（版本号变化）时不缓存"""
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        fields = user._meta.concrete_fields
+        entry = (
+            time.monotonic() + self.ttl,
+            [field.attname for field in fields],
+            [getattr(user, field.attname) for field in fields],
+        )
+        user_id = str(user.pk)
+        with self._lock:
+            if self._versions.get(user_id, 0) != version:
+                return
+            self._entries[(user_id, version)] = entry
+            self._entries.move_to_end((user_id, version))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            version = self._versions.pop(user_id, 0)
+            self._entries.pop((user_id, version), None)
+            self._versions[user_id] = version + 1
+            # 版本号只需保留到该用户的旧缓存过期
+            while len(self._versions) > self.maxsize:
+                old_id, old_version = self._versions.popitem(last=False)
+                self._entries.pop((old_id, old_version), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+user_cache = UserCache(
+    maxsize=getattr(settings, 'USER_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'USER_CACHE_TTL', 60),
+)
+
+
+def tokens_for_user(user):
+    """签发令牌，附带 user_type 声明（供 ClaimsJWTAuthentication 使用）"""
+    refresh = RefreshToken.for_user(user)
+    refresh['user_type'] = user.user_type
+    return refresh
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """从进程内缓存读取 request.user 的 JWTAuthentication，拒绝已注销的令牌"""
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if revocation_store.is_revoked(validated_token):
+            raise AuthenticationFailed('Token 已注销，请重新登录', code='token_revoked')
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        user = user_cache.get(user_id)
+        if user is None:
+            version = user_cache.version(user_id)
+            # 用户不存在、已禁用等情况由父类抛出异常，不缓存
+            user = super().get_user(validated_token)
+            user_cache.put(user, version)
+            return user
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
+
+
+class ClaimsJWTAuthentication(CachedJWTAuthentication):
+    """
+    读请求只凭令牌声明认证（TokenUser），写请求同 CachedJWTAuthentication
+    读请求不检查 is_active：禁用用户靠注销其令牌拒绝，其他进程最多延迟 REVOCATION_SYNC_INTERVAL 秒
+    """
+
+    def authenticate(self, request):
+        self.claims_only = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if not self.claims_only:
+            return super().get_user(validated_token)
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        return api_settings.TOKEN_USER_CLASS(validated_token)
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    迭代次数由 PASSWORD_HASH_ITERATIONS 配置的 PBKDF2（未配置时同 Django 默认值）
+    算法名仍为 pbkdf2_sha256，已有密码照常校验；迭代次数与配置不同的密码在下次登录时重新哈希（见 passwords.py）
+    """
+
+    def __init__(self):
+        self.iterations = getattr(settings, 'PASSWORD_HASH_ITERATIONS', None) or self.iterations
@@ -0,0 +1,107 @@
+"""登录密码校验的吞吐量基准（每秒登录数，及折合每核的登录数）
+
+登录的耗时几乎全部在密码哈希上。按当前配置（PASSWORD_HASHERS、PASSWORD_HASH_ITERATIONS、
+PASSWORD_HASH_WORKERS、PASSWORD_HASH_QUEUE）经 passwords.py 的线程池并发校验密码，
+不访问数据库；--iterations 可比较不同迭代次数下的吞吐量和延迟。
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from apps.users import passwords
+from apps.users.models import User
+
+PASSWORD = 'Benchmark123'
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0
+
+
+class Command(BaseCommand):
+    help = '测量登录密码校验的吞吐量'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=5,
+            help='测量时长（秒，默认 5）',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='并发登录请求数，即模拟的请求线程数（默认 8）',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            help='PBKDF2 迭代次数（默认使用 PASSWORD_HASH_ITERATIONS）',
+        )
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['duration'] <= 0:
+            raise CommandError('--concurrency 至少为 1，--duration 必须大于 0')
+
+        overrides = {}
+        if options['iterations']:
+            overrides['PASSWORD_HASH_ITERATIONS'] = options['iterations']
+        with override_settings(**overrides):
+            hashers.get_hashers.cache_clear()
+            try:
+                self.run(options['concurrency'], options['duration'])
+            finally:
+                hashers.get_hashers.cache_clear()
+
+    def run(self, concurrency, duration):
+        user = User(password=hashers.make_password(PASSWORD))
+        hasher = hashers.identify_hasher(user.password)
+        workers = getattr(settings, 'PASSWORD_HASH_WORKERS', 2)
+        cores = min(workers, os.cpu_count() or 1)
+        self.stdout.write(
+            f'{hasher.algorithm}，迭代次数 {getattr(hasher, "iterations", "-")}，'
+            f'哈希线程 {workers}，CPU 核数 {os.cpu_count()}，并发 {concurrency}，{duration:g} 秒'
+        )
+
+        latencies = []
+        busy = 0
+        lock = threading.Lock()
+        deadline = time.monotonic() + duration
+
+        def client():
+            nonlocal busy
+            while time.monotonic() < deadline:
+                started = time.monotonic()
+                try:
+                    passwords.check_password(user, PASSWORD)
+                except passwords.PasswordHashBusy as e:
+                    with lock:
+                        busy += 1
+                    time.sleep(min(e.retry_after, 0.05))
+                    continue
+                with lock:
+                    latencies.append(time.monotonic() - started)
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        rate = len(latencies) / elapsed
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(latencies)} 次登录，{rate:.1f} 次/秒，每核 {rate / cores:.1f} 次/秒'
+        ))
+        self.stdout.write(
+            f'延迟 p50 {percentile(latencies, 0.5) * 1000:.0f} ms，'
+            f'p95 {percentile(latencies, 0.95) * 1000:.0f} ms；队列已满被拒绝 {busy} 次'
+        )
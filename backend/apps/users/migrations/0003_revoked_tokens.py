@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-17 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_user_full_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=255, unique=True, verbose_name='令牌ID')),
+                ('expires_at', models.DateTimeField(verbose_name='过期时间')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='注销时间')),
+            ],
+            options={
+                'verbose_name': '已注销令牌',
+                'verbose_name_plural': '已注销令牌',
+                'db_table': 'revoked_tokens',
+                'indexes': [models.Index(fields=['expires_at'], name='revoked_tokens_expires_idx'), models.Index(fields=['created_at'], name='revoked_tokens_created_idx')],
+            },
+        ),
+    ]
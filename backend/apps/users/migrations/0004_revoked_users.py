@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-17 11:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_revoked_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedUser',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField(unique=True, verbose_name='用户ID')),
+                ('revoked_at', models.DateTimeField(verbose_name='注销时间')),
+                ('expires_at', models.DateTimeField(verbose_name='过期时间')),
+            ],
+            options={
+                'verbose_name': '已注销用户令牌',
+                'verbose_name_plural': '已注销用户令牌',
+                'db_table': 'revoked_users',
+                'indexes': [models.Index(fields=['expires_at'], name='revoked_users_expires_idx'), models.Index(fields=['revoked_at'], name='revoked_users_revoked_idx')],
+            },
+        ),
+    ]
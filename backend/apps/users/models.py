@@ -38,3 +38,64 @@ class User(AbstractUser):
     
     def __str__(self):
         return f'{self.username} ({self.full_name})'
+
+
+class RevokedToken(models.Model):
+    """已注销的 JWT（按 jti 记录，过期后自动清理，见 revocation.py）"""
+
+    jti = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='令牌ID'
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='过期时间'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='注销时间'
+    )
+
+    class Meta:
+        db_table = 'revoked_tokens'
+        verbose_name = '已注销令牌'
+        verbose_name_plural = '已注销令牌'
+        indexes = [
+            # 清理过期记录
+            models.Index(fields=['expires_at'], name='revoked_tokens_expires_idx'),
+            # 各进程增量同步新注销的令牌
+            models.Index(fields=['created_at'], name='revoked_tokens_created_idx'),
+        ]
+
+    def __str__(self):
+        return self.jti
+
+
+class RevokedUser(models.Model):
+    """
+    注销某用户在 revoked_at 之前签发的全部 JWT（用户被禁用、删除或类型变化时，见 revocation.py）
+    不关联用户表：用户删除后记录仍需保留到这些令牌过期
+    """
+
+    user_id = models.BigIntegerField(
+        unique=True,
+        verbose_name='用户ID'
+    )
+    revoked_at = models.DateTimeField(
+        verbose_name='注销时间'
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='过期时间'
+    )
+
+    class Meta:
+        db_table = 'revoked_users'
+        verbose_name = '已注销用户令牌'
+        verbose_name_plural = '已注销用户令牌'
+        indexes = [
+            models.Index(fields=['expires_at'], name='revoked_users_expires_idx'),
+            models.Index(fields=['revoked_at'], name='revoked_users_revoked_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} @ {self.revoked_at}'
@@ -0,0 +1,129 @@
+"""密码哈希的专用线程池（登录、注册、修改密码）
+
+PBKDF2 每次哈希需要数百毫秒 CPU。集中登录（如交班时）时若每个请求线程都在计算哈希，会占满所有
+worker，与登录无关的接口也随之排队。这里把哈希交给固定大小的线程池（PASSWORD_HASH_WORKERS，
+hashlib 计算期间释放 GIL，可利用多核），限制同时计算和等待的哈希数：
+- 视图是同步的，提交哈希的请求线程要等到哈希完成，等待期间同样占用一个 worker 线程
+- 因此已提交未完成的哈希不超过 PASSWORD_HASH_WORKERS × (1 + PASSWORD_HASH_QUEUE) 个
+  （每个哈希线程正在计算的一个加上排队的 PASSWORD_HASH_QUEUE 个），超出时立即抛出 PasswordHashBusy，
+  视图返回 503 和 Retry-After：被哈希占住的请求线程最多只有这么多，其余线程继续处理其他接口
+- 该上限应明显小于每个进程的请求线程数（如 gunicorn --threads）
+- 数据库读写仍在请求线程中进行，线程池只做哈希计算，不占用数据库连接
+- 限制按进程计算，多进程部署时每个进程各有一个线程池
+
+登录校验通过后，若密码哈希的算法或迭代次数与当前配置（PASSWORD_HASHERS、PASSWORD_HASH_ITERATIONS）
+不同，会用新参数重新哈希并保存：调整哈希参数不需要用户重置密码。
+"""
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, hashers
+
+_executor = None
+_executor_lock = threading.Lock()
+
+_pending = 0  # 已提交未完成的哈希数
+_average = 0.5  # 单次哈希耗时（秒）的滑动平均，用于估算 Retry-After
+_state_lock = threading.Lock()
+
+
+class PasswordHashBusy(Exception):
+    """哈希线程池已满，retry_after 为建议的重试等待秒数"""
+
+    def __init__(self, retry_after):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
+def _workers():
+    return getattr(settings, 'PASSWORD_HASH_WORKERS', 2)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix='password-hash')
+        return _executor
+
+
+def _timed(func, *args):
+    global _average
+    started = time.monotonic()
+    try:
+        return func(*args)
+    finally:
+        elapsed = time.monotonic() - started
+        with _state_lock:
+            _average = _average * 0.8 + elapsed * 0.2
+
+
+def _done(future):
+    global _pending
+    with _state_lock:
+        _pending -= 1
+
+
+def _limit():
+    """同时计算和排队的哈希数上限"""
+    return _workers() * (1 + getattr(settings, 'PASSWORD_HASH_QUEUE', 1))
+
+
+def _run(func, *args):
+    """在线程池中执行 func 并等待结果（请求线程在此阻塞）；排队已满时抛出 PasswordHashBusy"""
+    global _pending
+    with _state_lock:
+        if _pending >= _limit():
+            # 排在前面的哈希全部完成所需的时间
+            raise PasswordHashBusy(max(1, math.ceil(_pending * _average / _workers())))
+        _pending += 1
+    try:
+        future = _get_executor().submit(_timed, func, *args)
+    except BaseException:
+        _done(None)
+        raise
+    future.add_done_callback(_done)
+    return future.result()
+
+
+def _verify(password, encoded):
+    """校验密码，需要升级哈希参数时同时计算新哈希，返回 (是否正确, 新哈希或 None)"""
+    is_correct, must_update = hashers.verify_password(password, encoded)
+    if is_correct and must_update:
+        return True, hashers.make_password(password)
+    return is_correct, None
+
+
+def make_password(password):
+    return _run(hashers.make_password, password)
+
+
+def check_password(user, password):
+    """校验 user 的密码（不升级哈希参数）"""
+    is_correct, _ = _run(_verify, password, user.password)
+    return is_correct
+
+
+def authenticate(username, password):
+    """
+    按用户名和密码认证，与 ModelBackend 相同：用户不存在或已禁用时返回 None
+    校验通过且哈希参数已变化时，保存按当前配置重新计算的哈希
+    """
+    UserModel = get_user_model()
+    try:
+        user = UserModel._default_manager.get_by_natural_key(username)
+    except UserModel.DoesNotExist:
+        # 用户不存在时也计算一次哈希，避免通过响应时间判断用户名是否存在
+        make_password(password)
+        return None
+
+    is_correct, new_encoded = _run(_verify, password, user.password)
+    if not is_correct or not user.is_active:
+        return None
+    if new_encoded:
+        user.password = new_encoded
+        user.save(update_fields=['password'])
+    return user
@@ -0,0 +1,179 @@
+"""JWT 注销（按 jti 或按用户记录）
+
+登出时把访问令牌和刷新令牌的 jti 写入 RevokedToken，认证类每个请求检查当前令牌是否已注销。
+用户被禁用、删除或用户类型变化时写入 RevokedUser（见 signals.py），该用户在此之前签发的令牌
+（iat 不晚于 revoked_at）全部失效，仅凭令牌声明认证的读接口也随之拒绝。
+绝大多数令牌未被注销，检查先经过进程内的布隆过滤器（jti 和 “user:<用户ID>” 共用）：
+- 过滤器判定不存在（无假阴性）时直接放行，不访问数据库
+- 判定可能存在时才查询 RevokedToken 确认（假阳性率约 REVOCATION_BLOOM_ERROR_RATE）
+
+进程启动后首次检查时从数据库加载未过期的 jti；之后每 REVOCATION_SYNC_INTERVAL 秒由某个请求顺带
+增量同步其他进程新注销的令牌（按 created_at，重叠一段时间避免遗漏），本进程注销的令牌立即生效。
+每 REVOCATION_PRUNE_INTERVAL 秒删除已过期的记录并重建过滤器（过期令牌本身已无法通过校验）。
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .models import RevokedToken, RevokedUser
+
+# 增量同步时向前重叠的时间，覆盖同步期间尚未提交的注销记录
+SYNC_OVERLAP = timedelta(seconds=60)
+
+LOAD_BATCH_SIZE = 2000
+
+
+def user_key(user_id):
+    """按用户注销在过滤器中的键（用户ID 统一为字符串，令牌中的 user_id 声明是字符串）"""
+    return f'user:{user_id}'
+
+
+class BloomFilter:
+    """按容量和假阳性率确定位数组大小和哈希次数的布隆过滤器"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # 双重哈希：一次 blake2b 得到两个 64 位值，组合出 hashes 个位置
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        """加入 value；已存在（或假阳性）时不重复计数"""
+        if value in self:
+            return
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class RevocationStore:
+    """进程内的注销令牌过滤器，数据以 RevokedToken 表为准"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._synced_at = None  # 上次同步时的数据库时间
+        self._next_sync = 0
+        self._next_prune = 0
+
+    def _settings(self):
+        return (
+            getattr(settings, 'REVOCATION_BLOOM_CAPACITY', 100000),
+            getattr(settings, 'REVOCATION_BLOOM_ERROR_RATE', 0.001),
+        )
+
+    def _rebuild(self):
+        """从数据库加载未过期的 jti 重建过滤器（调用方持有锁）"""
+        now = timezone.now()
+        capacity, error_rate = self._settings()
+        active = RevokedToken.objects.filter(expires_at__gt=now)
+        active_users = RevokedUser.objects.filter(expires_at__gt=now)
+        total = active.count() + active_users.count()
+        bloom = BloomFilter(max(capacity, total * 2), error_rate)
+        for jti in active.values_list('jti', flat=True).iterator(chunk_size=LOAD_BATCH_SIZE):
+            bloom.add(jti)
+        for user_id in active_users.values_list('user_id', flat=True).iterator(chunk_size=LOAD_BATCH_SIZE):
+            bloom.add(user_key(user_id))
+        self._filter = bloom
+        self._synced_at = now
+
+    def _sync(self):
+        """增量加载其他进程新注销的 jti；到期时清理过期记录（调用方持有锁）"""
+        now = timezone.now()
+        if time.monotonic() >= self._next_prune:
+            RevokedToken.objects.filter(expires_at__lte=now).delete()
+            RevokedUser.objects.filter(expires_at__lte=now).delete()
+            self._next_prune = time.monotonic() + getattr(settings, 'REVOCATION_PRUNE_INTERVAL', 3600)
+            self._rebuild()
+            return
+        new = RevokedToken.objects.filter(created_at__gte=self._synced_at - SYNC_OVERLAP)
+        for jti in new.values_list('jti', flat=True).iterator(chunk_size=LOAD_BATCH_SIZE):
+            self._filter.add(jti)
+        new_users = RevokedUser.objects.filter(revoked_at__gte=self._synced_at - SYNC_OVERLAP)
+        for user_id in new_users.values_list('user_id', flat=True).iterator(chunk_size=LOAD_BATCH_SIZE):
+            self._filter.add(user_key(user_id))
+        self._synced_at = now
+        if self._filter.count > self._filter.capacity:
+            self._rebuild()  # 超出容量后假阳性率上升，按实际数量扩容
+
+    def _refresh(self):
+        if self._filter is not None and time.monotonic() < self._next_sync:
+            return
+        # 首次加载时其他线程等待；之后的定期同步由拿到锁的线程执行，其他线程沿用现有过滤器
+        if not self._lock.acquire(blocking=self._filter is None):
+            return
+        try:
+            if self._filter is None:
+                self._next_prune = time.monotonic() + getattr(settings, 'REVOCATION_PRUNE_INTERVAL', 3600)
+                self._rebuild()
+            elif time.monotonic() >= self._next_sync:
+                self._sync()
+            self._next_sync = time.monotonic() + getattr(settings, 'REVOCATION_SYNC_INTERVAL', 5)
+        finally:
+            self._lock.release()
+
+    def revoke(self, token):
+        """注销令牌（重复注销无副作用）"""
+        jti = token.get(api_settings.JTI_CLAIM)
+        if not jti:
+            return
+        RevokedToken.objects.get_or_create(
+            jti=jti,
+            defaults={'expires_at': datetime_from_epoch(token['exp'])}
+        )
+        self._refresh()
+        with self._lock:
+            self._filter.add(jti)
+
+    def revoke_user(self, user_id):
+        """注销该用户此前签发的全部令牌（记录保留到其中最晚的令牌过期）"""
+        now = timezone.now()
+        lifetime = max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+        RevokedUser.objects.update_or_create(
+            user_id=user_id,
+            defaults={'revoked_at': now, 'expires_at': now + lifetime}
+        )
+        self._refresh()
+        with self._lock:
+            self._filter.add(user_key(user_id))
+
+    def is_revoked(self, token):
+        jti = token.get(api_settings.JTI_CLAIM)
+        user_id = token.get(api_settings.USER_ID_CLAIM)
+        self._refresh()
+        if jti and jti in self._filter and RevokedToken.objects.filter(jti=jti).exists():
+            return True
+        if user_id is None or user_key(user_id) not in self._filter:
+            return False
+        revoked_at = RevokedUser.objects.filter(user_id=user_id).values_list('revoked_at', flat=True).first()
+        if revoked_at is None:
+            return False
+        # 没有 iat 声明的令牌无法判断签发时间，按已注销处理
+        issued_at = token.get('iat')
+        return issued_at is None or datetime_from_epoch(issued_at) <= revoked_at
+
+    def reset(self):
+        """丢弃进程内状态，下次检查时从数据库重新加载"""
+        with self._lock:
+            self._filter = None
+
+
+revocation_store = RevocationStore()
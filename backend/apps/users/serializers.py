@@ -1,5 +1,9 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from django.contrib.auth import get_user_model
+from . import passwords
+from .revocation import revocation_store
 from .validators import validate_password
 
 User = get_user_model()
@@ -40,13 +44,15 @@ class RegisterSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data.pop('confirm_password')
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            password=validated_data['password'],
+        # 同 create_user，密码在哈希线程池中计算（见 passwords.py）
+        user = User(
+            username=User.normalize_username(validated_data['username']),
             full_name=validated_data.get('full_name', ''),
             phone=validated_data['phone'],
             bio=validated_data.get('bio', ''),
         )
+        user.password = passwords.make_password(validated_data['password'])
+        user.save()
         return user
 
 
@@ -65,7 +71,7 @@ class ChangePasswordSerializer(serializers.Serializer):
     
     def validate_old_password(self, value):
         user = self.context['request'].user
-        if not user.check_password(value):
+        if not passwords.check_password(user, value):
             raise serializers.ValidationError('原密码错误')
         return value
 
@@ -82,6 +88,14 @@ class UpdateProfileSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('手机号必须为11位数字')
         return value
 
+    def update(self, instance, validated_data):
+        # instance 来自认证缓存（可能落后于其他进程的写入），只写本次修改的字段，不整行写回
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        if validated_data:
+            instance.save(update_fields=list(validated_data))
+        return instance
+
 
 class AdminUserSerializer(serializers.ModelSerializer):
     """管理员查看用户信息序列化器"""
@@ -109,3 +123,12 @@ class AdminUserUpdateSerializer(serializers.ModelSerializer):
         if value and (len(value) != 11 or not value.isdigit()):
             raise serializers.ValidationError('手机号必须为11位数字')
         return value
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """刷新令牌 - 已注销（登出）的刷新令牌不能再换取访问令牌"""
+
+    def validate(self, attrs):
+        if revocation_store.is_revoked(self.token_class(attrs['refresh'])):
+            raise InvalidToken('Token 已注销，请重新登录')
+        return super().validate(attrs)
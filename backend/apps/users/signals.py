@@ -0,0 +1,50 @@
+"""用户写入时使认证缓存失效；禁用、删除或改变用户类型时注销该用户已签发的令牌"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import user_cache
+from .revocation import revocation_store
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User, dispatch_uid='users_invalidate_auth_cache_save')
+@receiver(post_delete, sender=User, dispatch_uid='users_invalidate_auth_cache_delete')
+def invalidate_user_cache(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(post_init, sender=User, dispatch_uid='users_snapshot_token_claims')
+def snapshot_token_claims(sender, instance, **kwargs):
+    # 字段被 defer 时不读取（避免额外查询），保存时按未知处理
+    loaded = 'is_active' in instance.__dict__ and 'user_type' in instance.__dict__
+    instance._token_claims = (instance.is_active, instance.user_type) if loaded and instance.pk else None
+
+
+@receiver(post_save, sender=User, dispatch_uid='users_revoke_tokens_save')
+def revoke_tokens_on_change(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    仅凭令牌声明认证的读接口不查询用户表，用户被禁用或用户类型（令牌中的 user_type 声明）变化后
+    旧令牌须整体注销，否则在过期前（最长 ACCESS_TOKEN_LIFETIME）仍可访问
+    """
+    if update_fields is not None and not set(update_fields) & {'is_active', 'user_type'}:
+        return
+    claims = (instance.is_active, instance.user_type)
+    old_claims = getattr(instance, '_token_claims', None)
+    instance._token_claims = claims
+    if created:
+        return
+    if old_claims is None:
+        # 加载时字段不全，无法判断是否变化：已禁用的用户按变化处理
+        if not instance.is_active:
+            revocation_store.revoke_user(instance.pk)
+        return
+    was_active, old_user_type = old_claims
+    if (was_active and not instance.is_active) or instance.user_type != old_user_type:
+        revocation_store.revoke_user(instance.pk)
+
+
+@receiver(post_delete, sender=User, dispatch_uid='users_revoke_tokens_delete')
+def revoke_tokens_on_delete(sender, instance, **kwargs):
+    revocation_store.revoke_user(instance.pk)
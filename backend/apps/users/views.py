@@ -2,10 +2,16 @@ from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth import get_user_model
 from django.db.models import Count, Q
+from apps.common.pagination import paginate, InvalidCursor
 
+from . import passwords
+from .authentication import tokens_for_user
+from .revocation import revocation_store
 from .serializers import (
     UserSerializer,
     RegisterSerializer,
@@ -19,6 +25,14 @@ from .serializers import (
 User = get_user_model()
 
 
+def password_busy_response(exc):
+    """密码哈希线程池已满（见 passwords.py）"""
+    return Response({
+        'code': 503,
+        'message': '请求过多，请稍后重试'
+    }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': str(exc.retry_after)})
+
+
 class RegisterView(APIView):
     """用户注册"""
     permission_classes = [AllowAny]
@@ -26,9 +40,12 @@ class RegisterView(APIView):
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
+            try:
+                user = serializer.save()
+            except passwords.PasswordHashBusy as e:
+                return password_busy_response(e)
             # 生成 Token
-            refresh = RefreshToken.for_user(user)
+            refresh = tokens_for_user(user)
             return Response({
                 'code': 201,
                 'message': '注册成功',
@@ -56,10 +73,13 @@ class LoginView(APIView):
         if serializer.is_valid():
             username = serializer.validated_data['username']
             password = serializer.validated_data['password']
-            user = authenticate(username=username, password=password)
+            try:
+                user = passwords.authenticate(username, password)
+            except passwords.PasswordHashBusy as e:
+                return password_busy_response(e)
             
             if user is not None:
-                refresh = RefreshToken.for_user(user)
+                refresh = tokens_for_user(user)
                 return Response({
                     'code': 200,
                     'message': '登录成功',
@@ -81,17 +101,23 @@ class LoginView(APIView):
 
 
 class LogoutView(APIView):
-    """用户登出"""
+    """用户登出 - 注销当前访问令牌和提交的刷新令牌"""
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
-        try:
-            refresh_token = request.data.get('refresh')
-            if refresh_token:
-                token = RefreshToken(refresh_token)
-                token.blacklist()
-        except Exception:
-            pass
+        refresh_token = request.data.get('refresh')
+        if refresh_token:
+            try:
+                refresh = RefreshToken(refresh_token)
+            except TokenError:
+                refresh = None
+            if refresh is None or str(refresh.get(api_settings.USER_ID_CLAIM)) != str(request.user.pk):
+                return Response({
+                    'code': 400,
+                    'message': '刷新令牌无效'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            revocation_store.revoke(refresh)
+        revocation_store.revoke(request.auth)
         return Response({
             'code': 200,
             'message': '登出成功'
@@ -132,13 +158,17 @@ class ChangePasswordView(APIView):
 
     def post(self, request):
         serializer = ChangePasswordSerializer(data=request.data, context={'request': request})
-        if serializer.is_valid():
-            request.user.set_password(serializer.validated_data['new_password'])
-            request.user.save()
-            return Response({
-                'code': 200,
-                'message': '密码修改成功'
-            })
+        try:
+            if serializer.is_valid():
+                request.user.password = passwords.make_password(serializer.validated_data['new_password'])
+                # request.user 来自认证缓存，只写密码列，避免覆盖其他进程刚写入的字段
+                request.user.save(update_fields=['password'])
+                return Response({
+                    'code': 200,
+                    'message': '密码修改成功'
+                })
+        except passwords.PasswordHashBusy as e:
+            return password_busy_response(e)
         return Response({
             'code': 400,
             'message': '密码修改失败',
@@ -163,8 +193,6 @@ class AdminUserListView(APIView):
         user_type = request.query_params.get('user_type', '')
         is_active = request.query_params.get('is_active', '')
         ordering = request.query_params.get('ordering', 'id')
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 10))
 
         # 查询用户列表，附带需求和响应数量
         queryset = User.objects.annotate(
@@ -192,11 +220,14 @@ class AdminUserListView(APIView):
         if ordering:
             queryset = queryset.order_by(ordering)
 
-        # 分页
-        total = queryset.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        users = queryset[start:end]
+        # 分页（携带 cursor 参数时使用游标分页）
+        try:
+            users, page_meta = paginate(request, queryset)
+        except InvalidCursor as e:
+            return Response({
+                'code': 400,
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = AdminUserSerializer(users, many=True)
 
@@ -205,10 +236,7 @@ class AdminUserListView(APIView):
             'message': 'success',
             'data': {
                 'results': serializer.data,
-                'total': total,
-                'page': page,
-                'page_size': page_size,
-                'total_pages': (total + page_size - 1) // page_size,
+                **page_meta,
             }
         })
 
@@ -40,10 +40,18 @@ INSTALLED_APPS = [
     'apps.needs',
     'apps.responses',
     'apps.stats',
+    'apps.search',
+    'apps.common',
+    'apps.media',
+    'apps.profiling',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # CORS 中间件放在最前面
+    'apps.common.metrics.MetricsMiddleware',  # 按接口的请求指标（/api/_metrics）
+    'apps.profiling.middleware.ProfilingMiddleware',  # 按需分析请求（签名令牌或按比例采样）
+    'apps.common.querystats.QueryStatsMiddleware',  # 每个请求的 SQL 统计（Server-Timing、X-Query-Count）
+    'apps.common.ratelimit.RateLimitMiddleware',  # 限流与过载保护，尽早拒绝（响应仍带 CORS 头）
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -99,6 +107,19 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# 密码哈希（第一个为默认算法，其余用于校验旧密码；登录时自动升级为默认算法和当前迭代次数）
+PASSWORD_HASHERS = [
+    'apps.users.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = None  # PBKDF2 迭代次数，None 表示 Django 默认值；调低可降低登录延迟（安全性随之降低）
+PASSWORD_HASH_WORKERS = 2  # 每个进程的密码哈希线程数（见 apps/users/passwords.py），一般不超过 CPU 核数
+PASSWORD_HASH_QUEUE = 1  # 每个哈希线程最多排队的哈希数；等待哈希的请求线程会被占住，因此每个进程最多
+# PASSWORD_HASH_WORKERS × (1 + PASSWORD_HASH_QUEUE) 个请求在计算或等待哈希，超出时登录/注册/修改密码立即返回 503
+
 
 # Internationalization
 LANGUAGE_CODE = 'zh-hans'
@@ -113,6 +134,21 @@ STATIC_URL = 'static/'
 # Media files (Uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# 媒体文件发送方式：sendfile | x-accel-redirect | x-sendfile | stream（见 apps/media/views.py）
+MEDIA_SERVE_MODE = 'sendfile'
+# x-accel-redirect 模式下 Nginx internal location 的前缀，需指向 MEDIA_ROOT
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+# UUID 命名的上传文件的缓存时间（immutable）
+MEDIA_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# 上传图片的缩略图（见 apps/media/variants.py）
+IMAGE_VARIANT_SIZES = (160, 480, 1080)  # 最长边像素
+IMAGE_VARIANT_WORKERS = 2  # 进程池大小
+IMAGE_VARIANT_QUEUE_SIZE = 8  # 最多同时排队/执行的任务数
+IMAGE_VARIANT_TIMEOUT = 10  # 上传请求等待生成的秒数
+# 分块上传（见 apps/needs/upload_views.py UploadSession*View）
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 每块字节数
+UPLOAD_SESSION_TTL = 24 * 3600  # 上传会话有效期（秒）
+UPLOAD_WORKERS = 4  # 批量上传并行处理的线程数
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -123,12 +159,12 @@ AUTH_USER_MODEL = 'users.User'
 # Django REST Framework 配置
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'apps.common.pagination.HybridPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -142,11 +178,72 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'apps.users.serializers.RevocableTokenRefreshSerializer',
+}
+
+# JWT 认证的进程内用户缓存（apps/users/authentication.py）
+USER_CACHE_SIZE = 10000  # 最多缓存的用户数
+USER_CACHE_TTL = 60  # 秒，多进程部署时其他进程读到用户变更的最长延迟；0 表示不缓存
+
+# JWT 注销（apps/users/revocation.py）
+REVOCATION_BLOOM_CAPACITY = 100000  # 布隆过滤器初始容量（未过期的注销令牌数），超出时自动扩容
+REVOCATION_BLOOM_ERROR_RATE = 0.001  # 假阳性率（需查询数据库确认的比例）
+REVOCATION_SYNC_INTERVAL = 5  # 秒，同步其他进程注销记录的间隔，即登出在其他进程生效的最长延迟
+REVOCATION_PRUNE_INTERVAL = 3600  # 秒，清理过期注销记录的间隔
+
+# 限流与过载保护（apps/common/ratelimit.py），均按进程计算
+RATE_LIMITS = {  # 类别 -> (次数, 秒数)，已登录按用户、未登录按 IP 计数
+    'auth': (10, 60),
+    'upload': (60, 60),  # 分块上传每块一次请求（50 MB 视频约 50 次）
+    'search': (30, 60),
+    'admin': (120, 60),
+    'default': (300, 60),
+}
+RATE_LIMIT_MAX_KEYS = 100000  # 最多保留的令牌桶数
+RATE_LIMIT_PROXY_COUNT = 0  # 前置反向代理层数，大于 0 时从 X-Forwarded-For 取客户端 IP
+LOAD_SHED_IN_FLIGHT = 32  # 处理中的请求数达到该值时拒绝新请求（503）
+LOAD_SHED_PRIORITY_IN_FLIGHT = 64  # 开销小的读接口（default 类 GET）的上限
+
+# 每个请求的 SQL 统计（apps/common/querystats.py）
+QUERY_STATS_DUPLICATE_WARNING = 5  # 重复语句数达到该值时记录 WARNING（N+1 查询）
+QUERY_STATS_SLOW_QUERY_MS = 200  # 单条语句超过该毫秒数时记录 WARNING
+
+# 指标（apps/common/metrics.py，/api/_metrics）
+METRICS_DIR = BASE_DIR / 'metrics'  # 各 worker 进程的指标文件目录，服务重启时应清空
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']  # 允许抓取 /api/_metrics 的客户端 IP
+
+# 请求性能分析（apps/profiling）
+PROFILE_TOKEN_MAX_AGE = 600  # 分析令牌有效期（秒）
+PROFILE_SAMPLE_INTERVAL_MS = 5  # 栈采样间隔（毫秒）
+PROFILE_SAMPLING_REFRESH = 5  # 各进程读取采样比例设置的间隔（秒）
+PROFILE_MAX_STORED = 500  # 最多保留的分析记录数
+
+# 日志：SQL 统计每个请求一行 JSON，输出到标准错误
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'querystats': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'apps.common.querystats': {'handlers': ['querystats'], 'level': 'INFO', 'propagate': False},
+    },
 }
 
+# 管理端列表总数缓存
+ADMIN_COUNT_CACHE_TTL = 30  # 秒
+ADMIN_COUNT_ESTIMATE_LIMIT = 10000  # count=estimate 时最多统计的行数
+
 # CORS 配置
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
 CORS_ALLOW_CREDENTIALS = True
+CORS_EXPOSE_HEADERS = [
+    'Retry-After', 'RateLimit-Limit', 'RateLimit-Remaining', 'RateLimit-Reset',
+    'Server-Timing', 'X-Query-Count',
+]
@@ -2,9 +2,12 @@
 URL configuration for config project.
 """
 from django.contrib import admin
+import re
+
 from django.urls import path, include, re_path
 from django.conf import settings
-from apps.needs.stream_views import stream_media
+from apps.common.views import metrics_view
+from apps.media.views import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -15,10 +18,11 @@ urlpatterns = [
     path('api/needs/', include('apps.needs.urls')),
     path('api/responses/', include('apps.responses.urls')),
     path('api/statistics/', include('apps.stats.urls')),
+    path('api/profiles/', include('apps.profiling.urls')),
+    path('api/_metrics', metrics_view, name='metrics'),
 ]
 
-# 媒体文件访问 - 使用支持 Range 请求的流视图
-if settings.DEBUG:
-    urlpatterns += [
-        re_path(r'^media/(?P<path>.*)$', stream_media, name='media-stream'),
-    ]
+# 媒体文件访问 - 支持缓存校验和 Range 请求（生产环境可由前置代理发送，见 MEDIA_SERVE_MODE）
+urlpatterns += [
+    re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media-stream'),
+]
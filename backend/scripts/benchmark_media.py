@@ -0,0 +1,124 @@
+"""
+媒体文件发送性能对比脚本
+
+对比三种发送方式的吞吐量和每 GB 的 CPU 时间：
+- legacy: 原 8KB file_iterator 逐块读取 + 写 socket
+- stream: MEDIA_SERVE_MODE=stream，自适应块大小的 StreamingHttpResponse
+- sendfile: MEDIA_SERVE_MODE=sendfile，按 gunicorn 处理 wsgi.file_wrapper 的方式，
+  取响应中的文件描述符和 Content-Length 调用 os.sendfile
+
+接收端是独立进程（只读取并丢弃数据），CPU 时间只统计发送进程。
+
+使用方法:
+    cd backend
+    python scripts/benchmark_media.py [--size-mb 256] [--rounds 3] [--range]
+"""
+
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+# 设置 Django 环境
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+import argparse
+import multiprocessing
+import socket
+import tempfile
+import time
+
+from django.test import RequestFactory, override_settings
+
+from apps.media.views import file_iterator, serve_media
+
+
+def drain(sock):
+    """接收端：读取并丢弃全部数据"""
+    while sock.recv(1024 * 1024):
+        pass
+
+
+def send_legacy(sock, path, start, end):
+    for chunk in file_iterator(path, start, end):
+        sock.sendall(chunk)
+
+
+def send_response(sock, response):
+    """与 WSGI 服务器相同的方式消费响应"""
+    if getattr(response, 'file_to_stream', None) is not None and hasattr(os, 'sendfile'):
+        fileno = response.file_to_stream.fileno()
+        offset = os.lseek(fileno, 0, os.SEEK_CUR)
+        remaining = int(response['Content-Length'])
+        while remaining > 0:
+            sent = os.sendfile(sock.fileno(), fileno, offset, remaining)
+            if sent == 0:
+                break
+            offset += sent
+            remaining -= sent
+    else:
+        for chunk in response.streaming_content:
+            sock.sendall(chunk)
+    response.close()
+
+
+def run(method, media_root, name, size, use_range):
+    parent, child = socket.socketpair()
+    receiver = multiprocessing.Process(target=drain, args=(child,))
+    receiver.start()
+    child.close()
+
+    start, end = (size // 4, size - 1) if use_range else (0, size - 1)
+    headers = {'HTTP_RANGE': f'bytes={start}-'} if use_range else {}
+    request = RequestFactory().get(f'/media/{name}', **headers)
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    if method == 'legacy':
+        send_legacy(parent, os.path.join(media_root, name), start, end)
+    else:
+        with override_settings(MEDIA_ROOT=media_root, MEDIA_SERVE_MODE=method):
+            send_response(parent, serve_media(request, name))
+    parent.shutdown(socket.SHUT_WR)
+    cpu = time.process_time() - cpu
+    receiver.join()
+    wall = time.perf_counter() - wall
+    parent.close()
+    return end - start + 1, wall, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description='媒体文件发送性能对比')
+    parser.add_argument('--size-mb', type=int, default=256, help='测试文件大小（MB）')
+    parser.add_argument('--rounds', type=int, default=3, help='每种方式重复次数')
+    parser.add_argument('--range', action='store_true', help='使用 Range 请求（发送后 3/4）')
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory() as media_root:
+        name = 'benchmark.mp4'
+        with open(os.path.join(media_root, name), 'wb') as f:
+            block = os.urandom(1024 * 1024)
+            for _ in range(args.size_mb):
+                f.write(block)
+
+        print(f'文件大小: {args.size_mb} MB，{"Range 请求" if args.range else "完整请求"}，每种方式 {args.rounds} 次')
+        print(f'{"方式":<10}{"吞吐量 (MB/s)":>16}{"CPU 秒/GB":>14}')
+        for method in ('legacy', 'stream', 'sendfile'):
+            total_bytes = total_wall = total_cpu = 0
+            for _ in range(args.rounds):
+                sent, wall, cpu = run(method, media_root, name, size, args.range)
+                total_bytes += sent
+                total_wall += wall
+                total_cpu += cpu
+            gigabytes = total_bytes / 1024 ** 3
+            print(f'{method:<10}{total_bytes / 1024 ** 2 / total_wall:>16.0f}{total_cpu / gigabytes:>14.3f}')
+
+
+if __name__ == '__main__':
+    main()
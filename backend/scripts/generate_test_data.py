@@ -22,6 +22,8 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 import django
 django.setup()
 
+from django.core.management import call_command
+
 import random
 from datetime import datetime, timedelta
 
@@ -582,6 +584,11 @@ def main():
     needs = create_needs(users, regions)
     responses = create_responses(users, needs)
 
+    # 脚本直接写入响应，需重算需求上的响应计数
+    call_command('recount_need_responses')
+    # 同理，按明细重建月度统计汇总表
+    call_command('rebuild_monthly_statistics')
+
     # 保存账号到文件
     save_accounts_to_file()
 